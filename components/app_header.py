@@ -1,6 +1,12 @@
 import flet as ft
 from data.models import NotificationModel
 
+try:
+    from utils.websocket_client import realtime
+    REALTIME_ENABLED = True
+except ImportError:
+    REALTIME_ENABLED = False
+
 def create_app_header(page, user_id, role, name, current_page="classrooms"):
     """Create the application header with navigation, notifications, and user drawer"""
     
@@ -12,6 +18,8 @@ def create_app_header(page, user_id, role, name, current_page="classrooms"):
         from views.login_view import show_login
         page.close(drawer)
         page.session.clear()
+        if REALTIME_ENABLED:
+            realtime.sign_out(session=page)
         show_login(page)
 
     def toggle_theme(e):
@@ -8,15 +8,45 @@ Features:
 - Classroom utilization metrics
 - User activity analytics
 - Time-based patterns
+
+All metrics read the trigger-maintained rollup tables (data/rollups.py)
+instead of aggregating the reservations table. Utilization is measured in
+booked hours from the occupancy cube (data/occupancy.py).
 """
 
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import date, datetime, timedelta
+
 from data.database import db
-from datetime import datetime, timedelta
+from data.availability import to_date_key
+from data.cache import analytics_cache, cached
+from data.occupancy import occupancy_cube
+from data.rollups import ROLLUP_EPOCH
+
+# Seconds a cached metric stays fresh (see data/cache.py); stale values
+# are still served while one background refresh runs
+SUMMARY_TTL = int(os.getenv('ANALYTICS_SUMMARY_TTL', '15'))     # status counts, pending queue
+TREND_TTL = int(os.getenv('ANALYTICS_TREND_TTL', '60'))         # by date / hour / weekday
+RANKING_TTL = int(os.getenv('ANALYTICS_RANKING_TTL', '120'))    # classroom and faculty rankings
+
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# Bookings per creation day and user since a date. Grouping by day first
+# keeps the date window on user_daily_rollup's primary key.
+RECENT_BOOKINGS = """
+    SELECT created_date, user_id, SUM(reservations) as reservations
+    FROM user_daily_rollup
+    WHERE created_date >= %s
+    GROUP BY created_date, user_id
+"""
 
 class AnalyticsModel:
     """Analytics model for dashboard data"""
     
     @staticmethod
+    @cached(analytics_cache, ttl=SUMMARY_TTL, tags=("reservations",))
     def get_reservation_summary():
         """
         Get overall reservation statistics
@@ -27,17 +57,18 @@ class AnalyticsModel:
         db.connect()
         query = """
             SELECT 
-                COUNT(*) as total,
-                SUM(CASE WHEN status = 'pending' THEN 1 ELSE 0 END) as pending,
-                SUM(CASE WHEN status = 'approved' THEN 1 ELSE 0 END) as approved,
-                SUM(CASE WHEN status = 'rejected' THEN 1 ELSE 0 END) as rejected
-            FROM reservations
+                COALESCE(SUM(reservations), 0) as total,
+                COALESCE(SUM(CASE WHEN status = 'pending' THEN reservations ELSE 0 END), 0) as pending,
+                COALESCE(SUM(CASE WHEN status = 'approved' THEN reservations ELSE 0 END), 0) as approved,
+                COALESCE(SUM(CASE WHEN status = 'rejected' THEN reservations ELSE 0 END), 0) as rejected
+            FROM classroom_rollup
         """
         result = db.fetch_one(query)
         db.disconnect()
         return result or {"total": 0, "pending": 0, "approved": 0, "rejected": 0}
     
     @staticmethod
+    @cached(analytics_cache, ttl=SUMMARY_TTL, tags=("reservations",))
     def get_reservations_by_status():
         """
         Get reservation counts grouped by status
@@ -49,15 +80,17 @@ class AnalyticsModel:
         query = """
             SELECT 
                 status,
-                COUNT(*) as count
-            FROM reservations
+                SUM(reservations) as count
+            FROM classroom_rollup
             GROUP BY status
+            HAVING SUM(reservations) > 0
         """
         results = db.fetch_all(query)
         db.disconnect()
         return results
     
     @staticmethod
+    @cached(analytics_cache, ttl=RANKING_TTL, tags=("reservations", "classrooms"))
     def get_popular_classrooms(limit=5):
         """
         Get most frequently reserved classrooms
@@ -73,10 +106,13 @@ class AnalyticsModel:
             SELECT 
                 c.room_name,
                 c.building,
-                COUNT(r.id) as reservation_count
+                COALESCE(r.reservation_count, 0) as reservation_count
             FROM classrooms c
-            LEFT JOIN reservations r ON c.id = r.classroom_id
-            GROUP BY c.id, c.room_name, c.building
+            LEFT JOIN (
+                SELECT classroom_id, SUM(reservations) as reservation_count
+                FROM classroom_rollup
+                GROUP BY classroom_id
+            ) r ON c.id = r.classroom_id
             ORDER BY reservation_count DESC
             LIMIT %s
         """
@@ -85,6 +121,7 @@ class AnalyticsModel:
         return results
     
     @staticmethod
+    @cached(analytics_cache, ttl=TREND_TTL, tags=("reservations",))
     def get_reservations_by_date(days=7):
         """
         Get reservation counts for the last N days
@@ -98,11 +135,12 @@ class AnalyticsModel:
         db.connect()
         query = """
             SELECT 
-                DATE(reservation_date) as date,
-                COUNT(*) as count
-            FROM reservations
+                reservation_date as date,
+                SUM(reservations) as count
+            FROM date_rollup
             WHERE reservation_date >= DATE_SUB(CURDATE(), INTERVAL %s DAY)
-            GROUP BY DATE(reservation_date)
+            GROUP BY reservation_date
+            HAVING SUM(reservations) > 0
             ORDER BY date
         """
         results = db.fetch_all(query, (days,))
@@ -110,6 +148,7 @@ class AnalyticsModel:
         return results
     
     @staticmethod
+    @cached(analytics_cache, ttl=TREND_TTL, tags=("reservations",))
     def get_reservations_by_time_slot():
         """
         Get reservation distribution by time of day
@@ -120,11 +159,12 @@ class AnalyticsModel:
         db.connect()
         query = """
             SELECT 
-                HOUR(start_time) as hour,
-                COUNT(*) as count
-            FROM reservations
+                hour,
+                SUM(reservations) as count
+            FROM slot_rollup
             WHERE status = 'approved'
-            GROUP BY HOUR(start_time)
+            GROUP BY hour
+            HAVING SUM(reservations) > 0
             ORDER BY hour
         """
         results = db.fetch_all(query)
@@ -132,6 +172,7 @@ class AnalyticsModel:
         return results
     
     @staticmethod
+    @cached(analytics_cache, ttl=RANKING_TTL, tags=("reservations", "users"))
     def get_faculty_activity():
         """
         Get reservation counts by faculty member
@@ -143,11 +184,14 @@ class AnalyticsModel:
         query = """
             SELECT 
                 u.full_name,
-                COUNT(r.id) as reservation_count
+                COALESCE(r.reservation_count, 0) as reservation_count
             FROM users u
-            LEFT JOIN reservations r ON u.id = r.user_id
+            LEFT JOIN (
+                SELECT user_id, SUM(reservations) as reservation_count
+                FROM user_rollup
+                GROUP BY user_id
+            ) r ON u.id = r.user_id
             WHERE u.role = 'faculty'
-            GROUP BY u.id, u.full_name
             ORDER BY reservation_count DESC
         """
         results = db.fetch_all(query)
@@ -155,30 +199,45 @@ class AnalyticsModel:
         return results
     
     @staticmethod
+    @cached(analytics_cache, ttl=RANKING_TTL, tags=("reservations", "classrooms"))
     def get_classroom_utilization():
         """
         Calculate utilization rate for each classroom
         
+        Utilization is the share of opening hours the room was booked
+        (occupancy cube), not its number of reservations.
+        
         Returns:
-            list: List of classrooms with utilization percentages
+            list: List of classrooms with reservation counts, booked hours
+            and utilization percentages, most utilized first
         """
         db.connect()
         query = """
             SELECT 
+                c.id,
                 c.room_name,
                 c.building,
-                COUNT(r.id) as total_reservations,
-                SUM(CASE WHEN r.status = 'approved' THEN 1 ELSE 0 END) as approved_reservations
+                COALESCE(r.total, 0) as total_reservations,
+                COALESCE(r.approved, 0) as approved_reservations
             FROM classrooms c
-            LEFT JOIN reservations r ON c.id = r.classroom_id
-            GROUP BY c.id, c.room_name, c.building
-            ORDER BY total_reservations DESC
-        """
-        results = db.fetch_all(query)
+            LEFT JOIN (
+                SELECT
+                    classroom_id,
+                    SUM(reservations) as total,
+                    SUM(CASE WHEN status = 'approved' THEN reservations ELSE 0 END) as approved
+                FROM classroom_rollup
+                GROUP BY classroom_id
+            ) r ON c.id = r.classroom_id
+            ORDER BY c.id
+        """
+        rooms = db.fetch_all(query)
         db.disconnect()
-        return results
+        
+        occupancy = occupancy_cube.utilization([room['id'] for room in rooms])
+        return _utilization_items(rooms, occupancy)
     
     @staticmethod
+    @cached(analytics_cache, ttl=SUMMARY_TTL, tags=("reservations",))
     def get_approval_rate():
         """
         Calculate overall approval rate
@@ -189,10 +248,10 @@ class AnalyticsModel:
         db.connect()
         query = """
             SELECT 
-                COUNT(*) as total_processed,
-                SUM(CASE WHEN status = 'approved' THEN 1 ELSE 0 END) as approved,
-                SUM(CASE WHEN status = 'rejected' THEN 1 ELSE 0 END) as rejected
-            FROM reservations
+                COALESCE(SUM(reservations), 0) as total_processed,
+                COALESCE(SUM(CASE WHEN status = 'approved' THEN reservations ELSE 0 END), 0) as approved,
+                COALESCE(SUM(CASE WHEN status = 'rejected' THEN reservations ELSE 0 END), 0) as rejected
+            FROM classroom_rollup
             WHERE status IN ('approved', 'rejected')
         """
         result = db.fetch_one(query)
@@ -207,6 +266,7 @@ class AnalyticsModel:
         return result
     
     @staticmethod
+    @cached(analytics_cache, ttl=TREND_TTL, tags=("reservations",))
     def get_peak_hours():
         """
         Identify peak reservation hours
@@ -217,18 +277,21 @@ class AnalyticsModel:
         db.connect()
         query = """
             SELECT 
-                HOUR(start_time) as hour,
-                COUNT(*) as count
-            FROM reservations
+                hour,
+                SUM(reservations) as count
+            FROM slot_rollup
             WHERE status = 'approved'
-            GROUP BY HOUR(start_time)
+            GROUP BY hour
+            HAVING SUM(reservations) > 0
             ORDER BY count DESC
             LIMIT 3
         """
         results = db.fetch_all(query)
         db.disconnect()
-        return 
+        return results
+
     @staticmethod
+    @cached(analytics_cache, ttl=TREND_TTL, tags=("reservations",))
     def get_weekly_comparison():
         """
         Compare this week's reservations to last week
@@ -239,10 +302,11 @@ class AnalyticsModel:
         db.connect()
         query = """
             SELECT 
-                SUM(CASE WHEN reservation_date >= DATE_SUB(CURDATE(), INTERVAL 7 DAY) THEN 1 ELSE 0 END) as this_week,
+                SUM(CASE WHEN reservation_date >= DATE_SUB(CURDATE(), INTERVAL 7 DAY) THEN reservations ELSE 0 END) as this_week,
                 SUM(CASE WHEN reservation_date >= DATE_SUB(CURDATE(), INTERVAL 14 DAY) 
-                    AND reservation_date < DATE_SUB(CURDATE(), INTERVAL 7 DAY) THEN 1 ELSE 0 END) as last_week
-            FROM reservations
+                    AND reservation_date < DATE_SUB(CURDATE(), INTERVAL 7 DAY) THEN reservations ELSE 0 END) as last_week
+            FROM date_rollup
+            WHERE reservation_date >= DATE_SUB(CURDATE(), INTERVAL 14 DAY)
         """
         result = db.fetch_one(query)
         db.disconnect()
@@ -264,6 +328,7 @@ class AnalyticsModel:
         return {'this_week': 0, 'last_week': 0, 'change': 0.0}
     
     @staticmethod
+    @cached(analytics_cache, ttl=TREND_TTL, tags=("reservations",))
     def get_busiest_day():
         """
         Find the busiest day of the week for reservations
@@ -274,20 +339,21 @@ class AnalyticsModel:
         db.connect()
         query = """
             SELECT 
-                DAYNAME(reservation_date) as day_name,
-                DAYOFWEEK(reservation_date) as day_num,
-                COUNT(*) as count
-            FROM reservations
+                weekday,
+                SUM(reservations) as count
+            FROM slot_rollup
             WHERE status = 'approved'
-            GROUP BY DAYNAME(reservation_date), DAYOFWEEK(reservation_date)
+            GROUP BY weekday
+            HAVING SUM(reservations) > 0
             ORDER BY count DESC
             LIMIT 1
         """
         result = db.fetch_one(query)
         db.disconnect()
-        return result or {'day_name': 'N/A', 'count': 0}
+        return _busiest_day(result['weekday'], int(result['count'])) if result else {'day_name': 'N/A', 'count': 0}
     
     @staticmethod
+    @cached(analytics_cache, ttl=TREND_TTL, tags=("reservations",))
     def get_average_daily_reservations():
         """
         Calculate average reservations per day (last 30 days)
@@ -298,10 +364,11 @@ class AnalyticsModel:
         db.connect()
         query = """
             SELECT 
-                COUNT(*) as total,
+                SUM(reservations) as total,
                 DATEDIFF(MAX(reservation_date), MIN(reservation_date)) + 1 as days
-            FROM reservations
+            FROM date_rollup
             WHERE reservation_date >= DATE_SUB(CURDATE(), INTERVAL 30 DAY)
+            AND reservations > 0
         """
         result = db.fetch_one(query)
         db.disconnect()
@@ -311,6 +378,7 @@ class AnalyticsModel:
         return 0.0
     
     @staticmethod
+    @cached(analytics_cache, ttl=RANKING_TTL, tags=("reservations", "users"))
     def get_most_active_faculty():
         """
         Get the most active faculty member this month
@@ -319,26 +387,28 @@ class AnalyticsModel:
             dict: Faculty name and reservation count
         """
         db.connect()
-        query = """
+        query = f"""
             SELECT 
                 u.full_name,
-                COUNT(r.id) as reservation_count
-            FROM users u
-            JOIN reservations r ON u.id = r.user_id
+                SUM(r.reservations) as reservation_count
+            FROM ({RECENT_BOOKINGS}) r
+            JOIN users u ON u.id = r.user_id
             WHERE u.role = 'faculty'
-            AND r.created_at >= DATE_SUB(CURDATE(), INTERVAL 30 DAY)
             GROUP BY u.id, u.full_name
+            HAVING SUM(r.reservations) > 0
             ORDER BY reservation_count DESC
             LIMIT 1
         """
-        result = db.fetch_one(query)
+        result = db.fetch_one(query, ((date.today() - timedelta(days=30)).isoformat(),))
         db.disconnect()
         return result or {'full_name': 'N/A', 'reservation_count': 0}
     
     @staticmethod
+    @cached(analytics_cache, ttl=RANKING_TTL, tags=("reservations", "classrooms"))
     def get_room_recommendation():
         """
-        Recommend underutilized rooms based on capacity vs bookings
+        Recommend the least utilized room, by share of opening hours booked
+        (larger rooms first on ties)
         
         Returns:
             dict: Room recommendation with reason
@@ -346,31 +416,48 @@ class AnalyticsModel:
         db.connect()
         query = """
             SELECT 
+                c.id,
                 c.room_name,
                 c.building,
                 c.capacity,
-                COUNT(r.id) as bookings,
-                ROUND(COUNT(r.id) / c.capacity * 100, 1) as utilization_score
+                COALESCE(r.bookings, 0) as approved_reservations
             FROM classrooms c
-            LEFT JOIN reservations r ON c.id = r.classroom_id AND r.status = 'approved'
-            GROUP BY c.id, c.room_name, c.building, c.capacity
-            ORDER BY utilization_score ASC
-            LIMIT 1
-        """
-        result = db.fetch_one(query)
+            LEFT JOIN (
+                SELECT classroom_id, SUM(reservations) as bookings
+                FROM classroom_rollup
+                WHERE status = 'approved'
+                GROUP BY classroom_id
+            ) r ON c.id = r.classroom_id
+            ORDER BY c.id
+        """
+        rooms = db.fetch_all(query)
         db.disconnect()
         
-        if result:
-            return {
-                'room_name': result['room_name'],
-                'building': result['building'],
-                'bookings': result['bookings'] or 0,
-                'capacity': result['capacity'],
-                'message': f"Consider promoting {result['room_name']} - only {result['bookings'] or 0} bookings"
-            }
-        return {'room_name': 'N/A', 'message': 'No data available'}
+        occupancy = occupancy_cube.utilization([room['id'] for room in rooms])
+        return _recommend_room(rooms, occupancy)
+    
+    @staticmethod
+    @cached(analytics_cache, ttl=TREND_TTL, tags=("reservations", "classrooms"))
+    def get_occupancy_heatmap(classroom_id=None):
+        """
+        Booked time by weekday and hour, for one classroom or all of them
+        
+        Returns:
+            dict: days (names), hours (0-23), minutes and utilization
+            (percent of the hour booked) as 7 × 24 grids, Monday first
+        """
+        if classroom_id is None:
+            db.connect()
+            rooms = db.fetch_all("SELECT id FROM classrooms ORDER BY id")
+            db.disconnect()
+            classroom_ids = [room['id'] for room in rooms]
+        else:
+            classroom_ids = [classroom_id]
+        
+        return _heatmap_result(occupancy_cube.heatmap(classroom_ids))
     
     @staticmethod
+    @cached(analytics_cache, ttl=SUMMARY_TTL, tags=("reservations",))
     def get_pending_bottleneck():
         """
         Identify if there's a bottleneck in pending approvals
@@ -381,12 +468,13 @@ class AnalyticsModel:
         db.connect()
         query = """
             SELECT 
-                COUNT(*) as pending_count,
-                AVG(DATEDIFF(CURDATE(), DATE(created_at))) as avg_wait_days
-            FROM reservations
+                SUM(reservations) as pending_count,
+                (SUM(reservations) * DATEDIFF(CURDATE(), %s) - SUM(created_days)) * 1.0 / SUM(reservations) as avg_wait_days
+            FROM user_rollup
             WHERE status = 'pending'
+            AND reservations > 0
         """
-        result = db.fetch_one(query)
+        result = db.fetch_one(query, (ROLLUP_EPOCH,))
         db.disconnect()
         
         if result:
@@ -409,4 +497,392 @@ class AnalyticsModel:
                 'status': status,
                 'message': message
             }
-        return {'pending_count': 0, 'status': 'good', 'message': 'No pending reservations'}
\ No newline at end of file
+        return {'pending_count': 0, 'status': 'good', 'message': 'No pending reservations'}
+
+    # ---------- dashboard snapshot ----------
+
+    @staticmethod
+    def get_dashboard_snapshot(popular_limit=5, trend_days=30, parallel=None, timeout=None):
+        """
+        Compute every analytics dashboard metric in one pass.
+
+        The metrics come from three independent sections (see
+        SNAPSHOT_SECTIONS), seven queries in total once the occupancy cube
+        is loaded. They read the fixed-size summary rollups and at most the
+        last max(trend_days, 30) days of daily rows, so their cost does not
+        grow with history. With `parallel` (default: ANALYTICS_WORKERS > 1) each section runs on the shared analytics
+        worker pool with its own pooled connection, so the dashboard takes
+        as long as the slowest section rather than the sum of all of them.
+        A section that fails or takes longer than `timeout` seconds
+        (default: ANALYTICS_QUERY_TIMEOUT) is left out: its metrics hold
+        empty values and are listed in "unavailable".
+
+        Section results are cached in analytics_cache (SECTION_CACHE TTLs),
+        so repeated visits serve the last result and refresh it in the
+        background. Every metric matches the get_* method of the same name.
+
+        Returns:
+            dict: summary, by_status, popular_classrooms, date_trends,
+                time_slots, faculty_activity, utilization, approval,
+                peak_hours, weekly_comparison, busiest_day, avg_daily,
+                most_active, room_recommendation, occupancy_heatmap,
+                pending_status and unavailable (list of metric names)
+        """
+        if parallel is None:
+            parallel = ANALYTICS_WORKERS > 1
+        if timeout is None:
+            timeout = ANALYTICS_QUERY_TIMEOUT
+        options = {"today": date.today(), "popular_limit": popular_limit, "trend_days": trend_days}
+
+        snapshot = {"unavailable": []}
+        if parallel:
+            executor = _analytics_executor()
+            futures = {
+                name: executor.submit(_cached_section, name, section, options)
+                for name, section in SNAPSHOT_SECTIONS.items()
+            }
+            wait(futures.values(), timeout=timeout)
+            results = {}
+            for name, future in futures.items():
+                if not future.done():
+                    future.cancel()
+                    print(f"Analytics section '{name}' timed out after {timeout}s")
+                    continue
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    print(f"Analytics section '{name}' failed: {e}")
+        else:
+            results = {}
+            db.connect()
+            try:
+                for name, section in SNAPSHOT_SECTIONS.items():
+                    try:
+                        results[name] = _cached_section(name, section, options)
+                    except Exception as e:
+                        print(f"Analytics section '{name}' failed: {e}")
+            finally:
+                db.disconnect()
+
+        for name, section in SNAPSHOT_SECTIONS.items():
+            if name in results:
+                snapshot.update(results[name])
+            else:
+                empty = section(**options, rows=())
+                snapshot.update(empty)
+                snapshot["unavailable"].extend(empty)
+        return snapshot
+
+    @staticmethod
+    def _activity_section(today, trend_days=30, rows=None, **_):
+        """Status, hour and weekday totals plus a window of daily counts"""
+        if rows is None:
+            slot_rows = _fetch_section_rows("""
+                SELECT
+                    status,
+                    weekday,
+                    hour,
+                    SUM(reservations) as count
+                FROM slot_rollup
+                GROUP BY status, weekday, hour
+                HAVING SUM(reservations) > 0
+            """)
+            # Only the trend, weekly and 30-day metrics use dates
+            window_start = today - timedelta(days=max(trend_days, 30))
+            date_rows = _fetch_section_rows("""
+                SELECT
+                    reservation_date,
+                    SUM(reservations) as count
+                FROM date_rollup
+                WHERE reservation_date >= %s
+                GROUP BY reservation_date
+                HAVING SUM(reservations) > 0
+            """, (window_start.isoformat(),))
+        else:
+            slot_rows, date_rows = rows, rows
+
+        by_status = {}
+        approved_by_hour = {}
+        approved_by_weekday = {}
+        for row in slot_rows:
+            count = int(row['count'])
+            by_status[row['status']] = by_status.get(row['status'], 0) + count
+            if row['status'] == 'approved':
+                approved_by_hour[row['hour']] = approved_by_hour.get(row['hour'], 0) + count
+                approved_by_weekday[row['weekday']] = approved_by_weekday.get(row['weekday'], 0) + count
+
+        by_date = {}
+        for row in date_rows:
+            day = to_date_key(row['reservation_date'])
+            by_date[day] = by_date.get(day, 0) + int(row['count'])
+
+        total = sum(by_status.values())
+        summary = {
+            "total": total,
+            "pending": by_status.get('pending', 0),
+            "approved": by_status.get('approved', 0),
+            "rejected": by_status.get('rejected', 0),
+        }
+
+        processed = summary['approved'] + summary['rejected']
+        approval = {
+            "total_processed": processed,
+            "approved": summary['approved'],
+            "rejected": summary['rejected'],
+            "approval_rate": round(summary['approved'] / processed * 100, 1) if processed else 0,
+        }
+
+        trend_start = (today - timedelta(days=trend_days)).isoformat()
+        date_trends = [
+            {"date": date.fromisoformat(day), "count": count}
+            for day, count in sorted(by_date.items()) if day >= trend_start
+        ]
+
+        week_start = (today - timedelta(days=7)).isoformat()
+        last_week_start = (today - timedelta(days=14)).isoformat()
+        this_week = sum(count for day, count in by_date.items() if day >= week_start)
+        last_week = sum(count for day, count in by_date.items() if last_week_start <= day < week_start)
+        if last_week == 0:
+            change = 100.0 if this_week > 0 else 0.0
+        else:
+            change = round(((this_week - last_week) / last_week) * 100, 1)
+        weekly_comparison = {'this_week': this_week, 'last_week': last_week, 'change': change}
+
+        month_start = (today - timedelta(days=30)).isoformat()
+        recent_days = [day for day in by_date if day >= month_start]
+        if recent_days:
+            span = (date.fromisoformat(max(recent_days)) - date.fromisoformat(min(recent_days))).days + 1
+            avg_daily = round(sum(by_date[day] for day in recent_days) / span, 1)
+        else:
+            avg_daily = 0.0
+
+        time_slots = [{"hour": hour, "count": count} for hour, count in sorted(approved_by_hour.items())]
+        peak_hours = sorted(time_slots, key=lambda slot: slot['count'], reverse=True)[:3]
+
+        if approved_by_weekday:
+            busiest_day = _busiest_day(*max(approved_by_weekday.items(), key=lambda item: item[1]))
+        else:
+            busiest_day = {'day_name': 'N/A', 'count': 0}
+
+        return {
+            "summary": summary,
+            "by_status": [{"status": name, "count": count} for name, count in by_status.items()],
+            "approval": approval,
+            "date_trends": date_trends,
+            "weekly_comparison": weekly_comparison,
+            "avg_daily": avg_daily,
+            "time_slots": time_slots,
+            "peak_hours": peak_hours,
+            "busiest_day": busiest_day,
+        }
+
+    @staticmethod
+    def _classroom_section(popular_limit=5, rows=None, **_):
+        """Per-classroom metrics from the reservation rollup and the occupancy cube"""
+        if rows is None:
+            room_rows = _fetch_section_rows("""
+                SELECT
+                    classroom_id,
+                    status,
+                    SUM(reservations) as count
+                FROM classroom_rollup
+                GROUP BY classroom_id, status
+                HAVING SUM(reservations) > 0
+            """)
+            classrooms = _fetch_section_rows("SELECT id, room_name, building, capacity FROM classrooms ORDER BY id")
+            classroom_ids = [room['id'] for room in classrooms]
+            occupancy = occupancy_cube.utilization(classroom_ids)
+            heatmap = occupancy_cube.heatmap(classroom_ids)
+        else:
+            room_rows, classrooms, occupancy = rows, rows, {}
+            heatmap = {"minutes": [[0] * 24] * 7, "utilization": [[0.0] * 24] * 7}
+
+        room_total = {}
+        room_approved = {}
+        for row in room_rows:
+            room_total[row['classroom_id']] = room_total.get(row['classroom_id'], 0) + int(row['count'])
+            if row['status'] == 'approved':
+                room_approved[row['classroom_id']] = room_approved.get(row['classroom_id'], 0) + int(row['count'])
+
+        rooms = [
+            dict(room,
+                 total_reservations=room_total.get(room['id'], 0),
+                 approved_reservations=room_approved.get(room['id'], 0))
+            for room in classrooms
+        ]
+        by_count = sorted(rooms, key=lambda room: room['total_reservations'], reverse=True)
+        popular_classrooms = [
+            {"room_name": room['room_name'], "building": room['building'],
+             "reservation_count": room['total_reservations']}
+            for room in by_count[:popular_limit]
+        ]
+
+        return {
+            "utilization": _utilization_items(rooms, occupancy),
+            "popular_classrooms": popular_classrooms,
+            "room_recommendation": _recommend_room(rooms, occupancy),
+            "occupancy_heatmap": _heatmap_result(heatmap),
+        }
+
+    @staticmethod
+    def _faculty_section(today, rows=None, **_):
+        """Per-user totals from the user rollup, plus a 30-day window for the most active"""
+        if rows is None:
+            user_rows = _fetch_section_rows("""
+                SELECT
+                    user_id,
+                    status,
+                    SUM(reservations) as count,
+                    SUM(created_days) as created_days
+                FROM user_rollup
+                GROUP BY user_id, status
+                HAVING SUM(reservations) > 0
+            """)
+            recent_rows = _fetch_section_rows(
+                f"SELECT user_id, SUM(reservations) as count FROM ({RECENT_BOOKINGS}) r GROUP BY user_id",
+                ((today - timedelta(days=30)).isoformat(),)
+            )
+            faculty = _fetch_section_rows("SELECT id, full_name FROM users WHERE role = 'faculty' ORDER BY id")
+        else:
+            user_rows, recent_rows, faculty = rows, rows, rows
+
+        # Day numbers count from ROLLUP_EPOCH (see data/rollups.py)
+        today_number = (today - date.fromisoformat(ROLLUP_EPOCH)).days
+        user_total = {}
+        pending = 0
+        pending_wait = 0
+        for row in user_rows:
+            user_total[row['user_id']] = user_total.get(row['user_id'], 0) + int(row['count'])
+            if row['status'] == 'pending':
+                pending += int(row['count'])
+                pending_wait += int(row['count']) * today_number - int(row['created_days'] or 0)
+        user_recent = {row['user_id']: int(row['count']) for row in recent_rows}
+
+        faculty_activity = sorted((
+            {"full_name": user['full_name'], "reservation_count": user_total.get(user['id'], 0)}
+            for user in faculty
+        ), key=lambda item: item['reservation_count'], reverse=True)
+
+        active = [(user_recent.get(user['id'], 0), user['full_name']) for user in faculty]
+        active = [item for item in active if item[0] > 0]
+        if active:
+            count, full_name = max(active, key=lambda item: item[0])
+            most_active = {'full_name': full_name, 'reservation_count': count}
+        else:
+            most_active = {'full_name': 'N/A', 'reservation_count': 0}
+
+        avg_wait = round(pending_wait / pending, 1) if pending else 0
+        if pending > 5:
+            status, message = 'warning', f"{pending} reservations waiting (avg {avg_wait} days)"
+        elif pending > 0:
+            status, message = 'normal', f"{pending} pending approval"
+        else:
+            status, message = 'good', "No pending reservations"
+        pending_status = {'pending_count': pending, 'avg_wait_days': avg_wait, 'status': status, 'message': message}
+
+        return {
+            "faculty_activity": faculty_activity,
+            "most_active": most_active,
+            "pending_status": pending_status,
+        }
+
+
+# ---------- snapshot worker pool ----------
+
+ANALYTICS_WORKERS = int(os.getenv('ANALYTICS_WORKERS', '3'))
+ANALYTICS_QUERY_TIMEOUT = float(os.getenv('ANALYTICS_QUERY_TIMEOUT', '10'))
+
+# Independent parts of the dashboard snapshot, each run (and cached) as one unit
+SNAPSHOT_SECTIONS = {
+    "activity": AnalyticsModel._activity_section,
+    "classrooms": AnalyticsModel._classroom_section,
+    "faculty": AnalyticsModel._faculty_section,
+}
+
+# section -> (ttl, invalidation tags)
+SECTION_CACHE = {
+    "activity": (SUMMARY_TTL, ("reservations",)),
+    "classrooms": (RANKING_TTL, ("reservations", "classrooms")),
+    "faculty": (RANKING_TTL, ("reservations", "users")),
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _analytics_executor():
+    """Bounded thread pool shared by all dashboard snapshots"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=ANALYTICS_WORKERS, thread_name_prefix="analytics")
+    return _executor
+
+
+def _utilization_items(rooms, occupancy):
+    """Utilization rows for classrooms with counts, most booked hours first"""
+    items = []
+    for room in rooms:
+        booked = occupancy.get(room['id'], {})
+        items.append({
+            "room_name": room['room_name'],
+            "building": room['building'],
+            "total_reservations": int(room['total_reservations']),
+            "approved_reservations": int(room['approved_reservations']),
+            "booked_hours": round(booked.get('booked_minutes', 0) / 60, 1),
+            "utilization": booked.get('utilization', 0.0),
+        })
+    items.sort(key=lambda item: (item['utilization'], item['total_reservations']), reverse=True)
+    return items
+
+
+def _recommend_room(rooms, occupancy):
+    """Least utilized room with a capacity, larger rooms first on ties"""
+    scored = [room for room in rooms if room['capacity']]
+    if not scored:
+        return {'room_name': 'N/A', 'message': 'No data available'}
+    room = min(scored, key=lambda r: (occupancy.get(r['id'], {}).get('utilization', 0.0), -r['capacity']))
+    booked = occupancy.get(room['id'], {})
+    utilization = booked.get('utilization', 0.0)
+    return {
+        'room_name': room['room_name'],
+        'building': room['building'],
+        'bookings': int(room['approved_reservations']),
+        'capacity': room['capacity'],
+        'booked_hours': round(booked.get('booked_minutes', 0) / 60, 1),
+        'utilization': utilization,
+        'message': f"Consider promoting {room['room_name']} - booked {utilization}% of opening hours"
+    }
+
+
+def _busiest_day(weekday, count):
+    """Busiest-day result for a weekday (Monday = 0), with MySQL's DAYOFWEEK number"""
+    return {'day_name': DAY_NAMES[weekday], 'day_num': (weekday + 1) % 7 + 1, 'count': count}
+
+
+def _heatmap_result(heatmap):
+    """Label an occupancy cube heatmap with day names and hours"""
+    return {
+        "days": DAY_NAMES,
+        "hours": list(range(24)),
+        "minutes": heatmap["minutes"],
+        "utilization": heatmap["utilization"],
+    }
+
+
+def _cached_section(name, section, options):
+    """Run one snapshot section through analytics_cache"""
+    ttl, tags = SECTION_CACHE[name]
+    key = ("snapshot", name, tuple(sorted(options.items())))
+    return analytics_cache.get(key, lambda: section(**options), ttl, tags)
+
+
+def _fetch_section_rows(query, params=None):
+    """fetch_all on this thread's connection, raising instead of returning [] on errors"""
+    if db.connect() is None:
+        raise ConnectionError("Could not connect to the database")
+    try:
+        return db.fetch_all(query, params, raise_errors=True)
+    finally:
+        db.disconnect()
@@ -0,0 +1,526 @@
+"""
+Availability Index
+==================
+In-process index of blocking (approved/ongoing) reservations
+
+Features:
+- Reservations keyed by date and classroom, stored as sorted interval lists
+- O(log n) overlap checks and free-room queries
+- Per-room slot bitsets (5-minute slots) for all-rooms filters and timelines
+- Loaded lazily, one query per date, and kept up to date by ReservationModel
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from datetime import date, datetime, time as dt_time, timedelta
+
+from data.database import db
+
+# Reservations in these states block a time slot
+BLOCKING_STATUSES = ("approved", "ongoing")
+
+# Slot grid resolution: one bit per 5 minutes, 288 bits per room per day
+SLOT_MINUTES = 5
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+
+def to_minutes(value):
+    """Convert a TIME value (timedelta, time, 'HH:MM' or 'HH:MM:SS') to minutes after midnight"""
+    if isinstance(value, timedelta):
+        return int(value.total_seconds()) // 60
+    if isinstance(value, (dt_time, datetime)):
+        return value.hour * 60 + value.minute
+    parts = str(value).strip().split(":")
+    return int(parts[0]) * 60 + int(parts[1])
+
+
+def slot_mask(start, end):
+    """
+    Bitset of the slots touched by [start, end) (minutes after midnight).
+    A partially covered slot counts as touched.
+    """
+    if end <= start:
+        return 0
+    first = start // SLOT_MINUTES
+    last = -(-end // SLOT_MINUTES)  # ceiling
+    return ((1 << (last - first)) - 1) << first
+
+
+def slot_runs(bits):
+    """Split a slot bitset into (start, end) minute ranges of consecutive set slots"""
+    runs = []
+    slot = 0
+    while bits:
+        if bits & 1:
+            start = slot
+            while bits & 1:
+                bits >>= 1
+                slot += 1
+            runs.append((start * SLOT_MINUTES, slot * SLOT_MINUTES))
+        else:
+            skip = (bits & -bits).bit_length() - 1  # jump to the next set bit
+            bits >>= skip
+            slot += skip
+    return runs
+
+
+def to_date_key(value):
+    """Convert a DATE value (date, datetime or 'YYYY-MM-DD...') to an ISO date string"""
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)[:10]
+
+
+class _RoomDay:
+    """
+    Blocking reservations of one classroom on one date.
+
+    Intervals are kept sorted by start time together with a running
+    maximum of end times, so an overlap check is one bisect plus a walk
+    over the (normally zero or one) intervals that actually overlap.
+    `bits` is the same day as a slot bitset for whole-grid queries.
+    """
+
+    __slots__ = ("entries", "starts", "max_ends", "bits", "unaligned")
+
+    def __init__(self):
+        self.entries = []    # sorted (start, end, reservation_id, row)
+        self.starts = []     # start minute of each entry
+        self.max_ends = []   # max end minute of entries[0..i]
+        self.bits = 0        # occupied slots
+        self.unaligned = 0   # entries not on slot boundaries
+
+    def add(self, start, end, reservation_id, row):
+        entry = (start, end, reservation_id, row)
+        position = bisect_left(self.entries, entry[:3])
+        self.entries.insert(position, entry)
+        self.starts.insert(position, start)
+        self.max_ends.insert(position, 0)
+        self._rebuild_from(position)
+        self.bits |= slot_mask(start, end)
+        if start % SLOT_MINUTES or end % SLOT_MINUTES:
+            self.unaligned += 1
+
+    def remove(self, reservation_id):
+        for position, entry in enumerate(self.entries):
+            if entry[2] == reservation_id:
+                del self.entries[position]
+                del self.starts[position]
+                del self.max_ends[position]
+                self._rebuild_from(position)
+                self.bits = 0
+                self.unaligned = 0
+                for start, end, _, _ in self.entries:
+                    self.bits |= slot_mask(start, end)
+                    if start % SLOT_MINUTES or end % SLOT_MINUTES:
+                        self.unaligned += 1
+                return True
+        return False
+
+    def _rebuild_from(self, position):
+        running = self.max_ends[position - 1] if position > 0 else 0
+        for i in range(position, len(self.entries)):
+            running = max(running, self.entries[i][1])
+            self.max_ends[i] = running
+
+    def conflicts(self, start, end, exclude_id=None, first_only=False):
+        """Entries overlapping [start, end), newest start first"""
+        found = []
+        i = bisect_left(self.starts, end) - 1   # last entry starting before `end`
+        while i >= 0 and self.max_ends[i] > start:
+            entry = self.entries[i]
+            if entry[1] > start and entry[2] != exclude_id:
+                found.append(entry)
+                if first_only:
+                    break
+            i -= 1
+        return found
+
+    def overlaps(self, start, end, exclude_id=None):
+        return bool(self.conflicts(start, end, exclude_id, first_only=True))
+
+    def grid_overlaps(self, start, end, mask):
+        """Overlap check that answers from the bitset whenever it is exact"""
+        if not self.bits & mask:
+            return False
+        if not self.unaligned and not (start % SLOT_MINUTES or end % SLOT_MINUTES):
+            return True
+        # Slot edges are approximate here; confirm against the intervals
+        return self.overlaps(start, end)
+
+
+def pick_non_overlapping(existing, candidates):
+    """
+    Decide which candidate reservations can be approved together.
+
+    Candidates are taken in the given order; each one is accepted unless it
+    overlaps an `existing` row or a candidate accepted before it.
+
+    Args:
+        existing (list): blocking reservation rows already in place
+        candidates (list): rows to approve, highest priority first
+        (rows need id, classroom_id, reservation_date, start_time, end_time)
+
+    Returns:
+        tuple: (accepted rows, conflicting rows)
+    """
+    days = {}
+    for row in existing:
+        key = (to_date_key(row["reservation_date"]), row["classroom_id"])
+        days.setdefault(key, _RoomDay()).add(
+            to_minutes(row["start_time"]), to_minutes(row["end_time"]), row["id"], row
+        )
+
+    accepted, conflicting = [], []
+    for row in candidates:
+        key = (to_date_key(row["reservation_date"]), row["classroom_id"])
+        room_day = days.setdefault(key, _RoomDay())
+        start, end = to_minutes(row["start_time"]), to_minutes(row["end_time"])
+        if room_day.overlaps(start, end, exclude_id=row["id"]):
+            conflicting.append(row)
+        else:
+            room_day.add(start, end, row["id"], row)
+            accepted.append(row)
+    return accepted, conflicting
+
+
+class AvailabilityIndex:
+    """
+    Thread-safe availability index for all classrooms.
+
+    A date is loaded from the database the first time it is queried and
+    then served from memory. ReservationModel keeps it current through
+    add()/remove() on every write path. Entries also expire after `ttl`
+    seconds so that changes made by other app processes are picked up.
+    Booking itself re-checks conflicts in the database, so a briefly
+    stale index can only affect what the UI suggests, not what is stored.
+    """
+
+    def __init__(self, ttl=None, loader=None):
+        self.ttl = float(os.getenv('AVAILABILITY_TTL', '60')) if ttl is None else ttl
+        self._loader = loader or self._load_from_db
+        self._days = {}       # date key -> {"rooms": {classroom_id: _RoomDay}, "loaded_at": float}
+        self._by_id = {}      # reservation_id -> (date key, classroom_id)
+        self._versions = {}   # date key -> mutation counter, guards concurrent loads
+        self._loading = Counter()  # date key -> loads in flight
+        self._lock = threading.RLock()
+
+    # ---------- loading ----------
+
+    @staticmethod
+    def _load_from_db(date_keys):
+        """Blocking rows for the given dates, or None if the query failed"""
+        placeholders = ", ".join(["%s"] * len(date_keys))
+        if db.connect() is None:
+            return None
+        query = f"""
+            SELECT id, classroom_id, reservation_date, start_time, end_time, purpose, status
+            FROM reservations
+            WHERE reservation_date IN ({placeholders})
+            AND status IN ('approved', 'ongoing')
+        """
+        try:
+            return db.fetch_all(query, tuple(date_keys), raise_errors=True)
+        except db.backend.Error:
+            return None  # already logged by fetch_all
+        finally:
+            db.disconnect()
+
+    def ensure_loaded(self, dates):
+        """
+        Load every date in `dates` that is missing or expired, with a single query.
+
+        If the load fails nothing is cached, so the dates are retried on
+        next use instead of reading as free until the TTL expires.
+        """
+        now = time.monotonic()
+        with self._lock:
+            missing = sorted({
+                key for key in map(to_date_key, dates)
+                if key not in self._days or now - self._days[key]["loaded_at"] > self.ttl
+            })
+            versions = {key: self._versions.get(key, 0) for key in missing}
+            self._loading.update(missing)
+        if not missing:
+            return
+
+        try:
+            rows = self._loader(missing)
+        finally:
+            with self._lock:
+                self._loading.subtract(missing)
+                self._loading += Counter()  # drop zero counts
+        if rows is None:
+            return
+
+        with self._lock:
+            for key in missing:
+                # Skip dates written to while we were loading; the next query reloads them
+                if self._versions.get(key, 0) != versions[key]:
+                    self._drop_day(key)
+                    continue
+                self._drop_day(key)
+                self._days[key] = {"rooms": {}, "loaded_at": now}
+            for row in rows:
+                key = to_date_key(row["reservation_date"])
+                if key in self._days and self._versions.get(key, 0) == versions.get(key):
+                    self._insert(key, row)
+
+    def _drop_day(self, key):
+        day = self._days.pop(key, None)
+        if day:
+            for room_day in day["rooms"].values():
+                for entry in room_day.entries:
+                    self._by_id.pop(entry[2], None)
+
+    def _insert(self, key, row):
+        rooms = self._days[key]["rooms"]
+        room_day = rooms.get(row["classroom_id"])
+        if room_day is None:
+            room_day = rooms[row["classroom_id"]] = _RoomDay()
+        room_day.add(to_minutes(row["start_time"]), to_minutes(row["end_time"]), row["id"], row)
+        self._by_id[row["id"]] = (key, row["classroom_id"])
+
+    def _room_day(self, classroom_id, reservation_date):
+        key = to_date_key(reservation_date)
+        self.ensure_loaded([key])
+        with self._lock:
+            day = self._days.get(key)
+            return day["rooms"].get(classroom_id) if day else None
+
+    # ---------- queries ----------
+
+    def is_available(self, classroom_id, reservation_date, start_time, end_time, exclude_reservation_id=None):
+        """True if no blocking reservation overlaps [start_time, end_time)"""
+        room_day = self._room_day(classroom_id, reservation_date)
+        if room_day is None:
+            return True
+        with self._lock:
+            return not room_day.overlaps(to_minutes(start_time), to_minutes(end_time), exclude_reservation_id)
+
+    def conflicts(self, classroom_id, reservation_date, start_time, end_time, exclude_reservation_id=None):
+        """Blocking reservation rows overlapping [start_time, end_time)"""
+        room_day = self._room_day(classroom_id, reservation_date)
+        if room_day is None:
+            return []
+        with self._lock:
+            found = room_day.conflicts(to_minutes(start_time), to_minutes(end_time), exclude_reservation_id)
+            return [dict(entry[3]) for entry in reversed(found)]
+
+    def check_many(self, requests, check_batch=False):
+        """
+        Check many (classroom, date, range) candidates with one load for all dates.
+
+        Args:
+            requests (list): dicts with classroom_id, reservation_date,
+                start_time, end_time and optional exclude_reservation_id
+            check_batch (bool): Also report overlaps with earlier requests in the list
+
+        Returns:
+            list: one dict per request with "available", "conflicts" (existing
+            reservation rows) and "batch_conflicts" (indexes of earlier requests)
+        """
+        self.ensure_loaded({request["reservation_date"] for request in requests})
+        batch = {}  # (date key, classroom_id) -> _RoomDay of earlier requests
+        results = []
+        for position, request in enumerate(requests):
+            key = to_date_key(request["reservation_date"])
+            start, end = to_minutes(request["start_time"]), to_minutes(request["end_time"])
+            exclude = request.get("exclude_reservation_id")
+
+            with self._lock:
+                day = self._days.get(key)
+                room_day = day["rooms"].get(request["classroom_id"]) if day else None
+                conflicts = room_day.conflicts(start, end, exclude) if room_day else []
+                conflicts = [dict(entry[3]) for entry in reversed(conflicts)]
+
+            batch_conflicts = []
+            if check_batch:
+                earlier = batch.setdefault((key, request["classroom_id"]), _RoomDay())
+                batch_conflicts = sorted(entry[2] for entry in earlier.conflicts(start, end))
+                earlier.add(start, end, position, None)
+
+            results.append({
+                "available": not conflicts and not batch_conflicts,
+                "conflicts": conflicts,
+                "batch_conflicts": batch_conflicts,
+            })
+        return results
+
+    def free_windows(self, dates, classroom_ids, duration, day_start, day_end,
+                     step=30, limit=5, not_before=None):
+        """
+        Earliest free windows of `duration` minutes, scanning dates in order.
+
+        For each room and date the blocking reservations are swept in start
+        order and merged, and the gaps between them within
+        [day_start, day_end] yield one window each, starting at the first
+        `step`-aligned minute that fits.
+
+        Args:
+            dates (list): dates to scan, in order
+            classroom_ids (list): rooms to consider
+            duration, day_start, day_end, step: minutes (day_* after midnight)
+            not_before (datetime): skip windows starting before this moment
+
+        Returns:
+            list: (date key, start minute, end minute, classroom_id), earliest first
+        """
+        keys = [to_date_key(d) for d in dates]
+        self.ensure_loaded(keys)
+        cutoff_key = cutoff_minute = None
+        if not_before is not None:
+            cutoff_key = not_before.date().isoformat()
+            cutoff_minute = not_before.hour * 60 + not_before.minute
+
+        found = []
+        for key in keys:
+            if cutoff_key and key < cutoff_key:
+                continue
+            opens = day_start
+            if key == cutoff_key:
+                opens = max(opens, cutoff_minute)
+
+            with self._lock:
+                day = self._days.get(key)
+                rooms = day["rooms"] if day else {}
+                intervals = {
+                    classroom_id: [(entry[0], entry[1]) for entry in rooms[classroom_id].entries]
+                    if classroom_id in rooms else []
+                    for classroom_id in classroom_ids
+                }
+
+            candidates = []
+            for classroom_id, busy in intervals.items():
+                cursor = opens   # sweep position: everything before it is decided
+                for start, end in busy + [(day_end, day_end)]:
+                    if start > cursor:
+                        window_start = -(-cursor // step) * step   # round up to step
+                        if window_start + duration <= min(start, day_end):
+                            candidates.append((window_start, classroom_id))
+                    cursor = max(cursor, end)
+                    if cursor >= day_end:
+                        break
+
+            candidates.sort()
+            for window_start, classroom_id in candidates:
+                found.append((key, window_start, window_start + duration, classroom_id))
+                if len(found) >= limit:
+                    return found
+        return found
+
+    def busy_classrooms(self, reservation_date, start_time, end_time):
+        """Set of classroom ids with a blocking reservation overlapping the range"""
+        key = to_date_key(reservation_date)
+        self.ensure_loaded([key])
+        start, end = to_minutes(start_time), to_minutes(end_time)
+        mask = slot_mask(start, end)
+        with self._lock:
+            day = self._days.get(key)
+            if not day:
+                return set()
+            return {
+                classroom_id for classroom_id, room_day in day["rooms"].items()
+                if room_day.grid_overlaps(start, end, mask)
+            }
+
+    def slot_grid(self, reservation_date):
+        """
+        Occupied-slot bitsets for every room with reservations on a date.
+
+        Returns:
+            dict: classroom_id -> int, bit i set if slot i (i * SLOT_MINUTES
+            minutes after midnight) is at least partly taken
+        """
+        key = to_date_key(reservation_date)
+        self.ensure_loaded([key])
+        with self._lock:
+            day = self._days.get(key)
+            if not day:
+                return {}
+            return {
+                classroom_id: room_day.bits
+                for classroom_id, room_day in day["rooms"].items() if room_day.bits
+            }
+
+    def occupied_runs(self, classroom_id, reservation_date):
+        """Merged busy periods of one room as (start, end) minutes, for timelines"""
+        room_day = self._room_day(classroom_id, reservation_date)
+        if room_day is None:
+            return []
+        with self._lock:
+            bits = room_day.bits
+        return slot_runs(bits)
+
+    def reservations_for(self, classroom_id, reservation_date):
+        """Blocking reservation rows for one classroom and date, ordered by start time"""
+        room_day = self._room_day(classroom_id, reservation_date)
+        if room_day is None:
+            return []
+        with self._lock:
+            return [dict(entry[3]) for entry in room_day.entries]
+
+    # ---------- maintenance ----------
+
+    def add(self, row):
+        """Record a reservation that now blocks its slot (row needs id, classroom_id, date and times)"""
+        key = to_date_key(row["reservation_date"])
+        with self._lock:
+            self._versions[key] = self._versions.get(key, 0) + 1
+            self._remove_locked(row["id"])
+            if key in self._days:
+                self._insert(key, dict(row))
+
+    def remove(self, reservation_id):
+        """
+        Forget a reservation that no longer blocks its slot.
+
+        If it is not indexed, its date is unknown, so every date being
+        loaded right now is marked changed: a load that read the row
+        before this removal must not put it back.
+        """
+        with self._lock:
+            location = self._by_id.get(reservation_id)
+            for key in [location[0]] if location else list(self._loading):
+                self._versions[key] = self._versions.get(key, 0) + 1
+            self._remove_locked(reservation_id)
+
+    def _remove_locked(self, reservation_id):
+        location = self._by_id.pop(reservation_id, None)
+        if not location:
+            return
+        key, classroom_id = location
+        day = self._days.get(key)
+        room_day = day["rooms"].get(classroom_id) if day else None
+        if room_day:
+            room_day.remove(reservation_id)
+
+    def invalidate(self, reservation_date=None, up_to=None):
+        """
+        Drop cached dates so they are reloaded on next use.
+
+        Args:
+            reservation_date: Drop only this date
+            up_to: Drop every date on or before this one
+            (neither: drop everything)
+        """
+        with self._lock:
+            if reservation_date is not None:
+                keys = [to_date_key(reservation_date)]
+            elif up_to is not None:
+                limit = to_date_key(up_to)
+                keys = [key for key in self._days if key <= limit]
+            else:
+                keys = list(self._days)
+            for key in keys:
+                self._versions[key] = self._versions.get(key, 0) + 1
+                self._drop_day(key)
+
+
+# Shared index used by ReservationModel
+availability_index = AvailabilityIndex()
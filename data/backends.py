@@ -0,0 +1,527 @@
+"""
+Database Backends
+=================
+Driver-specific pieces of the Database class
+
+Features:
+- MySQLBackend: the production backend (mysql-connector-python)
+- SQLiteBackend: embedded backend for tests and benchmarks, which
+  translates eduroom_schema.sql and the MySQL functions used by the models
+"""
+
+import os
+import re
+import sqlite3
+import tempfile
+from datetime import date, datetime, time as dt_time, timedelta
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "eduroom_schema.sql")
+
+
+class MySQLBackend:
+    """MySQL backend (default)"""
+
+    name = "mysql"
+
+    def __init__(self, host, user, password, database, port):
+        import mysql.connector  # imported here so SQLite-only setups do not need it
+
+        self._connector = mysql.connector
+        self.Error = mysql.connector.Error
+        self.host = host
+        self.user = user
+        self.password = password
+        self.database = database
+        self.port = port
+
+    def connect(self):
+        """Open a new connection"""
+        return self._connector.connect(
+            host=self.host,
+            user=self.user,
+            password=self.password,
+            database=self.database,
+            port=self.port
+        )
+
+    def ping(self, connection):
+        """Health check for idle pooled connections"""
+        connection.ping(reconnect=False)
+        return True
+
+    def reset(self, connection):
+        """Clean up a connection before it goes back to the pool"""
+        # End any implicit read transaction so the next user does not see a
+        # stale REPEATABLE READ snapshot.
+        connection.rollback()
+
+    def begin(self, connection, write=False):
+        """Start a db.transaction() block (InnoDB row locks make `write` unnecessary)"""
+        # Writes outside transaction() are committed immediately, so this
+        # only drops a read snapshot left over from earlier SELECTs.
+        connection.rollback()
+
+    def cursor(self, connection, dictionary=False):
+        return connection.cursor(dictionary=dictionary)
+
+    def translate(self, query):
+        return query
+
+    def adapt_params(self, params):
+        return params
+
+    # ---------- introspection (used by data/migrations.py) ----------
+
+    def index_name(self, table, name):
+        return name
+
+    def ddl(self, statement):
+        """Statements to run for one MySQL DDL statement"""
+        return [statement]
+
+    def has_table(self, connection, table):
+        return self._exists(connection, """
+            SELECT 1 FROM information_schema.tables
+            WHERE table_schema = DATABASE() AND table_name = %s
+        """, (table,))
+
+    def has_column(self, connection, table, column):
+        return self._exists(connection, """
+            SELECT 1 FROM information_schema.columns
+            WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+        """, (table, column))
+
+    def has_index(self, connection, table, name):
+        return self._exists(connection, """
+            SELECT 1 FROM information_schema.statistics
+            WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+        """, (table, name))
+
+    def has_trigger(self, connection, name):
+        return self._exists(connection, """
+            SELECT 1 FROM information_schema.triggers
+            WHERE trigger_schema = DATABASE() AND trigger_name = %s
+        """, (name,))
+
+    def _exists(self, connection, query, params):
+        cursor = connection.cursor()
+        try:
+            cursor.execute(query, params)
+            return bool(cursor.fetchall())
+        finally:
+            cursor.close()
+
+    def add_column_sql(self, table, column, definition, references=None):
+        sql = f"ALTER TABLE {table} ADD COLUMN {column} {definition}"
+        if references:
+            sql += f", ADD FOREIGN KEY ({column}) REFERENCES {references}"
+        return sql
+
+    def full_scans(self, connection, query, params=None):
+        """Tables (or aliases) that EXPLAIN reports as read with a full table or index scan"""
+        cursor = connection.cursor(dictionary=True)
+        try:
+            cursor.execute("EXPLAIN " + query, params or ())
+            return [row["table"] for row in cursor.fetchall() if row["type"] in ("ALL", "index")]
+        finally:
+            cursor.close()
+
+    def load_schema(self, connection, path=SCHEMA_PATH):
+        """Run a schema script statement by statement"""
+        cursor = connection.cursor()
+        try:
+            for statement in split_sql(_read(path)):
+                cursor.execute(statement)
+                if cursor.with_rows:
+                    cursor.fetchall()
+            connection.commit()
+        finally:
+            cursor.close()
+
+
+# ==================== SQLITE ====================
+
+def _adapt_date(value):
+    return value.isoformat()
+
+
+def _adapt_datetime(value):
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _adapt_time(value):
+    return value.strftime("%H:%M:%S")
+
+
+def _adapt_timedelta(value):
+    seconds = int(value.total_seconds())
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def _convert_date(value):
+    return date.fromisoformat(value.decode()[:10])
+
+
+def _convert_datetime(value):
+    return datetime.fromisoformat(value.decode())
+
+
+def _convert_time(value):
+    # MySQL returns TIME columns as timedelta; keep the same type here
+    hours, minutes, seconds = (int(float(part)) for part in value.decode().split(":"))
+    return timedelta(hours=hours, minutes=minutes, seconds=seconds)
+
+
+sqlite3.register_adapter(date, _adapt_date)
+sqlite3.register_adapter(datetime, _adapt_datetime)
+sqlite3.register_adapter(dt_time, _adapt_time)
+sqlite3.register_adapter(timedelta, _adapt_timedelta)
+sqlite3.register_converter("DATE", _convert_date)
+sqlite3.register_converter("DATETIME", _convert_datetime)
+sqlite3.register_converter("TIMESTAMP", _convert_datetime)
+sqlite3.register_converter("TIME", _convert_time)
+
+
+def _as_date(value):
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _curdate():
+    return date.today().isoformat()
+
+
+def _curtime():
+    return datetime.now().strftime("%H:%M:%S")
+
+
+def _now():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _hour(value):
+    if value is None:
+        return None
+    text = str(value)
+    if len(text) > 10 and text[4] == "-":
+        text = text[11:]  # datetime -> time part
+    return int(text.split(":")[0])
+
+
+def _dayname(value):
+    day = _as_date(value)
+    return day.strftime("%A") if day else None
+
+
+def _dayofweek(value):
+    # MySQL numbering: 1 = Sunday ... 7 = Saturday
+    day = _as_date(value)
+    return (day.weekday() + 1) % 7 + 1 if day else None
+
+
+def _datediff(a, b):
+    if a is None or b is None:
+        return None
+    return (_as_date(a) - _as_date(b)).days
+
+
+def _date_add_days(value, days):
+    day = _as_date(value)
+    if day is None or days is None:
+        return None
+    return (day + timedelta(days=int(days))).isoformat()
+
+
+_TIME_PARAM_RE = re.compile(r"^(\d{1,2}):(\d{2})(?::(\d{2}))?$")
+
+# MySQL syntax -> SQLite (applied in order)
+_QUERY_REWRITES = [
+    (re.compile(r"DATE_SUB\(\s*(.+?)\s*,\s*INTERVAL\s+(.+?)\s+DAY\s*\)", re.I | re.S), r"DATE_ADD_DAYS(\1, -(\2))"),
+    (re.compile(r"DATE_ADD\(\s*(.+?)\s*,\s*INTERVAL\s+(.+?)\s+DAY\s*\)", re.I | re.S), r"DATE_ADD_DAYS(\1, \2)"),
+    (re.compile(r"\s+FOR\s+UPDATE\b", re.I), ""),   # db.transaction(write=True) holds the write lock
+    (re.compile(r"%s"), "?"),
+]
+
+
+class SQLiteBackend:
+    """
+    Embedded SQLite backend.
+
+    Lets the whole model layer run in-process, without a MySQL server, for
+    tests and benchmarks. Queries are translated on the fly: `%s`
+    placeholders become `?` and CURDATE, CURTIME, NOW, HOUR, DAYNAME,
+    DAYOFWEEK, DATEDIFF and DATE_SUB/DATE_ADD(..., INTERVAL n DAY) are
+    provided as SQL functions.
+
+    path=":memory:" uses a private temporary file (deleted on close) rather
+    than a true in-memory database, so that every pooled connection sees
+    the same data and concurrent writers get normal busy-timeout locking.
+    """
+
+    name = "sqlite"
+    Error = sqlite3.Error
+
+    def __init__(self, path=":memory:"):
+        self._temporary = path == ":memory:"
+        if self._temporary:
+            fd, path = tempfile.mkstemp(prefix="eduroom_", suffix=".sqlite3")
+            os.close(fd)
+        self.path = path
+        self._translated = {}
+
+    def connect(self):
+        """Open a new connection with the MySQL compatibility functions installed"""
+        connection = sqlite3.connect(
+            self.path,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False,
+            timeout=30,
+        )
+        connection.execute("PRAGMA foreign_keys = ON")
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.create_function("CURDATE", 0, _curdate)
+        connection.create_function("CURTIME", 0, _curtime)
+        connection.create_function("NOW", 0, _now)
+        connection.create_function("HOUR", 1, _hour, deterministic=True)
+        connection.create_function("DAYNAME", 1, _dayname, deterministic=True)
+        connection.create_function("DAYOFWEEK", 1, _dayofweek, deterministic=True)
+        connection.create_function("DATEDIFF", 2, _datediff, deterministic=True)
+        connection.create_function("DATE_ADD_DAYS", 2, _date_add_days, deterministic=True)
+        return connection
+
+    def ping(self, connection):
+        connection.execute("SELECT 1").fetchone()
+        return True
+
+    def reset(self, connection):
+        connection.rollback()
+
+    def begin(self, connection, write=False):
+        """
+        Start a db.transaction() block. With write=True the database write
+        lock is taken up front, so SELECT ... FOR UPDATE sections are
+        serialized like on MySQL; other blocks use a deferred BEGIN and
+        only lock once they write.
+        """
+        if connection.in_transaction:
+            connection.commit()
+        connection.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+
+    def cursor(self, connection, dictionary=False):
+        cursor = connection.cursor()
+        if dictionary:
+            cursor.row_factory = _dict_row
+        return cursor
+
+    def translate(self, query):
+        """Rewrite a MySQL query for SQLite (cached per query string)"""
+        translated = self._translated.get(query)
+        if translated is None:
+            translated = query
+            for pattern, replacement in _QUERY_REWRITES:
+                translated = pattern.sub(replacement, translated)
+            self._translated[query] = translated
+        return translated
+
+    def adapt_params(self, params):
+        """Normalize 'H:MM' time strings to 'HH:MM:SS' so they compare like MySQL TIME"""
+        if not params:
+            return params
+        adapted = []
+        for value in params:
+            if isinstance(value, str):
+                match = _TIME_PARAM_RE.match(value)
+                if match:
+                    hours, minutes, seconds = match.groups()
+                    value = f"{int(hours):02d}:{minutes}:{seconds or '00'}"
+            adapted.append(value)
+        return tuple(adapted)
+
+    # ---------- introspection (used by data/migrations.py) ----------
+
+    def index_name(self, table, name):
+        # SQLite index names are global, so they are prefixed with the table
+        return f"{table}_{name}"
+
+    def ddl(self, statement):
+        """Statements to run for one MySQL DDL statement"""
+        return translate_schema(statement) if statement.lstrip().upper().startswith("CREATE TABLE") else [statement]
+
+    def has_table(self, connection, table):
+        return connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+        ).fetchone() is not None
+
+    def has_column(self, connection, table, column):
+        return any(row[1] == column for row in connection.execute(f"PRAGMA table_info({table})"))
+
+    def has_index(self, connection, table, name):
+        return connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (self.index_name(table, name),)
+        ).fetchone() is not None
+
+    def has_trigger(self, connection, name):
+        return connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = ?", (name,)
+        ).fetchone() is not None
+
+    def add_column_sql(self, table, column, definition, references=None):
+        sql = f"ALTER TABLE {table} ADD COLUMN {column} {definition}"
+        if references:
+            sql += f" REFERENCES {references}"
+        return sql
+
+    def full_scans(self, connection, query, params=None):
+        """Tables (or aliases) that EXPLAIN QUERY PLAN reports as read with a full table or index scan"""
+        rows = connection.execute(
+            "EXPLAIN QUERY PLAN " + self.translate(query), self.adapt_params(params) or ()
+        ).fetchall()
+        scans = []
+        for row in rows:
+            detail = row[-1]
+            # "SCAN t USING INDEX i" still reads every row, just in index order
+            if detail.startswith("SCAN "):
+                scans.append(detail.split()[1])
+        return scans
+
+    def load_schema(self, connection, path=SCHEMA_PATH):
+        """Create tables and sample data from a MySQL schema script"""
+        for statement in translate_schema(_read(path)):
+            connection.execute(statement)
+        connection.commit()
+
+    def remove(self):
+        """Delete the temporary database file (only for path=':memory:')"""
+        if self._temporary:
+            for suffix in ("", "-wal", "-shm"):
+                try:
+                    os.remove(self.path + suffix)
+                except OSError:
+                    pass
+
+
+def _dict_row(cursor, row):
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+# ==================== SCHEMA TRANSLATION ====================
+
+def _read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def split_sql(script):
+    """Split a SQL script into statements, dropping `--` comments"""
+    statements = []
+    current = []
+    quote = None
+    i = 0
+    while i < len(script):
+        char = script[i]
+        if quote:
+            current.append(char)
+            if char == "\\" and i + 1 < len(script):
+                current.append(script[i + 1])
+                i += 1
+            elif char == quote:
+                quote = None
+        elif char in ("'", '"', "`"):
+            quote = char
+            current.append(char)
+        elif char == "-" and script.startswith("--", i):
+            newline = script.find("\n", i)
+            i = len(script) if newline == -1 else newline
+            continue
+        elif char == ";":
+            statement = "".join(current).strip()
+            if statement:
+                statements.append(statement)
+            current = []
+        else:
+            current.append(char)
+        i += 1
+    statement = "".join(current).strip()
+    if statement:
+        statements.append(statement)
+    return statements
+
+
+def _split_top_level(body):
+    """Split a column list on commas that are not inside parentheses or quotes"""
+    parts, depth, current, quote = [], 0, [], None
+    for char in body:
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in ("'", '"'):
+            quote = char
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and depth == 0:
+            parts.append("".join(current).strip())
+            current = []
+            continue
+        current.append(char)
+    if "".join(current).strip():
+        parts.append("".join(current).strip())
+    return parts
+
+
+_SKIP_RE = re.compile(r"^(CREATE\s+DATABASE|USE\s|SET\s|SELECT\s)", re.I)
+_CREATE_TABLE_RE = re.compile(r"^CREATE\s+TABLE\s+(IF\s+NOT\s+EXISTS\s+)?(\w+)\s*\((.*)\)[^)]*$", re.I | re.S)
+_INDEX_RE = re.compile(r"^(UNIQUE\s+)?(?:INDEX|KEY)\s+(\w+)\s*\(([^)]*)\)$", re.I)
+_COLUMN_REWRITES = [
+    (re.compile(r"\bINT\s+AUTO_INCREMENT\s+PRIMARY\s+KEY\b", re.I), "INTEGER PRIMARY KEY AUTOINCREMENT"),
+    (re.compile(r"\bENUM\s*\([^)]*\)", re.I), "TEXT"),
+    (re.compile(r"\s+ON\s+UPDATE\s+CURRENT_TIMESTAMP\b", re.I), ""),
+    (re.compile(r"\bDEFAULT\s+CURRENT_TIMESTAMP\b", re.I), "DEFAULT (DATETIME('now', 'localtime'))"),
+]
+
+
+def translate_schema(script):
+    """
+    Translate a MySQL schema script (eduroom_schema.sql) into SQLite statements.
+
+    CREATE DATABASE / USE / SET and the trailing verification SELECTs are
+    skipped, inline INDEX definitions become CREATE INDEX statements
+    (prefixed with the table name, since SQLite index names are global),
+    and MySQL-only column options are rewritten.
+    """
+    statements = []
+    for statement in split_sql(script):
+        if _SKIP_RE.match(statement):
+            continue
+
+        match = _CREATE_TABLE_RE.match(statement)
+        if not match:
+            statements.append(statement)
+            continue
+
+        if_not_exists, table, body = match.groups()
+        columns, indexes = [], []
+        for part in _split_top_level(body):
+            index = _INDEX_RE.match(part)
+            if index:
+                unique, index_name, index_columns = index.groups()
+                indexes.append(
+                    f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS "
+                    f"{table}_{index_name} ON {table} ({index_columns})"
+                )
+                continue
+            for pattern, replacement in _COLUMN_REWRITES:
+                part = pattern.sub(replacement, part)
+            columns.append(part)
+
+        statements.append(
+            f"CREATE TABLE {if_not_exists or ''}{table} (\n    " + ",\n    ".join(columns) + "\n)"
+        )
+        statements.extend(indexes)
+    return statements
@@ -0,0 +1,179 @@
+"""
+Stale-While-Revalidate Cache
+============================
+In-process cache for expensive read-only results (analytics metrics)
+
+Features:
+- Per-entry TTL; fresh entries are returned without recomputing
+- Stale entries (older than their TTL, or invalidated) are returned
+  immediately while one background refresh recomputes them
+- Single flight: concurrent callers for a missing key share one computation
+- Tag-based invalidation, called by the model layer after writes
+"""
+
+import functools
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+
+class _Entry:
+    __slots__ = ("value", "stored_at", "ttl", "stale")
+
+    def __init__(self, value, stored_at, ttl, stale=False):
+        self.value = value
+        self.stored_at = stored_at
+        self.ttl = ttl
+        self.stale = stale   # invalidated (or invalidated while being computed)
+
+
+class SWRCache:
+    """
+    Stale-while-revalidate cache keyed by any hashable value.
+
+    An entry is fresh for `ttl` seconds after it was computed. After that,
+    or once one of its tags is invalidated, it is stale: get() still
+    returns it at once and starts a background refresh (at most one per
+    key). Entries more than `max_stale` seconds past their TTL are treated
+    as missing and recomputed by the caller. Failed computations are not
+    cached.
+    """
+
+    def __init__(self, max_stale=None, enabled=None, clock=None):
+        self.max_stale = float(os.getenv('CACHE_MAX_STALE', '600')) if max_stale is None else max_stale
+        self.enabled = os.getenv('CACHE_ENABLED', '1') != '0' if enabled is None else enabled
+        self.clock = clock or time.monotonic
+        self._entries = {}      # key -> _Entry
+        self._inflight = {}     # key -> Future of the running computation
+        self._generations = {}  # key -> bumped by invalidate()
+        self._tags = {}         # tag -> set of keys
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "errors": 0}
+
+    def get(self, key, compute, ttl, tags=()):
+        """
+        Return the cached value for `key`, computing it with `compute()`
+        when missing.
+
+        Args:
+            key: hashable cache key
+            compute (callable): produces the value (no arguments)
+            ttl (float): seconds the value stays fresh
+            tags (iterable): invalidation tags for this key
+        """
+        if not self.enabled:
+            return compute()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            now = self.clock()
+            if entry is not None:
+                age = now - entry.stored_at
+                if not entry.stale and age < entry.ttl:
+                    self.stats["hits"] += 1
+                    return entry.value
+                if age < entry.ttl + self.max_stale:
+                    self.stats["stale_hits"] += 1
+                    if key not in self._inflight:
+                        future = self._begin_locked(key, tags)
+                        threading.Thread(
+                            target=self._refresh, args=(key, compute, ttl, future),
+                            name="cache-refresh", daemon=True,
+                        ).start()
+                    return entry.value
+
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                self.stats["misses"] += 1
+                future = self._begin_locked(key, tags)
+
+        if owner:
+            self._compute(key, compute, ttl, future)
+        return future.result()
+
+    def _begin_locked(self, key, tags):
+        future = Future()
+        future.generation = self._generations.get(key, 0)
+        self._inflight[key] = future
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+        return future
+
+    def _compute(self, key, compute, ttl, future):
+        try:
+            value = compute()
+        except BaseException as e:
+            with self._lock:
+                self.stats["errors"] += 1
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            return
+        with self._lock:
+            # Invalidated while computing: keep the value but refresh it on next use
+            stale = self._generations.get(key, 0) != future.generation
+            self._entries[key] = _Entry(value, self.clock(), ttl, stale)
+            self._inflight.pop(key, None)
+        future.set_result(value)
+
+    def _refresh(self, key, compute, ttl, future):
+        with self._lock:
+            self.stats["refreshes"] += 1
+        self._compute(key, compute, ttl, future)
+        if future.exception() is not None:
+            print(f"Cache refresh failed for {key!r}: {future.exception()}")
+
+    def invalidate(self, *tags):
+        """Mark every entry carrying one of `tags` as stale"""
+        with self._lock:
+            for tag in tags:
+                for key in self._tags.get(tag, ()):
+                    self._generations[key] = self._generations.get(key, 0) + 1
+                    entry = self._entries.get(key)
+                    if entry is not None:
+                        entry.stale = True
+
+    def clear(self):
+        """Drop every entry (in-flight computations still finish)"""
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            for key in self._inflight:
+                self._generations[key] = self._generations.get(key, 0) + 1
+
+    def wait(self, timeout=None):
+        """Wait for running computations and refreshes to finish"""
+        with self._lock:
+            futures = list(self._inflight.values())
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for future in futures:
+            remaining = None if deadline is None else max(0, deadline - time.monotonic())
+            try:
+                future.exception(remaining)
+            except Exception:
+                pass
+
+
+def cached(cache, ttl, tags=()):
+    """
+    Decorator caching a function's result in `cache`, keyed by its name
+    and arguments.
+
+    Usage:
+        @staticmethod
+        @cached(analytics_cache, ttl=60, tags=("reservations",))
+        def get_busiest_day(): ...
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            key = (function.__qualname__, args, tuple(sorted(kwargs.items())))
+            return cache.get(key, lambda: function(*args, **kwargs), ttl, tags)
+        wrapper.uncached = function
+        return wrapper
+    return decorator
+
+
+# Shared cache for AnalyticsModel results; invalidated by data/models.py
+analytics_cache = SWRCache()
@@ -1,11 +1,170 @@
-import mysql.connector
-from mysql.connector import Error
 import os
+import threading
+import time
+from contextlib import contextmanager
 from dotenv import load_dotenv
+from data.query_stats import QueryStats
+from data.backends import MySQLBackend, SQLiteBackend, SCHEMA_PATH
 
 # Load environment variables
 load_dotenv()
 
+
+class PoolTimeoutError(Exception):
+    """Raised when no pooled connection becomes free within the timeout"""
+
+
+class Transaction:
+    """State of one db.transaction() block"""
+
+    def __init__(self, write=False):
+        self.write = write       # opened with the database write lock (SQLite)
+        self.failed = False      # a statement inside the block failed
+        self.committed = False   # set once the block has been committed
+
+
+class ConnectionPool:
+    """
+    Bounded, thread-safe pool of database connections.
+
+    - At most `max_size` connections are open at once; callers wait up to
+      `timeout` seconds for one to be returned.
+    - Connections idle for longer than `ping_after` seconds are health
+      checked before being handed out.
+    - Connections older than `max_lifetime` seconds are closed and replaced
+      instead of being reused.
+    """
+
+    def __init__(self, factory, validate=None, reset=None, close=None,
+                 max_size=10, timeout=10, max_lifetime=1800, ping_after=30):
+        self.factory = factory
+        self.validate = validate or (lambda connection: True)
+        self.reset = reset or (lambda connection: None)
+        self.close = close or (lambda connection: connection.close())
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.ping_after = ping_after
+
+        self._idle = []        # LIFO stack of (connection, created_at, returned_at)
+        self._created = {}     # id(connection) -> created_at, for checked-out connections
+        self._size = 0         # open connections, idle + checked out
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """Check out a healthy connection, creating one if the pool has room"""
+        deadline = time.monotonic() + self.timeout
+
+        while True:
+            entry = None
+            with self._cond:
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeoutError(
+                            f"No database connection available after {self.timeout}s "
+                            f"(pool size {self.max_size})"
+                        )
+                    self._cond.wait(remaining)
+
+                if self._idle:
+                    entry = self._idle.pop()
+                else:
+                    # Reserve a slot, then open the connection outside the lock
+                    self._size += 1
+
+            if entry is None:
+                try:
+                    connection = self.factory()
+                except Exception:
+                    self._discard_slot()
+                    raise
+                if connection is None:
+                    self._discard_slot()
+                    raise PoolTimeoutError("Connection factory returned no connection")
+                self._created[id(connection)] = time.monotonic()
+                return connection
+
+            connection, created_at, returned_at = entry
+            now = time.monotonic()
+
+            # Recycle connections that have outlived max_lifetime
+            if now - created_at > self.max_lifetime:
+                self._close_quietly(connection)
+                self._discard_slot()
+                continue
+
+            # Health check connections that sat idle for a while
+            if now - returned_at > self.ping_after and not self._is_healthy(connection):
+                self._close_quietly(connection)
+                self._discard_slot()
+                continue
+
+            self._created[id(connection)] = created_at
+            return connection
+
+    def release(self, connection):
+        """Return a checked-out connection to the pool"""
+        created_at = self._created.pop(id(connection), None)
+        if created_at is None:
+            return
+
+        try:
+            self.reset(connection)
+        except Exception:
+            # A connection we cannot reset is not safe to hand out again
+            self._close_quietly(connection)
+            self._discard_slot()
+            return
+
+        with self._cond:
+            self._idle.append((connection, created_at, time.monotonic()))
+            self._cond.notify()
+
+    def discard(self, connection):
+        """Close a checked-out connection instead of returning it"""
+        if self._created.pop(id(connection), None) is None:
+            return
+        self._close_quietly(connection)
+        self._discard_slot()
+
+    def close_all(self):
+        """Close every idle connection (checked-out ones close on release)"""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for connection, _, _ in idle:
+            self._close_quietly(connection)
+
+    def stats(self):
+        """Return current pool occupancy"""
+        with self._cond:
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "max_size": self.max_size,
+            }
+
+    def _is_healthy(self, connection):
+        try:
+            return bool(self.validate(connection))
+        except Exception:
+            return False
+
+    def _close_quietly(self, connection):
+        try:
+            self.close(connection)
+        except Exception:
+            pass
+
+    def _discard_slot(self):
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+
 class Database:
     def __init__(self):
         self.host = os.getenv('DB_HOST', 'localhost')
@@ -15,75 +174,267 @@ class Database:
         self.password = password if password else ''  # Use empty string if None
         self.database = os.getenv('DB_NAME', 'classroom_reservation_db')
         self.port = os.getenv('DB_PORT', '3306')
-        self.connection = None
-    
+
+        # DB_BACKEND=sqlite runs everything on an embedded database
+        # (DB_SQLITE_PATH, default: a private temporary file)
+        if os.getenv('DB_BACKEND', 'mysql').lower() == 'sqlite':
+            self.backend = SQLiteBackend(os.getenv('DB_SQLITE_PATH', ':memory:'))
+        else:
+            self.backend = MySQLBackend(self.host, self.user, self.password, self.database, self.port)
+
+        # Each thread (Flet session handler, websocket client, ...) gets its
+        # own connection so concurrent queries never share a cursor.
+        self._local = threading.local()
+
+        # Pool settings
+        self.pool_size = int(os.getenv('DB_POOL_SIZE', '10'))
+        self.pool_timeout = float(os.getenv('DB_POOL_TIMEOUT', '10'))
+        self.pool_max_lifetime = float(os.getenv('DB_POOL_MAX_LIFETIME', '1800'))
+        self.pool_ping_after = float(os.getenv('DB_POOL_PING_AFTER', '30'))
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+        # Per-query latency statistics (see data/query_stats.py)
+        self.stats = QueryStats(
+            slow_query_ms=float(os.getenv('DB_SLOW_QUERY_MS', '200')),
+            enabled=os.getenv('DB_QUERY_STATS', '1') != '0',
+        )
+
+    @property
+    def pool(self):
+        """Connection pool, created on first use"""
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ConnectionPool(
+                        factory=self._open_connection,
+                        validate=self._ping_connection,
+                        reset=self._reset_connection,
+                        max_size=self.pool_size,
+                        timeout=self.pool_timeout,
+                        max_lifetime=self.pool_max_lifetime,
+                        ping_after=self.pool_ping_after,
+                    )
+        return self._pool
+
+    def _open_connection(self):
+        """Open a brand new connection (used by the pool)"""
+        return self.backend.connect()
+
+    def _ping_connection(self, connection):
+        """Health check for idle pooled connections"""
+        return self.backend.ping(connection)
+
+    def _reset_connection(self, connection):
+        """Clean up a connection before it goes back to the pool"""
+        self.backend.reset(connection)
+
+    def use_backend(self, backend):
+        """
+        Switch to another backend (e.g. SQLiteBackend in tests).
+        Idle pooled connections of the previous backend are closed.
+        """
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.close_all()
+            self._pool = None
+            self.backend = backend
+
+    def load_schema(self, path=SCHEMA_PATH):
+        """Create the tables and sample data from eduroom_schema.sql"""
+        connection = self.connect()
+        try:
+            self.backend.load_schema(connection, path)
+        finally:
+            self.disconnect()
+
+    @property
+    def connection(self):
+        """Connection checked out by the current thread, if any"""
+        return getattr(self._local, "connection", None)
+
     def connect(self):
-        """Create database connection"""
+        """
+        Check out a database connection from the pool for the current thread.
+
+        Calls nest: a model method that calls another model method while
+        connected reuses the same connection, and it is only returned to
+        the pool by the matching outermost disconnect().
+        """
+        local = self._local
+        if getattr(local, "connection", None) is not None:
+            local.depth += 1
+            return local.connection
         try:
-            self.connection = mysql.connector.connect(
-                host=self.host,
-                user=self.user,
-                password=self.password,
-                database=self.database,
-                port=self.port
-            )
-            if self.connection.is_connected():
-                return self.connection
-        except Error as e:
-            print(f"Error connecting to MySQL: {e}")
+            local.connection = self.pool.acquire()
+            local.depth = 1
+            return local.connection
+        except (self.backend.Error, PoolTimeoutError) as e:
+            print(f"Error connecting to database: {e}")
             return None
-    
+
     def disconnect(self):
-        """Close database connection"""
-        if self.connection and self.connection.is_connected():
-            self.connection.close()
-    
+        """Release the current thread's connection back to the pool"""
+        local = self._local
+        connection = getattr(local, "connection", None)
+        if connection is None:
+            return
+        local.depth -= 1
+        if local.depth > 0:
+            return
+        local.connection = None
+        # A dead connection fails its reset and is dropped by the pool
+        self.pool.release(connection)
+
+    @property
+    def in_transaction(self):
+        """True while the current thread is inside db.transaction()"""
+        return getattr(self._local, "transaction_depth", 0) > 0
+
+    @contextmanager
+    def transaction(self, write=False):
+        """
+        Run several statements on one connection and commit them once.
+
+        Usage:
+            with db.transaction(write=True) as tx:
+                db.execute_query(...)
+                db.execute_query(...)
+            if tx.committed:
+                ...
+
+        execute_query() does not commit inside the block. Everything is
+        committed when the block exits, or rolled back if the block raises
+        or any statement in it failed. Nested transaction() blocks join
+        the outer one. Row locks taken with SELECT ... FOR UPDATE are held
+        until the block exits.
+
+        Pass write=True for blocks that lock rows with FOR UPDATE and write
+        based on what they read. SQLite has no row locks, so only those
+        blocks take its database write lock up front; other blocks start
+        a plain transaction and do not serialize with each other.
+        """
+        local = self._local
+        if self.in_transaction:
+            local.transaction_depth += 1
+            try:
+                yield local.transaction
+            finally:
+                local.transaction_depth -= 1
+            return
+
+        connection = self.connect()
+        if connection is None:
+            raise ConnectionError("Could not connect to the database")
+        try:
+            self.backend.begin(connection, write=write)
+        except self.backend.Error as e:
+            self.disconnect()
+            raise ConnectionError(f"Could not start a transaction: {e}")
+        tx = Transaction(write=write)
+        local.transaction = tx
+        local.transaction_depth = 1
+        try:
+            yield tx
+        except BaseException:
+            connection.rollback()
+            raise
+        else:
+            if tx.failed:
+                print("Transaction rolled back: a statement failed")
+                connection.rollback()
+            else:
+                try:
+                    connection.commit()
+                    tx.committed = True
+                except self.backend.Error as e:
+                    print(f"Error committing transaction: {e}")
+                    connection.rollback()
+        finally:
+            local.transaction_depth = 0
+            local.transaction = None
+            self.disconnect()
+
     def execute_query(self, query, params=None):
         """Execute INSERT, UPDATE, DELETE queries"""
-        cursor = self.connection.cursor()
+        cursor = self.backend.cursor(self.connection)
+        started = time.perf_counter()
+        rows, failed = 0, False
         try:
             if params:
-                cursor.execute(query, params)
+                cursor.execute(self.backend.translate(query), self.backend.adapt_params(params))
             else:
-                cursor.execute(query)
-            self.connection.commit()
+                cursor.execute(self.backend.translate(query))
+            rows = cursor.rowcount
+            if not self.in_transaction:
+                self.connection.commit()
             return cursor.lastrowid
-        except Error as e:
+        except self.backend.Error as e:
+            failed = True
             print(f"Error executing query: {e}")
-            self.connection.rollback()
+            if self.in_transaction:
+                # Roll back the whole unit of work when the block exits
+                self._local.transaction.failed = True
+            else:
+                self.connection.rollback()
             return None
         finally:
             cursor.close()
+            self.stats.record(query, (time.perf_counter() - started) * 1000, max(rows, 0), failed, params)
     
     def fetch_one(self, query, params=None):
         """Fetch single record"""
-        cursor = self.connection.cursor(dictionary=True)
+        cursor = self.backend.cursor(self.connection, dictionary=True)
+        started = time.perf_counter()
+        row, failed = None, False
         try:
             if params:
-                cursor.execute(query, params)
+                cursor.execute(self.backend.translate(query), self.backend.adapt_params(params))
             else:
-                cursor.execute(query)
-            return cursor.fetchone()
-        except Error as e:
+                cursor.execute(self.backend.translate(query))
+            row = cursor.fetchone()
+            return row
+        except self.backend.Error as e:
+            failed = True
             print(f"Error fetching data: {e}")
+            if self.in_transaction:
+                # A failed lock or check must not read as "no rows"
+                self._local.transaction.failed = True
             return None
         finally:
             cursor.close()
+            self.stats.record(query, (time.perf_counter() - started) * 1000, int(row is not None), failed, params)
     
-    def fetch_all(self, query, params=None):
-        """Fetch multiple records"""
-        cursor = self.connection.cursor(dictionary=True)
+    def fetch_all(self, query, params=None, raise_errors=False):
+        """
+        Fetch multiple records.
+
+        Errors are printed and an empty list is returned, unless
+        `raise_errors` is set (for callers that must tell a failed query
+        from an empty result).
+        """
+        cursor = self.backend.cursor(self.connection, dictionary=True)
+        started = time.perf_counter()
+        rows, failed = [], False
         try:
             if params:
-                cursor.execute(query, params)
+                cursor.execute(self.backend.translate(query), self.backend.adapt_params(params))
             else:
-                cursor.execute(query)
-            return cursor.fetchall()
-        except Error as e:
+                cursor.execute(self.backend.translate(query))
+            rows = cursor.fetchall()
+            return rows
+        except self.backend.Error as e:
+            failed = True
             print(f"Error fetching data: {e}")
+            if self.in_transaction:
+                # A failed lock or check must not read as "no rows"
+                self._local.transaction.failed = True
+            if raise_errors:
+                raise
             return []
         finally:
             cursor.close()
+            self.stats.record(query, (time.perf_counter() - started) * 1000, len(rows), failed, params)
 
 # Singleton instance
 db = Database()
\ No newline at end of file
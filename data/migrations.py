@@ -0,0 +1,485 @@
+"""
+Schema Migrations
+=================
+Versioned, idempotent schema changes for existing databases
+
+Features:
+- schema_migrations table records which versions have been applied
+- Every operation checks the live schema first, so re-running a version
+  is a no-op; on a fresh eduroom_schema.sql install only the rollup
+  tables and triggers (defined in data/rollups.py) are left to create
+- Same migrations run on MySQL and the embedded SQLite backend
+- EXPLAIN check that the hot model queries (recorded while the model
+  methods run) are served from an index
+- check(): cheap startup probe for an unmigrated schema (pending versions,
+  missing rollup triggers, empty rollups); migrating is a deploy step
+
+Usage:
+    python -m data.migrations status
+    python -m data.migrations migrate
+    python -m data.migrations check
+    python -m data.migrations explain
+"""
+
+import sys
+
+from data.database import db
+from data import rollups
+from data.analytics import AnalyticsModel
+from data.availability import AvailabilityIndex
+from data.models import UserModel, ReservationModel, NotificationModel
+from data.scheduler import StatusScheduler
+
+
+class MigrationError(Exception):
+    """Raised when a migration statement fails"""
+
+
+# ---------- operations ----------
+
+class CreateTable:
+    """CREATE TABLE written in MySQL syntax (translated for SQLite)"""
+
+    def __init__(self, table, statement):
+        self.table = table
+        self.statement = statement
+
+    def needed(self, backend, connection):
+        return not backend.has_table(connection, self.table)
+
+    def statements(self, backend):
+        return backend.ddl(self.statement)
+
+    def __str__(self):
+        return f"create table {self.table}"
+
+
+class AddColumn:
+    """ALTER TABLE ... ADD COLUMN, optionally with a foreign key"""
+
+    def __init__(self, table, column, definition, references=None):
+        self.table = table
+        self.column = column
+        self.definition = definition
+        self.references = references
+
+    def needed(self, backend, connection):
+        return not backend.has_column(connection, self.table, self.column)
+
+    def statements(self, backend):
+        return [backend.add_column_sql(self.table, self.column, self.definition, self.references)]
+
+    def __str__(self):
+        return f"add column {self.table}.{self.column}"
+
+
+class CreateIndex:
+    """CREATE INDEX on one or more columns"""
+
+    def __init__(self, table, name, columns):
+        self.table = table
+        self.name = name
+        self.columns = columns
+
+    def needed(self, backend, connection):
+        return not backend.has_index(connection, self.table, self.name)
+
+    def statements(self, backend):
+        name = backend.index_name(self.table, self.name)
+        return [f"CREATE INDEX {name} ON {self.table} ({', '.join(self.columns)})"]
+
+    def __str__(self):
+        return f"create index {self.table}.{self.name} ({', '.join(self.columns)})"
+
+
+class DropIndex:
+    """DROP INDEX (used for indexes made redundant by a composite one)"""
+
+    def __init__(self, table, name):
+        self.table = table
+        self.name = name
+
+    def needed(self, backend, connection):
+        return backend.has_index(connection, self.table, self.name)
+
+    def statements(self, backend):
+        name = backend.index_name(self.table, self.name)
+        if backend.name == "sqlite":
+            return [f"DROP INDEX {name}"]
+        return [f"DROP INDEX {name} ON {self.table}"]
+
+    def __str__(self):
+        return f"drop index {self.table}.{self.name}"
+
+
+class DropTrigger:
+    """DROP TRIGGER (used for triggers a later version retires)"""
+
+    def __init__(self, name):
+        self.name = name
+
+    def needed(self, backend, connection):
+        return backend.has_trigger(connection, self.name)
+
+    def statements(self, backend):
+        return [f"DROP TRIGGER {self.name}"]
+
+    def __str__(self):
+        return f"drop trigger {self.name}"
+
+
+class DropTable:
+    """DROP TABLE (used for tables a later version retires)"""
+
+    def __init__(self, table):
+        self.table = table
+
+    def needed(self, backend, connection):
+        return backend.has_table(connection, self.table)
+
+    def statements(self, backend):
+        return [f"DROP TABLE {self.table}"]
+
+    def __str__(self):
+        return f"drop table {self.table}"
+
+
+class CreateTrigger:
+    """CREATE TRIGGER built per backend by `build(backend_name, name)`"""
+
+    def __init__(self, name, build):
+        self.name = name
+        self.build = build
+
+    def needed(self, backend, connection):
+        return not backend.has_trigger(connection, self.name)
+
+    def statements(self, backend):
+        return [self.build(backend.name, self.name)]
+
+    def __str__(self):
+        return f"create trigger {self.name}"
+
+
+class Backfill:
+    """Python callable run once when its migration is applied"""
+
+    def __init__(self, description, function):
+        self.description = description
+        self.function = function
+
+    def needed(self, backend, connection):
+        return True
+
+    def apply(self, runner, connection):
+        if not self.function():
+            raise MigrationError(f"{self.description} failed")
+
+    def __str__(self):
+        return self.description
+
+
+class Migration:
+    """One schema version: an ordered list of operations"""
+
+    def __init__(self, version, name, operations):
+        self.version = version
+        self.name = name
+        self.operations = operations
+
+
+# ---------- migrations ----------
+# Append new versions at the end; never edit one that has shipped.
+# eduroom_schema.sql must always match the tables and indexes of
+# migrations 1-2. Rollup tables and triggers only exist here and in
+# data/rollups.py (schema scripts cannot carry trigger bodies portably),
+# so a fresh install still needs `migrate` once.
+
+MIGRATIONS = [
+    Migration(1, "recurring reservation series", [
+        CreateTable("reservation_series", """
+            CREATE TABLE reservation_series (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                classroom_id INT NOT NULL,
+                user_id INT NOT NULL,
+                start_date DATE NOT NULL,
+                until_date DATE NOT NULL,
+                interval_weeks INT NOT NULL DEFAULT 1,
+                start_time TIME NOT NULL,
+                end_time TIME NOT NULL,
+                purpose TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (classroom_id) REFERENCES classrooms(id) ON DELETE CASCADE,
+                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+                INDEX idx_user (user_id)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+        """),
+        AddColumn("reservations", "series_id", "INT DEFAULT NULL",
+                  references="reservation_series(id) ON DELETE SET NULL"),
+        CreateIndex("reservations", "idx_series", ["series_id"]),
+    ]),
+    Migration(2, "composite indexes for hot queries", [
+        # Status updater, scheduler resync, analytics: status IN (...) AND reservation_date ...
+        CreateIndex("reservations", "idx_status_date", ["status", "reservation_date", "start_time", "end_time"]),
+        # My reservations: user_id = ? ORDER BY reservation_date DESC, start_time DESC
+        CreateIndex("reservations", "idx_user_date", ["user_id", "reservation_date", "start_time"]),
+        # Availability and booking conflict checks
+        CreateIndex("reservations", "idx_room_date_status",
+                    ["classroom_id", "reservation_date", "status", "start_time", "end_time"]),
+        # Login: email = ? AND id_number = ? AND is_active
+        CreateIndex("users", "idx_login", ["email", "id_number", "is_active"]),
+        # Notifications: user_id = ? [AND is_read = FALSE] ORDER BY created_at DESC
+        CreateIndex("notifications", "idx_user_read_created", ["user_id", "is_read", "created_at"]),
+        # Prefixes of the indexes above (created first so foreign keys stay covered)
+        DropIndex("reservations", "idx_classroom_date"),
+        DropIndex("reservations", "idx_user"),
+        DropIndex("reservations", "idx_status"),
+        DropIndex("users", "idx_email"),
+        DropIndex("notifications", "idx_user_read"),
+    ]),
+    # Version 3 also created reservation_daily_rollup and its triggers when
+    # it shipped; version 6 removes them from databases migrated back then.
+    Migration(3, "analytics rollups", [
+        *[CreateTable(table, rollups.ROLLUP_TABLES[table]) for table in rollups.DAILY_TABLES],
+        *[CreateTrigger(name, rollups.trigger_sql) for name in rollups.triggers_for(rollups.DAILY_TABLES)],
+        Backfill("rebuild rollups", lambda: rollups.rebuild(rollups.DAILY_TABLES)),
+    ]),
+    Migration(4, "analytics summary rollups", [
+        *[CreateTable(table, rollups.ROLLUP_TABLES[table]) for table in rollups.SUMMARY_TABLES],
+        *[CreateTrigger(name, rollups.trigger_sql) for name in rollups.triggers_for(rollups.SUMMARY_TABLES)],
+        Backfill("rebuild summary rollups", lambda: rollups.rebuild(rollups.SUMMARY_TABLES)),
+    ]),
+    Migration(5, "occupancy rollup", [
+        *[CreateTable(table, rollups.ROLLUP_TABLES[table]) for table in rollups.OCCUPANCY_TABLES],
+        *[CreateTrigger(name, rollups.trigger_sql) for name in rollups.triggers_for(rollups.OCCUPANCY_TABLES)],
+        Backfill("rebuild occupancy rollup", lambda: rollups.rebuild(rollups.OCCUPANCY_TABLES)),
+    ]),
+    Migration(6, "drop unread daily rollup", [
+        # The retired triggers also kept user_daily_rollup, so its new ones
+        # go in first and the rebuild repairs the overlap
+        *[CreateTrigger(name, rollups.trigger_sql) for name in rollups.triggers_for(rollups.DAILY_TABLES)],
+        *[DropTrigger(name) for name in rollups.RETIRED_TRIGGERS],
+        *[DropTable(table) for table in rollups.RETIRED_TABLES],
+        Backfill("rebuild daily rollup", lambda: rollups.rebuild(rollups.DAILY_TABLES)),
+    ]),
+]
+
+
+# ---------- runner ----------
+
+class MigrationRunner:
+    """Applies pending migrations in version order"""
+
+    def __init__(self, database=db, migrations=None):
+        self.db = database
+        self.migrations = sorted(migrations if migrations is not None else MIGRATIONS,
+                                 key=lambda m: m.version)
+
+    def _connect(self):
+        connection = self.db.connect()
+        if connection is None:
+            raise ConnectionError("Could not connect to the database")
+        return connection
+
+    def _run(self, connection, statement, params=None):
+        backend = self.db.backend
+        cursor = backend.cursor(connection)
+        try:
+            cursor.execute(backend.translate(statement), backend.adapt_params(params) or ())
+            connection.commit()
+        except backend.Error as e:
+            connection.rollback()
+            raise MigrationError(f"{statement.strip()}: {e}")
+        finally:
+            cursor.close()
+
+    def _ensure_table(self, connection):
+        backend = self.db.backend
+        if backend.has_table(connection, "schema_migrations"):
+            return
+        for statement in backend.ddl("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INT PRIMARY KEY,
+                name VARCHAR(255) NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+        """):
+            self._run(connection, statement)
+
+    def applied_versions(self):
+        """Set of versions recorded in schema_migrations"""
+        connection = self._connect()
+        try:
+            if not self.db.backend.has_table(connection, "schema_migrations"):
+                return set()
+            rows = self.db.fetch_all("SELECT version FROM schema_migrations")
+            return {row["version"] for row in rows}
+        finally:
+            self.db.disconnect()
+
+    def pending(self):
+        """Migrations that have not been applied yet"""
+        applied = self.applied_versions()
+        return [m for m in self.migrations if m.version not in applied]
+
+    def status(self):
+        """
+        Returns:
+            list: dicts with version, name and applied (bool)
+        """
+        applied = self.applied_versions()
+        return [{"version": m.version, "name": m.name, "applied": m.version in applied}
+                for m in self.migrations]
+
+    def check(self):
+        """
+        Look for signs that the database has not been migrated.
+
+        Returns:
+            list: problem descriptions (empty if the schema looks current)
+        """
+        problems = []
+        pending = [m.version for m in self.pending()]
+        if pending:
+            problems.append(f"pending migrations {pending} (run `python -m data.migrations migrate`)")
+
+        connection = self._connect()
+        try:
+            backend = self.db.backend
+            missing = [name for name in rollups.TRIGGERS if not backend.has_trigger(connection, name)]
+            if missing:
+                problems.append(f"{len(missing)} rollup trigger(s) missing, e.g. {missing[0]}")
+            if self.db.fetch_one("SELECT id FROM reservations LIMIT 1"):
+                empty = [table for table in rollups.ROLLUP_TABLES
+                         if not backend.has_table(connection, table)
+                         or not self.db.fetch_one(f"SELECT 1 AS found FROM {table} LIMIT 1")]
+                if empty:
+                    problems.append(f"rollup tables missing or empty: {', '.join(empty)} "
+                                    "(run `python -m data.rollups rebuild`)")
+        finally:
+            self.db.disconnect()
+        return problems
+
+    def migrate(self, target=None, verbose=False):
+        """
+        Apply pending migrations up to `target` (default: all).
+
+        MySQL commits DDL implicitly, so a version is not atomic there;
+        every operation re-checks the schema, so a failed run can simply
+        be repeated.
+
+        Returns:
+            list: versions applied by this call
+        """
+        applied_now = []
+        connection = self._connect()
+        try:
+            self._ensure_table(connection)
+            backend = self.db.backend
+            done = {row["version"] for row in self.db.fetch_all("SELECT version FROM schema_migrations")}
+            for migration in self.migrations:
+                if migration.version in done or (target is not None and migration.version > target):
+                    continue
+                if verbose:
+                    print(f"Applying {migration.version}: {migration.name}")
+                for operation in migration.operations:
+                    if not operation.needed(backend, connection):
+                        continue
+                    if verbose:
+                        print(f"  {operation}")
+                    if hasattr(operation, "apply"):
+                        operation.apply(self, connection)
+                    else:
+                        for statement in operation.statements(backend):
+                            self._run(connection, statement)
+                self._run(connection, "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                          (migration.version, migration.name))
+                applied_now.append(migration.version)
+        finally:
+            self.db.disconnect()
+        return applied_now
+
+
+# ---------- query plan check ----------
+
+def _booking_conflict():
+    """Conflict check as the booking paths run it, inside a write transaction"""
+    with db.transaction(write=True):
+        ReservationModel.find_conflict(1, "2025-12-09", "09:00", "10:00")
+
+
+# (name, table alias that must not be fully scanned, model call that runs
+# the query). The statements are recorded as the calls run, so the check
+# follows the models instead of a copy of their SQL. The status updater
+# applies due status changes, as the scheduler would; every other call
+# only reads.
+HOT_QUERIES = [
+    ("status updater", "reservations", ReservationModel.update_reservation_statuses),
+    ("scheduler resync", "reservations", lambda: StatusScheduler().resync()),
+    ("analytics by date", "date_rollup", lambda: AnalyticsModel.get_reservations_by_date.uncached(30)),
+    ("analytics most active faculty", "user_daily_rollup", AnalyticsModel.get_most_active_faculty.uncached),
+    ("availability load", "reservations", lambda: AvailabilityIndex._load_from_db(["2025-12-09", "2025-12-10"])),
+    ("booking conflict", "reservations", _booking_conflict),
+    ("my reservations", "r", lambda: ReservationModel.get_user_reservations(2)),
+    ("login", "users", lambda: UserModel.authenticate_with_email("explain@eduroom.invalid", "00000000", "")),
+    ("notifications", "notifications",
+     lambda: NotificationModel.get_user_notifications(1, 20, unread_only=True)),
+]
+
+
+def explain_hot_queries(queries=HOT_QUERIES):
+    """
+    Run each hot model call, then EXPLAIN the statements it ran.
+
+    Returns:
+        list: dicts with name, statements (how many were recorded) and
+        full_scan (True if any of them reads the checked table without
+        an index)
+    """
+    results = []
+    connection = db.connect()
+    if connection is None:
+        return results
+    try:
+        for name, table, call in queries:
+            with db.stats.capture() as statements:
+                call()
+            full_scan = any(table in db.backend.full_scans(connection, query, params)
+                            for query, params in statements)
+            results.append({"name": name, "statements": len(statements), "full_scan": full_scan})
+    finally:
+        db.disconnect()
+    return results
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    command = argv[0] if argv else "status"
+    runner = MigrationRunner()
+
+    if command == "migrate":
+        applied = runner.migrate(verbose=True)
+        print(f"Applied {len(applied)} migration(s)" if applied else "Schema is up to date")
+    elif command == "status":
+        for row in runner.status():
+            print(f"{row['version']:>4}  {'applied' if row['applied'] else 'pending':<8} {row['name']}")
+    elif command == "check":
+        problems = runner.check()
+        for problem in problems:
+            print(f"⚠️ {problem}")
+        print("Schema is up to date" if not problems else f"{len(problems)} problem(s) found")
+        return 1 if problems else 0
+    elif command == "explain":
+        results = explain_hot_queries()
+        for row in results:
+            plan = "FULL SCAN" if row["full_scan"] else "index" if row["statements"] else "NO QUERY"
+            print(f"{plan:<10} {row['name']}")
+        return 1 if not results or any(row["full_scan"] or not row["statements"] for row in results) else 0
+    else:
+        print("Usage: python -m data.migrations [status|migrate|check|explain]")
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
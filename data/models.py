@@ -1,4 +1,8 @@
 from data.database import db
+from data.availability import availability_index, to_minutes, pick_non_overlapping
+from data.scheduler import status_scheduler
+from data.cache import analytics_cache
+from data.occupancy import occupancy_cube
 from utils.auth import hash_password, verify_password
 from datetime import datetime, timedelta
 
@@ -9,6 +13,9 @@ try:
 except ImportError:
     REALTIME_ENABLED = False
 
+# Upper bound on occurrences in one recurring series (one year of weekly bookings)
+MAX_SERIES_OCCURRENCES = 52
+
 class UserModel:
     @staticmethod
     def authenticate(id_number, password):
@@ -33,64 +40,63 @@ class UserModel:
         LOCK_THRESHOLD = 5               # max failed attempts
         LOCK_WINDOW_MINUTES = 1         # in this recent window
 
-        db.connect()
-        query = """
-            SELECT *
-            FROM users
-            WHERE email = %s
-              AND id_number = %s
-              AND is_active = TRUE
-        """
-        user = db.fetch_one(query, (email, id_number))
+        # One connection and a single commit for the lookup plus any
+        # lockout bookkeeping below
+        with db.transaction():
+            query = """
+                SELECT *
+                FROM users
+                WHERE email = %s
+                  AND id_number = %s
+                  AND is_active = TRUE
+            """
+            user = db.fetch_one(query, (email, id_number))
 
-        # If no such active user, just return None (generic invalid credentials)
-        if not user:
-            db.disconnect()
-            return None, None
+            # If no such active user, just return None (generic invalid credentials)
+            if not user:
+                return None, None
 
-        # --- LOCKOUT CHECK ---
-        failed_attempts = user.get("failed_attempts", 0) or 0
-        last_failed_at = user.get("last_failed_at")
+            # --- LOCKOUT CHECK ---
+            failed_attempts = user.get("failed_attempts", 0) or 0
+            last_failed_at = user.get("last_failed_at")
 
-        now = datetime.now()
-        lock_window_start = now - timedelta(minutes=LOCK_WINDOW_MINUTES)
+            now = datetime.now()
+            lock_window_start = now - timedelta(minutes=LOCK_WINDOW_MINUTES)
 
-        # If last_failed_at is outside the window, reset attempts
-        if last_failed_at and last_failed_at < lock_window_start and failed_attempts > 0:
-            reset_query = "UPDATE users SET failed_attempts = 0, last_failed_at = NULL WHERE id = %s"
-            db.execute_query(reset_query, (user["id"],))
-            user["failed_attempts"] = 0
-            failed_attempts = 0
-            last_failed_at = None
+            # If last_failed_at is outside the window, reset attempts
+            if last_failed_at and last_failed_at < lock_window_start and failed_attempts > 0:
+                reset_query = "UPDATE users SET failed_attempts = 0, last_failed_at = NULL WHERE id = %s"
+                db.execute_query(reset_query, (user["id"],))
+                user["failed_attempts"] = 0
+                failed_attempts = 0
+                last_failed_at = None
 
-        # If still too many recent failures, block login
-        if failed_attempts >= LOCK_THRESHOLD and last_failed_at and last_failed_at >= lock_window_start:
-            db.disconnect()
-            return None, "Account temporarily locked. Please try again later."
+            # If still too many recent failures, block login
+            if failed_attempts >= LOCK_THRESHOLD and last_failed_at and last_failed_at >= lock_window_start:
+                return None, "Account temporarily locked. Please try again later."
 
-        # --- PASSWORD CHECK ---
-        if verify_password(password, user["password_hash"]):
-            # Success → reset failed attempts
-            reset_query = """
-                UPDATE users
-                SET failed_attempts = 0,
-                    last_failed_at = NULL
-                WHERE id = %s
-            """
-            db.execute_query(reset_query, (user["id"],))
-            db.disconnect()
-            return user, None
-        else:
-            # Failure → increment failed attempts and set last_failed_at = NOW()
-            update_query = """
-                UPDATE users
-                SET failed_attempts = failed_attempts + 1,
-                    last_failed_at = NOW()
-                WHERE id = %s
-            """
-            db.execute_query(update_query, (user["id"],))
-            db.disconnect()
-            return None, None
+            # --- PASSWORD CHECK ---
+            if verify_password(password, user["password_hash"]):
+                # Success → reset failed attempts (skip the write when there is nothing to reset)
+                if failed_attempts or last_failed_at:
+                    reset_query = """
+                        UPDATE users
+                        SET failed_attempts = 0,
+                            last_failed_at = NULL
+                        WHERE id = %s
+                    """
+                    db.execute_query(reset_query, (user["id"],))
+                return user, None
+            else:
+                # Failure → increment failed attempts and set last_failed_at = NOW()
+                update_query = """
+                    UPDATE users
+                    SET failed_attempts = failed_attempts + 1,
+                        last_failed_at = NOW()
+                    WHERE id = %s
+                """
+                db.execute_query(update_query, (user["id"],))
+                return None, None
     
     @staticmethod
     def create_user(email, id_number, password, role, full_name):
@@ -103,6 +109,8 @@ class UserModel:
         """
         user_id = db.execute_query(query, (email, id_number, password_hash, role, full_name))
         db.disconnect()
+        if user_id:
+            analytics_cache.invalidate("users")
         return user_id
     
     @staticmethod
@@ -251,14 +259,21 @@ class UserModel:
             db.disconnect()
             return False, "User not found"
         
-        # Delete the user (cascades to reservations due to FK)
-        delete_query = "DELETE FROM users WHERE id = %s"
-        result = db.execute_query(delete_query, (user_id,))
+        # Delete the user's reservations explicitly rather than through the
+        # FK cascade: MySQL does not fire the rollup triggers for cascades
+        with db.transaction() as tx:
+            db.execute_query("DELETE FROM reservations WHERE user_id = %s", (user_id,))
+            db.execute_query("DELETE FROM users WHERE id = %s", (user_id,))
         db.disconnect()
         
-        if result is None:
+        if not tx.committed:
             return False, "Error deleting user"
         
+        # The user's reservations were deleted with them
+        availability_index.invalidate()
+        occupancy_cube.invalidate()
+        analytics_cache.invalidate("reservations", "users")
+        
         return True, f"User '{user['full_name']}' deleted successfully"
     
     @staticmethod
@@ -279,6 +294,7 @@ class UserModel:
         if result is None:
             return False, "Error updating user role"
         
+        analytics_cache.invalidate("users")
         return True, f"User role updated to {new_role}"
     
     @staticmethod
@@ -315,6 +331,7 @@ class UserModel:
         if result is None:
             return False, "Error updating profile"
         
+        analytics_cache.invalidate("users")
         return True, "Profile updated successfully"
     
     @staticmethod
@@ -461,43 +478,113 @@ class ReservationModel:
     @staticmethod
     def check_availability(classroom_id, reservation_date, start_time, end_time, exclude_reservation_id=None):
         """Check if a classroom is available for the given date and time range."""
-        db.connect()
-        
-        query = """
-            SELECT COUNT(*) as count FROM reservations
-            WHERE classroom_id = %s 
-            AND reservation_date = %s
-            AND status IN ('approved', 'ongoing')
-            AND start_time < %s   -- Existing reservation starts before new ends
-            AND end_time > %s     -- Existing reservation ends after new starts
+        # Served from the in-memory interval index (see data/availability.py)
+        return availability_index.is_available(
+            classroom_id, reservation_date, start_time, end_time, exclude_reservation_id
+        )
+
+    @staticmethod
+    def check_availability_many(requests, check_batch=False):
+        """
+        Check several candidate slots in one call (one query for all dates).
+
+        Args:
+            requests (list): (classroom_id, reservation_date, start_time, end_time)
+                tuples, or dicts with those keys and optional exclude_reservation_id
+            check_batch (bool): Also flag requests overlapping an earlier one in the list
+
+        Returns:
+            list: one dict per request, in order:
+                {"available": bool, "conflicts": [reservation rows], "batch_conflicts": [indexes]}
         """
+        keys = ("classroom_id", "reservation_date", "start_time", "end_time", "exclude_reservation_id")
+        normalized = [
+            request if isinstance(request, dict) else dict(zip(keys, request))
+            for request in requests
+        ]
+        if not normalized:
+            return []
+        return availability_index.check_many(normalized, check_batch=check_batch)
+
+    @staticmethod
+    def find_free_slots(duration, date_range, min_capacity=0, building=None, limit=5,
+                        day_start="07:00", day_end="21:00", step=30, classroom_ids=None,
+                        not_before=None):
+        """
+        Find the earliest free windows of a given length across classrooms.
+
+        Args:
+            duration (int|timedelta): Window length in minutes
+            date_range (tuple): (first_date, last_date), inclusive; dates or 'YYYY-MM-DD'
+            min_capacity (int): Only rooms with at least this capacity
+            building (str): Only rooms in this building
+            limit (int): Maximum number of windows to return
+            day_start, day_end (str): Bookable hours each day
+            step (int): Windows start on multiples of this many minutes
+            classroom_ids (list): Only these rooms
+            not_before (datetime): Skip windows that start before this moment
+
+        Returns:
+            list: dicts with classroom_id, room_name, building, capacity,
+            reservation_date ('YYYY-MM-DD'), start_time and end_time ('HH:MM'),
+            earliest first
+        """
+        if isinstance(duration, timedelta):
+            duration = int(duration.total_seconds()) // 60
+        if duration <= 0:
+            return []
         
-        params = [classroom_id, reservation_date, end_time, start_time]
+        first, last = date_range
+        if isinstance(first, str):
+            first = datetime.strptime(first[:10], '%Y-%m-%d').date()
+        if isinstance(last, str):
+            last = datetime.strptime(last[:10], '%Y-%m-%d').date()
+        if isinstance(first, datetime):
+            first = first.date()
+        if isinstance(last, datetime):
+            last = last.date()
+        dates = [first + timedelta(days=i) for i in range((last - first).days + 1)]
         
-        if exclude_reservation_id:
-            query += " AND id != %s"
-            params.append(exclude_reservation_id)
+        rooms = {
+            room['id']: room for room in ClassroomModel.get_all_classrooms()
+            if room['capacity'] >= min_capacity
+            and (building is None or room['building'] == building)
+            and (classroom_ids is None or room['id'] in classroom_ids)
+            and room.get('status') != 'Maintenance'
+        }
+        if not rooms or not dates:
+            return []
         
-        result = db.fetch_one(query, tuple(params))
-        db.disconnect()
+        windows = availability_index.free_windows(
+            dates, list(rooms), duration, to_minutes(day_start), to_minutes(day_end),
+            step=step, limit=limit, not_before=not_before
+        )
         
-        return result['count'] == 0
+        return [
+            {
+                "classroom_id": classroom_id,
+                "room_name": rooms[classroom_id]['room_name'],
+                "building": rooms[classroom_id]['building'],
+                "capacity": rooms[classroom_id]['capacity'],
+                "reservation_date": date_key,
+                "start_time": f"{start // 60:02d}:{start % 60:02d}",
+                "end_time": f"{end // 60:02d}:{end % 60:02d}",
+            }
+            for date_key, start, end, classroom_id in windows
+        ]
 
     @staticmethod
     def get_occupied_slots(classroom_id, reservation_date):
         """Get all occupied time slots for a classroom on a specific date"""
-        db.connect()
-        query = """
-            SELECT start_time, end_time, purpose, status
-            FROM reservations
-            WHERE classroom_id = %s 
-            AND reservation_date = %s
-            AND status IN ('approved', 'ongoing')
-            ORDER BY start_time
-        """
-        results = db.fetch_all(query, (classroom_id, reservation_date))
-        db.disconnect()
-        return results if results else []
+        return [
+            {
+                "start_time": row["start_time"],
+                "end_time": row["end_time"],
+                "purpose": row["purpose"],
+                "status": row["status"],
+            }
+            for row in availability_index.reservations_for(classroom_id, reservation_date)
+        ]
     
     @staticmethod
     def get_reservation_by_id(reservation_id):
@@ -524,6 +611,11 @@ class ReservationModel:
         """
         result = db.execute_query(query, (reservation_date, start_time, end_time, purpose, reservation_id))
         db.disconnect()
+        if result is not None:
+            # Back to pending: no longer blocks its slot until re-approved
+            availability_index.remove(reservation_id)
+            occupancy_cube.touch(reservation_id)
+            analytics_cache.invalidate("reservations")
         return result is not None
     
     @staticmethod
@@ -533,6 +625,10 @@ class ReservationModel:
         query = "UPDATE reservations SET status = 'cancelled' WHERE id = %s"
         result = db.execute_query(query, (reservation_id,))
         db.disconnect()
+        if result is not None:
+            availability_index.remove(reservation_id)
+            occupancy_cube.touch(reservation_id)
+            analytics_cache.invalidate("reservations")
         return result is not None
     
     @staticmethod
@@ -542,6 +638,8 @@ class ReservationModel:
         query = "UPDATE reservations SET status = 'ongoing' WHERE id = %s AND status = 'approved'"
         result = db.execute_query(query, (reservation_id,))
         db.disconnect()
+        if result is not None:
+            analytics_cache.invalidate("reservations")
         return result is not None
     
     @staticmethod
@@ -551,8 +649,43 @@ class ReservationModel:
         query = "UPDATE reservations SET status = 'done' WHERE id = %s AND status = 'ongoing'"
         result = db.execute_query(query, (reservation_id,))
         db.disconnect()
+        if result is not None:
+            availability_index.remove(reservation_id)
+            analytics_cache.invalidate("reservations")
         return result is not None
     
+    @staticmethod
+    def transition_status(reservation_id, expected_statuses, new_status):
+        """
+        Move a reservation to new_status if it is currently in one of expected_statuses
+        
+        Returns:
+            dict: id, user_id, classroom_id and room_name if the row changed, else None
+        """
+        with db.transaction(write=True) as tx:
+            query = """
+                SELECT r.id, r.user_id, r.classroom_id, r.status, c.room_name
+                FROM reservations r
+                JOIN classrooms c ON r.classroom_id = c.id
+                WHERE r.id = %s
+                FOR UPDATE
+            """
+            row = db.fetch_one(query, (reservation_id,))
+            if not row or row['status'] not in expected_statuses:
+                return None
+            db.execute_query(
+                "UPDATE reservations SET status = %s WHERE id = %s",
+                (new_status, reservation_id)
+            )
+        
+        if not tx.committed:
+            return None
+        occupancy_cube.touch(reservation_id)
+        analytics_cache.invalidate("reservations")
+        if new_status not in ('approved', 'ongoing'):
+            availability_index.remove(reservation_id)
+        return row
+    
     @staticmethod
     def update_reservation_statuses():
         """
@@ -561,41 +694,43 @@ class ReservationModel:
         - ongoing → done: when current time is past end_time
         Returns True on success.
         """
-        db.connect()
-        
-        # Set approved reservations to ongoing if current time is within their time range
-        ongoing_query = """
-            UPDATE reservations 
-            SET status = 'ongoing' 
-            WHERE status = 'approved'
-            AND reservation_date = CURDATE()
-            AND start_time <= CURTIME()
-            AND end_time > CURTIME()
-        """
-        db.execute_query(ongoing_query)
-        
-        # Set ongoing reservations to done if current time is past end_time
-        done_query = """
-            UPDATE reservations 
-            SET status = 'done' 
-            WHERE status = 'ongoing'
-            AND (
-                reservation_date < CURDATE()
-                OR (reservation_date = CURDATE() AND end_time <= CURTIME())
-            )
-        """
-        db.execute_query(done_query)
+        with db.transaction():
+            # Set approved reservations to ongoing if current time is within their time range
+            ongoing_query = """
+                UPDATE reservations 
+                SET status = 'ongoing' 
+                WHERE status = 'approved'
+                AND reservation_date = CURDATE()
+                AND start_time <= CURTIME()
+                AND end_time > CURTIME()
+            """
+            db.execute_query(ongoing_query)
+            
+            # Set ongoing reservations to done if current time is past end_time
+            done_query = """
+                UPDATE reservations 
+                SET status = 'done' 
+                WHERE status = 'ongoing'
+                AND (
+                    reservation_date < CURDATE()
+                    OR (reservation_date = CURDATE() AND end_time <= CURTIME())
+                )
+            """
+            db.execute_query(done_query)
+            
+            # Also mark approved reservations from past dates as done
+            past_done_query = """
+                UPDATE reservations 
+                SET status = 'done' 
+                WHERE status = 'approved'
+                AND reservation_date < CURDATE()
+            """
+            db.execute_query(past_done_query)
         
-        # Also mark approved reservations from past dates as done
-        past_done_query = """
-            UPDATE reservations 
-            SET status = 'done' 
-            WHERE status = 'approved'
-            AND reservation_date < CURDATE()
-        """
-        db.execute_query(past_done_query)
+        # Statuses changed on today's and earlier dates only
+        availability_index.invalidate(up_to=datetime.now().date())
+        analytics_cache.invalidate("reservations")
         
-        db.disconnect()
         return True
     
     @staticmethod
@@ -613,76 +748,63 @@ class ReservationModel:
     @staticmethod
     def get_reservations_by_classroom_and_date(classroom_id, reservation_date):
         """Get all approved/ongoing reservations for a classroom on a specific date"""
-        db.connect()
-        query = """
-            SELECT id, classroom_id, reservation_date, start_time, end_time, status
-            FROM reservations
-            WHERE classroom_id = %s 
-            AND reservation_date = %s
-            AND status IN ('approved', 'ongoing')
-            ORDER BY start_time
-        """
-        reservations = db.fetch_all(query, (classroom_id, reservation_date))
-        db.disconnect()
-        return reservations
+        return [
+            {
+                "id": row["id"],
+                "classroom_id": row["classroom_id"],
+                "reservation_date": row["reservation_date"],
+                "start_time": row["start_time"],
+                "end_time": row["end_time"],
+                "status": row["status"],
+            }
+            for row in availability_index.reservations_for(classroom_id, reservation_date)
+        ]
     
     @staticmethod
     def get_available_classrooms(reservation_date, start_time, end_time):
         """Get all classrooms that are available for the given date and time range"""
-        db.connect()
-        query = """
-            SELECT c.* 
-            FROM classrooms c
-            WHERE c.id NOT IN (
-                SELECT DISTINCT r.classroom_id
-                FROM reservations r
-                WHERE r.reservation_date = %s
-                AND r.status IN ('approved', 'ongoing')
-                AND (
-                    (r.start_time < %s AND r.end_time > %s) OR
-                    (r.start_time < %s AND r.end_time > %s) OR
-                    (r.start_time >= %s AND r.end_time <= %s)
-                )
-            )
-            ORDER BY c.room_name
-        """
-        classrooms = db.fetch_all(query, (
-            reservation_date, 
-            end_time, start_time,  # overlaps start
-            end_time, start_time,  # overlaps end
-            start_time, end_time   # contained within
-        ))
-        db.disconnect()
-        return classrooms
+        busy = availability_index.busy_classrooms(reservation_date, start_time, end_time)
+        classrooms = ClassroomModel.get_all_classrooms()
+        return [classroom for classroom in classrooms if classroom['id'] not in busy]
 
     @staticmethod
     def create_reservation(classroom_id, user_id, reservation_date, start_time, end_time, purpose):
-        """Create a new reservation and notify admins"""
-        db.connect()
-        query = """
-            INSERT INTO reservations 
-            (classroom_id, user_id, reservation_date, start_time, end_time, purpose)
-            VALUES (%s, %s, %s, %s, %s, %s)
         """
-        reservation_id = db.execute_query(
-            query, 
-            (classroom_id, user_id, reservation_date, start_time, end_time, purpose)
-        )
+        Create a new reservation and notify admins
         
-        # Get room name for notification
-        room_query = "SELECT room_name FROM classrooms WHERE id = %s"
-        room = db.fetch_one(room_query, (classroom_id,))
+        Returns:
+            int: The new reservation id, or None if the slot overlaps an
+            approved reservation or the insert failed
+        """
+        # The reservation and its admin notifications commit together
+        reservation_id = None
+        with db.transaction(write=True) as tx:
+            # Re-check under the classroom lock; the form's check may be stale
+            room = ReservationModel.lock_classroom(classroom_id)
+            if room and not ReservationModel.find_conflict(classroom_id, reservation_date, start_time, end_time):
+                query = """
+                    INSERT INTO reservations 
+                    (classroom_id, user_id, reservation_date, start_time, end_time, purpose)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                """
+                reservation_id = db.execute_query(
+                    query, 
+                    (classroom_id, user_id, reservation_date, start_time, end_time, purpose)
+                )
+                
+                # Notify admins about new reservation
+                if reservation_id:
+                    NotificationModel.notify_new_reservation(reservation_id, room['room_name'])
         
-        db.disconnect()
+        if not tx.committed or not reservation_id:
+            return None
+        analytics_cache.invalidate("reservations")
         
-        # Notify admins about new reservation
         if room and reservation_id:
-            from data.models import NotificationModel
-            NotificationModel.notify_new_reservation(reservation_id, room['room_name'])
-        
             if REALTIME_ENABLED and realtime.connected:
                 realtime.send("new_reservation", {
                     "reservation_id": reservation_id,
+                    "classroom_id": classroom_id,
                     "room_name": room['room_name'],
                     "message": f"New reservation for {room['room_name']}"
                 })
@@ -690,40 +812,258 @@ class ReservationModel:
         return reservation_id
 
     @staticmethod
-    def approve_reservation(reservation_id):
-        """Approve a reservation and notify the faculty member"""
-        db.connect()
+    def get_series_dates(start_date, until_date, interval_weeks=1, limit=None):
+        """Dates of a weekly series from start_date through until_date (inclusive), at most `limit` of them"""
+        if isinstance(start_date, str):
+            start_date = datetime.strptime(start_date[:10], '%Y-%m-%d').date()
+        if isinstance(until_date, str):
+            until_date = datetime.strptime(until_date[:10], '%Y-%m-%d').date()
+        if isinstance(start_date, datetime):
+            start_date = start_date.date()
+        if isinstance(until_date, datetime):
+            until_date = until_date.date()
         
-        # Get reservation details before updating
-        query = """
-            SELECT r.user_id, c.room_name 
-            FROM reservations r
-            JOIN classrooms c ON r.classroom_id = c.id
-            WHERE r.id = %s
+        step = timedelta(weeks=max(1, int(interval_weeks)))
+        dates = []
+        current = start_date
+        while current <= until_date and (limit is None or len(dates) < limit):
+            dates.append(current)
+            current += step
+        return dates
+    
+    @staticmethod
+    def create_recurring_reservation(classroom_id, user_id, start_date, until_date, start_time, end_time,
+                                     purpose, interval_weeks=1, skip_conflicts=False):
         """
-        reservation = db.fetch_one(query, (reservation_id,))
+        Create a weekly (or every N weeks) series of reservations in one transaction
         
-        # Update status
-        update_query = "UPDATE reservations SET status = 'approved' WHERE id = %s"
-        db.execute_query(update_query, (reservation_id,))
-        db.disconnect()
+        Args:
+            start_date: First occurrence
+            until_date: Last possible occurrence (inclusive)
+            interval_weeks (int): 1 = weekly, 2 = bi-weekly, ...
+            skip_conflicts (bool): Book only the free dates instead of nothing
         
-        # Notify faculty member
-        if reservation:
-            from data.models import NotificationModel
-            NotificationModel.notify_reservation_approved(
-                reservation['user_id'], 
-                reservation_id, 
-                reservation['room_name']
-            )
+        Returns:
+            dict: {
+                "series_id": int or None (nothing booked),
+                "reservation_ids": [int, ...],
+                "conflicts": [{"reservation_date": 'YYYY-MM-DD', "conflicts": [reservation rows]}],
+                "skipped": ['YYYY-MM-DD', ...],
+                "too_many": bool (more than MAX_SERIES_OCCURRENCES dates; nothing booked)
+            }
+        """
+        dates = ReservationModel.get_series_dates(
+            start_date, until_date, interval_weeks, limit=MAX_SERIES_OCCURRENCES + 1
+        )
+        result = {"series_id": None, "reservation_ids": [], "conflicts": [], "skipped": [], "too_many": False}
+        if len(dates) > MAX_SERIES_OCCURRENCES:
+            # Refuse instead of booking only the first MAX_SERIES_OCCURRENCES dates
+            result["too_many"] = True
+            return result
+        if not dates:
+            return result
+        
+        # One index pass (one query at most) for every occurrence
+        checks = ReservationModel.check_availability_many(
+            [(classroom_id, d, start_time, end_time) for d in dates]
+        )
+        free_dates = []
+        for occurrence, check in zip(dates, checks):
+            if check["available"]:
+                free_dates.append(occurrence)
+            else:
+                result["conflicts"].append({
+                    "reservation_date": occurrence.isoformat(),
+                    "conflicts": check["conflicts"],
+                })
+        
+        if result["conflicts"] and not skip_conflicts:
+            return result
+        result["skipped"] = [c["reservation_date"] for c in result["conflicts"]]
+        if not free_dates:
+            return result
+        
+        series_id = None
+        with db.transaction(write=True) as tx:
+            room = ReservationModel.lock_classroom(classroom_id)
+            
+            # Re-check every date under the lock in one query
+            placeholders = ", ".join(["%s"] * len(free_dates))
+            taken = db.fetch_all(f"""
+                SELECT DISTINCT reservation_date FROM reservations
+                WHERE classroom_id = %s
+                AND reservation_date IN ({placeholders})
+                AND status IN ('approved', 'ongoing')
+                AND start_time < %s
+                AND end_time > %s
+                FOR UPDATE
+            """, (classroom_id, *free_dates, end_time, start_time))
+            if taken or not room:
+                result["conflicts"].extend(
+                    {"reservation_date": str(row['reservation_date'])[:10], "conflicts": []} for row in taken
+                )
+                return result
+            
+            series_query = """
+                INSERT INTO reservation_series
+                (classroom_id, user_id, start_date, until_date, interval_weeks, start_time, end_time, purpose)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            """
+            series_id = db.execute_query(series_query, (
+                classroom_id, user_id, dates[0], dates[-1], interval_weeks, start_time, end_time, purpose
+            ))
             
+            if series_id:
+                # All occurrences in a single multi-row INSERT
+                values = ", ".join(["(%s, %s, %s, %s, %s, %s, %s)"] * len(free_dates))
+                params = []
+                for occurrence in free_dates:
+                    params.extend([classroom_id, user_id, occurrence, start_time, end_time, purpose, series_id])
+                db.execute_query(f"""
+                    INSERT INTO reservations
+                    (classroom_id, user_id, reservation_date, start_time, end_time, purpose, series_id)
+                    VALUES {values}
+                """, tuple(params))
+                
+                rows = db.fetch_all(
+                    "SELECT id FROM reservations WHERE series_id = %s ORDER BY reservation_date",
+                    (series_id,)
+                )
+                reservation_ids = [row['id'] for row in rows]
+                
+                # One notification per admin for the whole series
+                if reservation_ids:
+                    NotificationModel.notify_new_series(reservation_ids[0], room['room_name'], len(reservation_ids))
+        
+        if not tx.committed or not series_id:
+            return result
+        
+        result["series_id"] = series_id
+        result["reservation_ids"] = reservation_ids
+        analytics_cache.invalidate("reservations")
+        
+        if reservation_ids:
             if REALTIME_ENABLED and realtime.connected:
-                realtime.send("reservation_approved", {
-                    "reservation_id": reservation_id,
-                    "user_id": reservation['user_id'],
-                    "room_name": reservation['room_name'],
-                    "message": f"Reservation for {reservation['room_name']} approved"
-                })              
+                realtime.send("new_reservation", {
+                    "reservation_id": reservation_ids[0],
+                    "series_id": series_id,
+                    "classroom_id": classroom_id,
+                    "count": len(reservation_ids),
+                    "room_name": room['room_name'],
+                    "message": f"New weekly reservation for {room['room_name']} ({len(reservation_ids)} dates)"
+                })
+        
+        return result
+
+    @staticmethod
+    def lock_classroom(classroom_id):
+        """
+        Lock a classroom row until the current transaction ends.
+        
+        Every booking path takes this lock before checking for conflicts,
+        so bookings for the same room run one at a time while different
+        rooms proceed in parallel. Must be called inside db.transaction(write=True).
+        """
+        return db.fetch_one("SELECT id, room_name FROM classrooms WHERE id = %s FOR UPDATE", (classroom_id,))
+    
+    @staticmethod
+    def find_conflict(classroom_id, reservation_date, start_time, end_time, exclude_reservation_id=None):
+        """
+        First approved/ongoing reservation overlapping the slot, read from
+        the database (locking read, so it sees bookings committed by other
+        transactions). Use inside db.transaction(write=True) after lock_classroom().
+        """
+        query = """
+            SELECT id FROM reservations
+            WHERE classroom_id = %s
+            AND reservation_date = %s
+            AND status IN ('approved', 'ongoing')
+            AND start_time < %s
+            AND end_time > %s
+            AND id != %s
+            LIMIT 1
+            FOR UPDATE
+        """
+        return db.fetch_one(query, (
+            classroom_id, reservation_date, end_time, start_time, exclude_reservation_id or 0
+        ))
+    
+    @staticmethod
+    def approve_reservation(reservation_id):
+        """
+        Approve a reservation and notify the faculty member
+        
+        Runs as one transaction holding the classroom lock, so two admins
+        approving overlapping requests cannot both succeed: whichever
+        commits second sees the first approval and is refused.
+        
+        Returns:
+            bool: True if approved, False if it overlaps an approved
+            reservation, is no longer pending, or does not exist
+        """
+        reservation = None
+        with db.transaction(write=True) as tx:
+            target = db.fetch_one("SELECT classroom_id FROM reservations WHERE id = %s", (reservation_id,))
+            if target:
+                room = ReservationModel.lock_classroom(target['classroom_id'])
+                
+                # Re-read under the lock; another admin may have acted first
+                query = """
+                    SELECT user_id, classroom_id, reservation_date, start_time, end_time, purpose, status
+                    FROM reservations
+                    WHERE id = %s
+                    FOR UPDATE
+                """
+                reservation = db.fetch_one(query, (reservation_id,))
+                
+                if reservation and reservation['status'] != 'pending':
+                    reservation = None
+                elif reservation and ReservationModel.find_conflict(
+                    reservation['classroom_id'], reservation['reservation_date'],
+                    reservation['start_time'], reservation['end_time'], reservation_id
+                ):
+                    print(f"Reservation {reservation_id} overlaps an approved reservation")
+                    reservation = None
+                
+                if reservation:
+                    reservation['room_name'] = room['room_name']
+                    update_query = "UPDATE reservations SET status = 'approved' WHERE id = %s AND status = 'pending'"
+                    db.execute_query(update_query, (reservation_id,))
+                    
+                    # Notify faculty member
+                    NotificationModel.notify_reservation_approved(
+                        reservation['user_id'], 
+                        reservation_id, 
+                        reservation['room_name']
+                    )
+        
+        if not reservation or not tx.committed:
+            return False
+        
+        # The slot is now taken
+        approved_row = {
+            "id": reservation_id,
+            "classroom_id": reservation['classroom_id'],
+            "reservation_date": reservation['reservation_date'],
+            "start_time": reservation['start_time'],
+            "end_time": reservation['end_time'],
+            "purpose": reservation['purpose'],
+            "status": "approved",
+        }
+        availability_index.add(approved_row)
+        occupancy_cube.touch(reservation_id)
+        analytics_cache.invalidate("reservations")
+        if status_scheduler.running:
+            status_scheduler.schedule(approved_row)
+        
+        if REALTIME_ENABLED and realtime.connected:
+            realtime.send("reservation_approved", {
+                "reservation_id": reservation_id,
+                "user_id": reservation['user_id'],
+                "classroom_id": reservation['classroom_id'],
+                "room_name": reservation['room_name'],
+                "message": f"Reservation for {reservation['room_name']} approved"
+            }, target_user_id=reservation['user_id'])              
         
         return True
 
@@ -745,6 +1085,9 @@ class ReservationModel:
         update_query = "UPDATE reservations SET status = 'rejected' WHERE id = %s"
         db.execute_query(update_query, (reservation_id,))
         db.disconnect()
+        availability_index.remove(reservation_id)
+        occupancy_cube.touch(reservation_id)
+        analytics_cache.invalidate("reservations")
         
         # Notify faculty member
         if reservation:
@@ -756,6 +1099,177 @@ class ReservationModel:
             )
         
         return True
+
+    @staticmethod
+    def bulk_approve(reservation_ids):
+        """
+        Approve several pending reservations at once
+        
+        Everything runs in one transaction: the affected classrooms are
+        locked in id order (so concurrent bulk approvals cannot deadlock),
+        conflicts with approved reservations and within the selection are
+        resolved in id order (earliest request wins), then one UPDATE, one
+        notification insert and one realtime event cover the whole batch.
+        
+        Returns:
+            dict: {"approved": [ids], "conflicts": [ids], "skipped": [ids not pending or missing]}
+        """
+        reservation_ids = sorted(set(reservation_ids))
+        result = {"approved": [], "conflicts": [], "skipped": []}
+        if not reservation_ids:
+            return result
+        
+        placeholders = ", ".join(["%s"] * len(reservation_ids))
+        accepted = []
+        with db.transaction(write=True) as tx:
+            targets = db.fetch_all(
+                f"SELECT DISTINCT classroom_id FROM reservations WHERE id IN ({placeholders})",
+                tuple(reservation_ids)
+            )
+            classroom_ids = sorted(row['classroom_id'] for row in targets)
+            if classroom_ids:
+                room_placeholders = ", ".join(["%s"] * len(classroom_ids))
+                rooms = db.fetch_all(
+                    f"SELECT id, room_name FROM classrooms WHERE id IN ({room_placeholders}) ORDER BY id FOR UPDATE",
+                    tuple(classroom_ids)
+                )
+                room_names = {room['id']: room['room_name'] for room in rooms}
+                
+                # Re-read under the locks
+                rows = db.fetch_all(f"""
+                    SELECT id, user_id, classroom_id, reservation_date, start_time, end_time, purpose, status
+                    FROM reservations
+                    WHERE id IN ({placeholders})
+                    ORDER BY id
+                    FOR UPDATE
+                """, tuple(reservation_ids))
+                pending = [row for row in rows if row['status'] == 'pending']
+                
+                dates = sorted({row['reservation_date'] for row in pending})
+                existing = []
+                if pending:
+                    date_placeholders = ", ".join(["%s"] * len(dates))
+                    existing = db.fetch_all(f"""
+                        SELECT id, classroom_id, reservation_date, start_time, end_time
+                        FROM reservations
+                        WHERE classroom_id IN ({room_placeholders})
+                        AND reservation_date IN ({date_placeholders})
+                        AND status IN ('approved', 'ongoing')
+                        FOR UPDATE
+                    """, (*classroom_ids, *dates))
+                
+                accepted, conflicting = pick_non_overlapping(existing, pending)
+                result["conflicts"] = [row['id'] for row in conflicting]
+                
+                if accepted:
+                    approve_placeholders = ", ".join(["%s"] * len(accepted))
+                    db.execute_query(
+                        f"UPDATE reservations SET status = 'approved' "
+                        f"WHERE id IN ({approve_placeholders}) AND status = 'pending'",
+                        tuple(row['id'] for row in accepted)
+                    )
+                    for row in accepted:
+                        row['room_name'] = room_names.get(row['classroom_id'], '')
+                    NotificationModel.create_notifications([
+                        (row['user_id'], f"Reservation for {row['room_name']} approved", row['id'])
+                        for row in accepted
+                    ])
+        
+        if not tx.committed:
+            result["conflicts"] = []
+            return result
+        
+        result["approved"] = [row['id'] for row in accepted]
+        decided = set(result["approved"]) | set(result["conflicts"])
+        result["skipped"] = [rid for rid in reservation_ids if rid not in decided]
+        if accepted:
+            occupancy_cube.touch(*result["approved"])
+            analytics_cache.invalidate("reservations")
+        
+        for row in accepted:
+            availability_index.add(dict(row, status="approved"))
+            if status_scheduler.running:
+                status_scheduler.schedule(dict(row, status="approved"))
+        
+        if accepted and REALTIME_ENABLED and realtime.connected:
+            realtime.send("reservations_reviewed", {
+                "approved": [
+                    {"reservation_id": row['id'], "user_id": row['user_id'],
+                     "classroom_id": row['classroom_id'], "room_name": row['room_name']}
+                    for row in accepted
+                ],
+                "rejected": [],
+                "message": f"{len(accepted)} reservation(s) approved"
+            }, target_user_id=sorted({row['user_id'] for row in accepted}))
+        
+        return result
+    
+    @staticmethod
+    def bulk_reject(reservation_ids):
+        """
+        Reject several pending reservations with one UPDATE, one
+        notification insert and one realtime event
+        
+        Returns:
+            dict: {"rejected": [ids], "skipped": [ids not pending or missing]}
+        """
+        reservation_ids = sorted(set(reservation_ids))
+        result = {"rejected": [], "skipped": []}
+        if not reservation_ids:
+            return result
+        
+        placeholders = ", ".join(["%s"] * len(reservation_ids))
+        with db.transaction(write=True) as tx:
+            rows = db.fetch_all(f"""
+                SELECT id, user_id, classroom_id
+                FROM reservations
+                WHERE id IN ({placeholders}) AND status = 'pending'
+                ORDER BY id
+                FOR UPDATE
+            """, tuple(reservation_ids))
+            
+            if rows:
+                classroom_ids = sorted({row['classroom_id'] for row in rows})
+                room_placeholders = ", ".join(["%s"] * len(classroom_ids))
+                rooms = db.fetch_all(
+                    f"SELECT id, room_name FROM classrooms WHERE id IN ({room_placeholders})",
+                    tuple(classroom_ids)
+                )
+                room_names = {room['id']: room['room_name'] for room in rooms}
+                for row in rows:
+                    row['room_name'] = room_names.get(row['classroom_id'], '')
+                
+                reject_placeholders = ", ".join(["%s"] * len(rows))
+                db.execute_query(
+                    f"UPDATE reservations SET status = 'rejected' WHERE id IN ({reject_placeholders})",
+                    tuple(row['id'] for row in rows)
+                )
+                NotificationModel.create_notifications([
+                    (row['user_id'], f"Reservation for {row['room_name']} rejected", row['id'])
+                    for row in rows
+                ])
+        
+        if not tx.committed:
+            return result
+        
+        result["rejected"] = [row['id'] for row in rows]
+        result["skipped"] = [rid for rid in reservation_ids if rid not in set(result["rejected"])]
+        if rows:
+            analytics_cache.invalidate("reservations")
+        
+        if rows and REALTIME_ENABLED and realtime.connected:
+            realtime.send("reservations_reviewed", {
+                "approved": [],
+                "rejected": [
+                    {"reservation_id": row['id'], "user_id": row['user_id'],
+                     "classroom_id": row['classroom_id'], "room_name": row['room_name']}
+                    for row in rows
+                ],
+                "message": f"{len(rows)} reservation(s) rejected"
+            }, target_user_id=sorted({row['user_id'] for row in rows}))
+        
+        return result
+
 class ActivityLogModel:
     @staticmethod
     def log_activity(user_id, action, details=None, ip_address=None):
@@ -767,6 +1281,22 @@ class ActivityLogModel:
         """
         db.execute_query(query, (user_id, action, details, ip_address))
         db.disconnect()
+    
+    @staticmethod
+    def log_activities(entries):
+        """
+        Log several activities with a single multi-row INSERT
+        
+        Args:
+            entries (list): (user_id, action, details) tuples
+        """
+        if not entries:
+            return
+        db.connect()
+        values = ", ".join(["(%s, %s, %s)"] * len(entries))
+        query = f"INSERT INTO activity_logs (user_id, action, details) VALUES {values}"
+        db.execute_query(query, tuple(value for entry in entries for value in entry))
+        db.disconnect()
 
 class NotificationModel:
     @staticmethod
@@ -781,6 +1311,27 @@ class NotificationModel:
         db.disconnect()
         return notification_id
     
+    @staticmethod
+    def create_notifications(notifications):
+        """
+        Create several notifications with a single multi-row INSERT
+        
+        Args:
+            notifications (list): (user_id, message, reservation_id) tuples
+        
+        Returns:
+            bool: True if the insert succeeded (or there was nothing to insert)
+        """
+        if not notifications:
+            return True
+        db.connect()
+        values = ", ".join(["(%s, %s, %s)"] * len(notifications))
+        query = f"INSERT INTO notifications (user_id, message, reservation_id) VALUES {values}"
+        params = tuple(value for notification in notifications for value in notification)
+        result = db.execute_query(query, params)
+        db.disconnect()
+        return result is not None
+    
     @staticmethod
     def get_user_notifications(user_id, limit=5, unread_only=False):
         """Get notifications for a user"""
@@ -856,8 +1407,25 @@ class NotificationModel:
         
         if admins:
             message = f"New Reservation for {room_name}"
-            for admin in admins:
-                NotificationModel.create_notification(admin['id'], message, reservation_id)
+            NotificationModel.create_notifications(
+                [(admin['id'], message, reservation_id) for admin in admins]
+            )
+        
+        db.disconnect()
+    
+    @staticmethod
+    def notify_new_series(reservation_id, room_name, count):
+        """Notify all admins once about a new recurring series"""
+        db.connect()
+        
+        admin_query = "SELECT id FROM users WHERE role = 'admin' AND is_active = TRUE"
+        admins = db.fetch_all(admin_query)
+        
+        if admins:
+            message = f"New weekly reservation for {room_name} ({count} dates)"
+            NotificationModel.create_notifications(
+                [(admin['id'], message, reservation_id) for admin in admins]
+            )
         
         db.disconnect()
     
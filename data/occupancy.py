@@ -0,0 +1,224 @@
+"""
+Occupancy Cube
+==============
+In-process room × weekday × hour cube of booked minutes
+
+Features:
+- Time-weighted: a reservation adds the minutes it covers in each hour,
+  so a 30-minute booking weighs a quarter of a 2-hour one
+- Loaded from the trigger-maintained occupancy_rollup table
+  (data/rollups.py), so a load reads at most one row per room, weekday,
+  hour and status however many reservations there are
+- ReservationModel marks changes with touch(), and the next read
+  reloads the cube
+- Heatmap and utilization-percentage queries for the analytics dashboard
+"""
+
+import os
+import threading
+import time
+from datetime import date
+
+from data.database import db
+from data.availability import to_date_key
+
+# Reservations in these states occupy their room
+OCCUPIED_STATUSES = ("approved", "ongoing", "done")
+
+HOURS_PER_DAY = 24
+CELLS = 7 * HOURS_PER_DAY   # one cell per weekday (Monday = 0) and hour
+
+# Opening hours used as the utilization denominator (see find_free_slots)
+OPEN_HOUR = 7
+CLOSE_HOUR = 21
+
+
+def hour_minutes(start, end):
+    """Split [start, end) (minutes after midnight) into (hour, minutes) pieces"""
+    pieces = []
+    hour = start // 60
+    while hour * 60 < end:
+        minutes = min(end, hour * 60 + 60) - max(start, hour * 60)
+        if minutes > 0:
+            pieces.append((hour, minutes))
+        hour += 1
+    return pieces
+
+
+def weekday_counts(first, last):
+    """Number of Mondays, Tuesdays, ... Sundays from first through last (inclusive)"""
+    if first is None or last < first:
+        return [0] * 7
+    weeks, extra = divmod((last - first).days + 1, 7)
+    counts = [weeks] * 7
+    for offset in range(extra):
+        counts[(first.weekday() + offset) % 7] += 1
+    return counts
+
+
+class OccupancyCube:
+    """
+    Thread-safe booked-minutes cube for all classrooms.
+
+    Each classroom has CELLS counters (weekday * 24 + hour). The cube is
+    loaded on first use from occupancy_rollup, whose triggers already
+    apply every reservation change, so touch() only has to mark the cube
+    stale and the next query reloads it. The cube is also reloaded after
+    `ttl` seconds so that changes made by other app processes are picked
+    up.
+
+    Utilization is measured over the span of dates that have occupied
+    reservations, so it stays meaningful for both live and historical data.
+    """
+
+    def __init__(self, ttl=None, loader=None):
+        self.ttl = float(os.getenv('OCCUPANCY_TTL', '300')) if ttl is None else ttl
+        self._loader = loader or self._load_from_db
+        self._cells = {}      # classroom_id -> list of CELLS booked minutes
+        self._span = (None, None)   # first and last date with occupied reservations
+        self._touches = 0
+        self._loaded_touches = None
+        self._loaded_at = None
+        self._lock = threading.RLock()
+
+    # ---------- loading ----------
+
+    @staticmethod
+    def _load_from_db():
+        """
+        Occupied minutes per room, weekday and hour, and the occupied date span
+
+        Returns:
+            tuple: (rows with classroom_id, weekday, hour and minutes,
+            row with first and last) or None if the database is unavailable
+        """
+        placeholders = ", ".join(["%s"] * len(OCCUPIED_STATUSES))
+        if db.connect() is None:
+            return None
+        try:
+            rows = db.fetch_all(f"""
+                SELECT classroom_id, weekday, hour, SUM(booked_minutes) as minutes
+                FROM occupancy_rollup
+                WHERE status IN ({placeholders})
+                GROUP BY classroom_id, weekday, hour
+                HAVING SUM(booked_minutes) > 0
+            """, OCCUPIED_STATUSES)
+            span = db.fetch_one(f"""
+                SELECT MIN(reservation_date) as first, MAX(reservation_date) as last
+                FROM date_rollup
+                WHERE status IN ({placeholders})
+                AND reservations > 0
+            """, OCCUPIED_STATUSES)
+        finally:
+            db.disconnect()
+        return rows, span
+
+    def ensure_current(self):
+        """Load the cube if missing, expired or touched since the last load"""
+        with self._lock:
+            expired = self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl
+            touches = self._touches
+            if not expired and touches == self._loaded_touches:
+                return
+
+        started = time.monotonic()
+        loaded = self._loader()
+        if loaded is None:
+            return
+        rows, span = loaded
+        cells = {}
+        for row in rows:
+            room = cells.get(row["classroom_id"])
+            if room is None:
+                room = cells[row["classroom_id"]] = [0] * CELLS
+            room[int(row["weekday"]) * HOURS_PER_DAY + int(row["hour"])] += int(row["minutes"])
+        first = span and span["first"]
+        last = span and span["last"]
+        span = (date.fromisoformat(to_date_key(first)), date.fromisoformat(to_date_key(last))) if first else (None, None)
+
+        with self._lock:
+            self._cells, self._span = cells, span
+            self._loaded_at = started
+            # Touches made while we were loading leave the cube stale
+            self._loaded_touches = touches
+
+    # ---------- updates (called by ReservationModel) ----------
+
+    def touch(self, *reservation_ids):
+        """Mark reservations whose status, date or times changed"""
+        with self._lock:
+            self._touches += 1
+
+    def invalidate(self):
+        """Drop the whole cube; the next query reloads it"""
+        with self._lock:
+            self._loaded_at = None
+
+    # ---------- queries ----------
+
+    def _weekdays(self):
+        return weekday_counts(*self._span)
+
+    def heatmap(self, classroom_ids):
+        """
+        Booked minutes and occupancy per weekday and hour, summed over rooms
+
+        Args:
+            classroom_ids (iterable): rooms to include
+
+        Returns:
+            dict: "minutes" and "utilization" (percent) as 7 × 24 grids
+            (Monday first), and "weekdays" (days of each weekday in the span)
+        """
+        self.ensure_current()
+        classroom_ids = list(classroom_ids)
+        with self._lock:
+            weekdays = self._weekdays()
+            totals = [0] * CELLS
+            for classroom_id in classroom_ids:
+                room = self._cells.get(classroom_id)
+                if room:
+                    totals = [a + b for a, b in zip(totals, room)]
+
+        minutes, utilization = [], []
+        for weekday in range(7):
+            row = totals[weekday * HOURS_PER_DAY:(weekday + 1) * HOURS_PER_DAY]
+            capacity = weekdays[weekday] * 60 * len(classroom_ids)
+            minutes.append(row)
+            utilization.append([
+                round(min(100.0, value * 100.0 / capacity), 1) if capacity else 0.0
+                for value in row
+            ])
+        return {"minutes": minutes, "utilization": utilization, "weekdays": weekdays}
+
+    def utilization(self, classroom_ids, open_hour=OPEN_HOUR, close_hour=CLOSE_HOUR):
+        """
+        Share of opening hours each room was booked
+
+        Returns:
+            dict: classroom_id -> {"booked_minutes", "available_minutes",
+            "utilization" (percent)}
+        """
+        self.ensure_current()
+        with self._lock:
+            weekdays = self._weekdays()
+            cells = {classroom_id: self._cells.get(classroom_id) for classroom_id in classroom_ids}
+
+        available = sum(weekdays) * (close_hour - open_hour) * 60
+        results = {}
+        for classroom_id, room in cells.items():
+            booked = 0
+            if room:
+                for weekday in range(7):
+                    offset = weekday * HOURS_PER_DAY
+                    booked += sum(room[offset + open_hour:offset + close_hour])
+            results[classroom_id] = {
+                "booked_minutes": booked,
+                "available_minutes": available,
+                "utilization": round(min(100.0, booked * 100.0 / available), 1) if available else 0.0,
+            }
+        return results
+
+
+# Shared cube, kept current by data/models.py
+occupancy_cube = OccupancyCube()
@@ -0,0 +1,232 @@
+"""
+Query Statistics
+================
+Per-query instrumentation for the Database layer
+
+Features:
+- Call count, error count, rows returned and wall time per normalized query
+- Latency histograms with p50/p95/p99 estimates
+- Slow-query log with a configurable threshold
+- capture(): the raw statements and parameters a block of code runs
+"""
+
+import json
+import re
+import threading
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+# Histogram bucket upper bounds in milliseconds: 0.05 ms to ~105 s,
+# each bucket ~19% wider than the previous one.
+BUCKET_BOUNDS_MS = [0.05 * 2 ** (i / 4) for i in range(85)]
+
+_COMMENT_RE = re.compile(r"--[^\n]*")
+_STRING_RE = re.compile(r"'(?:[^'\\]|\\.)*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_RE = re.compile(r"%s|\?")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(query):
+    """
+    Reduce a SQL statement to its shape so that calls differing only in
+    literals, placeholders or whitespace are grouped together.
+
+    Example:
+        "SELECT * FROM users WHERE id = %s"  ->  "SELECT * FROM users WHERE id = ?"
+    """
+    text = _COMMENT_RE.sub(" ", query)
+    text = _STRING_RE.sub("?", text)
+    text = _NUMBER_RE.sub("?", text)
+    text = _PLACEHOLDER_RE.sub("?", text)
+    text = _IN_LIST_RE.sub("(...)", text)
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+class _QueryEntry:
+    """Aggregated measurements for one normalized query"""
+
+    __slots__ = ("calls", "errors", "rows", "total_ms", "max_ms", "buckets")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = {}  # bucket index -> count
+
+    def percentile(self, fraction):
+        """Estimate a latency percentile from the histogram (upper bucket bound)"""
+        if not self.calls:
+            return 0.0
+        target = max(1, round(fraction * self.calls))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= target:
+                bound = BUCKET_BOUNDS_MS[index] if index < len(BUCKET_BOUNDS_MS) else self.max_ms
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+
+class QueryStats:
+    """Thread-safe collector of per-query latency statistics"""
+
+    def __init__(self, slow_query_ms=200.0, enabled=True, slow_log_size=100):
+        self.slow_query_ms = slow_query_ms
+        self.enabled = enabled
+        self._entries = {}
+        self._normalized = {}
+        self._slow = deque(maxlen=slow_log_size)
+        self._captures = []
+        self._lock = threading.Lock()
+
+    def record(self, query, elapsed_ms, rows=0, error=False, params=None):
+        """Record one execution of `query` that took `elapsed_ms` milliseconds"""
+        if self._captures:
+            with self._lock:
+                for captured in self._captures:
+                    captured.append((query, params))
+
+        if not self.enabled:
+            return
+
+        normalized = self._normalized.get(query)
+        if normalized is None:
+            normalized = normalize_query(query)
+            if len(self._normalized) > 2048:
+                self._normalized.clear()
+            self._normalized[query] = normalized
+
+        bucket = bisect_left(BUCKET_BOUNDS_MS, elapsed_ms)
+
+        with self._lock:
+            entry = self._entries.get(normalized)
+            if entry is None:
+                entry = self._entries[normalized] = _QueryEntry()
+            entry.calls += 1
+            entry.rows += rows or 0
+            entry.total_ms += elapsed_ms
+            if elapsed_ms > entry.max_ms:
+                entry.max_ms = elapsed_ms
+            if error:
+                entry.errors += 1
+            entry.buckets[bucket] = entry.buckets.get(bucket, 0) + 1
+
+            is_slow = self.slow_query_ms is not None and elapsed_ms >= self.slow_query_ms
+            if is_slow:
+                self._slow.append({
+                    "query": normalized,
+                    "elapsed_ms": round(elapsed_ms, 3),
+                    "rows": rows or 0,
+                    "at": datetime.now().isoformat(timespec="seconds"),
+                })
+
+        if is_slow:
+            print(f"Slow query ({elapsed_ms:.1f} ms): {normalized}")
+
+    @contextmanager
+    def capture(self):
+        """
+        Collect every statement recorded inside the block, unnormalized,
+        e.g. to EXPLAIN the queries a model method actually runs
+
+        Yields:
+            list: (query, params) pairs, appended as the queries run
+        """
+        captured = []
+        with self._lock:
+            self._captures.append(captured)
+        try:
+            yield captured
+        finally:
+            with self._lock:
+                self._captures.remove(captured)
+
+    def snapshot(self, sort_by="total_ms"):
+        """
+        Get statistics for every query seen so far
+
+        Args:
+            sort_by (str): Field to sort by, descending (e.g. "total_ms", "p99_ms", "calls")
+
+        Returns:
+            list: One dict per normalized query
+        """
+        with self._lock:
+            rows = []
+            for query, entry in self._entries.items():
+                rows.append({
+                    "query": query,
+                    "calls": entry.calls,
+                    "errors": entry.errors,
+                    "rows": entry.rows,
+                    "total_ms": round(entry.total_ms, 3),
+                    "avg_ms": round(entry.total_ms / entry.calls, 3) if entry.calls else 0.0,
+                    "p50_ms": round(entry.percentile(0.50), 3),
+                    "p95_ms": round(entry.percentile(0.95), 3),
+                    "p99_ms": round(entry.percentile(0.99), 3),
+                    "max_ms": round(entry.max_ms, 3),
+                })
+        rows.sort(key=lambda row: row.get(sort_by, 0), reverse=True)
+        return rows
+
+    def histogram(self, query):
+        """
+        Get the raw latency histogram for one query
+
+        Returns:
+            list: (bucket upper bound in ms, count) pairs for non-empty buckets
+        """
+        normalized = normalize_query(query)
+        with self._lock:
+            entry = self._entries.get(normalized)
+            if entry is None:
+                return []
+            return [
+                (round(BUCKET_BOUNDS_MS[i], 3) if i < len(BUCKET_BOUNDS_MS) else float("inf"), count)
+                for i, count in sorted(entry.buckets.items())
+            ]
+
+    def slow_queries(self):
+        """Most recent slow queries, oldest first"""
+        with self._lock:
+            return list(self._slow)
+
+    def reset(self):
+        """Clear all collected statistics"""
+        with self._lock:
+            self._entries.clear()
+            self._slow.clear()
+
+    def dump(self, path=None, sort_by="total_ms"):
+        """
+        Dump statistics and the slow-query log as JSON
+
+        Args:
+            path (str): File to write to; returns the JSON string when omitted
+        """
+        data = {
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "slow_query_ms": self.slow_query_ms,
+            "queries": self.snapshot(sort_by=sort_by),
+            "slow_queries": self.slow_queries(),
+        }
+        text = json.dumps(data, indent=2)
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+        return text
+
+    def report(self, limit=10, sort_by="total_ms"):
+        """Print the top queries as a plain-text table"""
+        print(f"{'calls':>7} {'total ms':>10} {'p50':>8} {'p95':>8} {'p99':>8}  query")
+        for row in self.snapshot(sort_by=sort_by)[:limit]:
+            print(
+                f"{row['calls']:>7} {row['total_ms']:>10.1f} {row['p50_ms']:>8.2f} "
+                f"{row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f}  {row['query'][:100]}"
+            )
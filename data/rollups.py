@@ -0,0 +1,294 @@
+"""
+Analytics Rollups
+=================
+Pre-aggregated reservation counts that data/analytics.py reads instead
+of scanning the whole reservations table
+
+Tables:
+- user_daily_rollup: reservations per (created_date, user_id, status);
+  read only through a date window
+- date_rollup: reservations per (reservation_date, status)
+- classroom_rollup: reservations and booked minutes per
+  (classroom_id, status)
+- slot_rollup: reservations per (status, weekday, start hour)
+- user_rollup: reservations per (user_id, status), with the summed
+  creation day numbers (days since ROLLUP_EPOCH) for pending wait times
+- occupancy_rollup: booked minutes per (classroom_id, status, weekday,
+  hour), split across every hour a reservation covers; the occupancy
+  cube (data/occupancy.py) is loaded from it
+
+The last three stay the same size however much history accumulates, and
+date_rollup has one row per day and status, so the dashboard cost does
+not grow with the number of reservations.
+
+All are kept up to date by AFTER INSERT/UPDATE/DELETE triggers on
+reservations, installed by migrations 3 (daily table), 4 (summary
+tables) and 5 (occupancy) in data/migrations.py. A trigger subtracts the old row and adds
+the new one, so a status change moves one count between two rollup
+rows. Counts can drop to 0; readers ignore those rows.
+
+The CREATE statements below are the only definition of these tables:
+eduroom_schema.sql leaves them to `python -m data.migrations migrate`.
+
+Usage:
+    python -m data.rollups rebuild    # backfill from reservations
+"""
+
+import sys
+
+from data.database import db
+
+ROLLUP_TABLES = {
+    "user_daily_rollup": """
+        CREATE TABLE user_daily_rollup (
+            created_date DATE NOT NULL,
+            user_id INT NOT NULL,
+            status VARCHAR(20) NOT NULL,
+            reservations INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (created_date, user_id, status),
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+            INDEX idx_user (user_id)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    "date_rollup": """
+        CREATE TABLE date_rollup (
+            reservation_date DATE NOT NULL,
+            status VARCHAR(20) NOT NULL,
+            reservations INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (reservation_date, status)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    "classroom_rollup": """
+        CREATE TABLE classroom_rollup (
+            classroom_id INT NOT NULL,
+            status VARCHAR(20) NOT NULL,
+            reservations INT NOT NULL DEFAULT 0,
+            booked_minutes INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (classroom_id, status),
+            FOREIGN KEY (classroom_id) REFERENCES classrooms(id) ON DELETE CASCADE
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    "slot_rollup": """
+        CREATE TABLE slot_rollup (
+            status VARCHAR(20) NOT NULL,
+            weekday INT NOT NULL,
+            hour INT NOT NULL,
+            reservations INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (status, weekday, hour)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    "occupancy_rollup": """
+        CREATE TABLE occupancy_rollup (
+            classroom_id INT NOT NULL,
+            status VARCHAR(20) NOT NULL,
+            weekday INT NOT NULL,
+            hour INT NOT NULL,
+            booked_minutes INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (classroom_id, status, weekday, hour),
+            FOREIGN KEY (classroom_id) REFERENCES classrooms(id) ON DELETE CASCADE
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    "user_rollup": """
+        CREATE TABLE user_rollup (
+            user_id INT NOT NULL,
+            status VARCHAR(20) NOT NULL,
+            reservations INT NOT NULL DEFAULT 0,
+            created_days BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, status),
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+}
+
+DAILY_TABLES = ("user_daily_rollup",)                                                  # migration 3
+SUMMARY_TABLES = ("date_rollup", "classroom_rollup", "slot_rollup", "user_rollup")    # migration 4
+OCCUPANCY_TABLES = ("occupancy_rollup",)                                                # migration 5
+
+# Tables that get one row per hour a reservation covers; their expressions
+# may use `h.hour` and the {start} / {end} minutes after midnight
+HOURLY_TABLES = ("occupancy_rollup",)
+_HOURS = " UNION ALL ".join(f"SELECT {hour} AS hour" for hour in range(24))
+
+# Day numbers in user_rollup.created_days count from here, so that
+# DATEDIFF(CURDATE(), ROLLUP_EPOCH) gives today's number on both backends
+ROLLUP_EPOCH = "2000-01-01"
+
+# Backend-specific expressions over a reservations row `{r}`
+_EXPRESSIONS = {
+    "mysql": {
+        "hour": "HOUR({r}.start_time)",
+        "weekday": "WEEKDAY({r}.reservation_date)",
+        "minutes": "(TIME_TO_SEC({r}.end_time) - TIME_TO_SEC({r}.start_time)) DIV 60",
+        "created_days": f"DATEDIFF({{r}}.created_at, '{ROLLUP_EPOCH}')",
+        "start": "TIME_TO_SEC({r}.start_time) DIV 60",
+        "end": "TIME_TO_SEC({r}.end_time) DIV 60",
+        "least": "LEAST",
+        "greatest": "GREATEST",
+    },
+    "sqlite": {
+        "hour": "CAST(substr({r}.start_time, 1, 2) AS INTEGER)",
+        "weekday": "(CAST(strftime('%w', {r}.reservation_date) AS INTEGER) + 6) % 7",
+        "minutes": "CAST(ROUND((julianday({r}.end_time) - julianday({r}.start_time)) * 1440) AS INTEGER)",
+        "created_days": f"CAST(julianday(DATE({{r}}.created_at)) - julianday('{ROLLUP_EPOCH}') AS INTEGER)",
+        "start": "(CAST(substr({r}.start_time, 1, 2) AS INTEGER) * 60 + CAST(substr({r}.start_time, 4, 2) AS INTEGER))",
+        "end": "(CAST(substr({r}.end_time, 1, 2) AS INTEGER) * 60 + CAST(substr({r}.end_time, 4, 2) AS INTEGER))",
+        "least": "MIN",
+        "greatest": "MAX",
+    },
+}
+
+# table -> (key columns, value columns) as expressions over a reservations
+# row `{r}` and the backend expressions above; values are summed
+ROLLUP_ROWS = {
+    "user_daily_rollup": (
+        {"created_date": "DATE({r}.created_at)", "user_id": "{r}.user_id", "status": "{r}.status"},
+        {"reservations": "1"},
+    ),
+    "date_rollup": (
+        {"reservation_date": "{r}.reservation_date", "status": "{r}.status"},
+        {"reservations": "1"},
+    ),
+    "classroom_rollup": (
+        {"classroom_id": "{r}.classroom_id", "status": "{r}.status"},
+        {"reservations": "1", "booked_minutes": "{minutes}"},
+    ),
+    "slot_rollup": (
+        {"status": "{r}.status", "weekday": "{weekday}", "hour": "{hour}"},
+        {"reservations": "1"},
+    ),
+    "user_rollup": (
+        {"user_id": "{r}.user_id", "status": "{r}.status"},
+        {"reservations": "1", "created_days": "{created_days}"},
+    ),
+    "occupancy_rollup": (
+        {"classroom_id": "{r}.classroom_id", "status": "{r}.status", "weekday": "{weekday}", "hour": "h.hour"},
+        {"booked_minutes": "{least}({end}, h.hour * 60 + 60) - {greatest}({start}, h.hour * 60)"},
+    ),
+}
+
+# name -> (event, [(row, sign), ...], tables it maintains)
+TRIGGERS = {
+    "trg_reservations_daily_insert": ("INSERT", [("NEW", 1)], DAILY_TABLES),
+    "trg_reservations_daily_update": ("UPDATE", [("OLD", -1), ("NEW", 1)], DAILY_TABLES),
+    "trg_reservations_daily_delete": ("DELETE", [("OLD", -1)], DAILY_TABLES),
+    "trg_reservations_summary_insert": ("INSERT", [("NEW", 1)], SUMMARY_TABLES),
+    "trg_reservations_summary_update": ("UPDATE", [("OLD", -1), ("NEW", 1)], SUMMARY_TABLES),
+    "trg_reservations_summary_delete": ("DELETE", [("OLD", -1)], SUMMARY_TABLES),
+    "trg_reservations_occupancy_insert": ("INSERT", [("NEW", 1)], OCCUPANCY_TABLES),
+    "trg_reservations_occupancy_update": ("UPDATE", [("OLD", -1), ("NEW", 1)], OCCUPANCY_TABLES),
+    "trg_reservations_occupancy_delete": ("DELETE", [("OLD", -1)], OCCUPANCY_TABLES),
+}
+
+# Dropped by migration 6: they also filled reservation_daily_rollup,
+# which nothing read
+RETIRED_TRIGGERS = ["trg_reservations_rollup_insert", "trg_reservations_rollup_update",
+                    "trg_reservations_rollup_delete"]
+RETIRED_TABLES = ["reservation_daily_rollup"]
+
+# Columns whose change moves a reservation to another rollup row
+ROLLUP_COLUMNS = ["reservation_date", "classroom_id", "user_id", "status", "start_time", "end_time"]
+
+
+def triggers_for(tables):
+    """Names of the triggers that maintain `tables`"""
+    return [name for name, (_, _, maintained) in TRIGGERS.items() if maintained == tuple(tables)]
+
+
+def _columns(backend_name, table, row):
+    """Key and value expressions of `table` for reservations row `row`"""
+    expressions = {name: expr.format(r=row) for name, expr in _EXPRESSIONS[backend_name].items()}
+    keys, values = ROLLUP_ROWS[table]
+    return ({column: expr.format(r=row, **expressions) for column, expr in keys.items()},
+            {column: expr.format(r=row, **expressions) for column, expr in values.items()})
+
+
+def _covered_hours(backend_name, row):
+    """Condition joining the hours derived table `h` to the hours `row` covers"""
+    start = _EXPRESSIONS[backend_name]["start"].format(r=row)
+    end = _EXPRESSIONS[backend_name]["end"].format(r=row)
+    return f"h.hour * 60 < {end} AND h.hour * 60 + 60 > {start}"
+
+
+def _upsert(backend_name, table, keys, values, source=None):
+    columns = list(keys) + list(values)
+    expressions = ", ".join(list(keys.values()) + list(values.values()))
+    if source:
+        sql = f"INSERT INTO {table} ({', '.join(columns)}) SELECT {expressions} {source}"
+    else:
+        sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({expressions})"
+    if backend_name == "mysql":
+        updates = ", ".join(f"{c} = {c} + VALUES({c})" for c in values)
+        return f"{sql} ON DUPLICATE KEY UPDATE {updates}"
+    updates = ", ".join(f"{c} = {c} + excluded.{c}" for c in values)
+    return f"{sql} ON CONFLICT ({', '.join(keys)}) DO UPDATE SET {updates}"
+
+
+def _row_statements(backend_name, row, sign, tables):
+    """Statements that add (sign=1) or remove (sign=-1) one reservation row"""
+    statements = []
+    for table in tables:
+        keys, values = _columns(backend_name, table, row)
+        source = None
+        if table in HOURLY_TABLES:
+            source = f"FROM ({_HOURS}) h WHERE {_covered_hours(backend_name, row)}"
+        statements.append(_upsert(backend_name, table, keys, {
+            column: str(sign) if expr == "1" else f"{sign} * ({expr})" for column, expr in values.items()
+        }, source))
+    return statements
+
+
+def trigger_sql(backend_name, name):
+    """CREATE TRIGGER statement for one of TRIGGERS on the given backend"""
+    event, rows, tables = TRIGGERS[name]
+    body = " ".join(
+        f"{statement};" for row, sign in rows for statement in _row_statements(backend_name, row, sign, tables)
+    )
+    if backend_name == "mysql":
+        return f"CREATE TRIGGER {name} AFTER {event} ON reservations FOR EACH ROW BEGIN {body} END"
+    if event == "UPDATE":
+        event = f"UPDATE OF {', '.join(ROLLUP_COLUMNS)}"
+    return f"CREATE TRIGGER {name} AFTER {event} ON reservations BEGIN {body} END"
+
+
+def rebuild(tables=None):
+    """
+    Recompute rollup tables (default: all of them) from reservations.
+
+    Used to backfill after the triggers are installed and to repair the
+    rollups after bulk changes made with triggers disabled. Run it while
+    the app is idle: writes that commit during the rebuild may be
+    counted twice on MySQL.
+
+    Returns:
+        bool: True if the rebuild was committed
+    """
+    with db.transaction() as tx:
+        for table in tables or ROLLUP_ROWS:
+            keys, values = _columns(db.backend.name, table, "reservations")
+            source = "reservations"
+            if table in HOURLY_TABLES:
+                source += f" JOIN ({_HOURS}) h ON {_covered_hours(db.backend.name, 'reservations')}"
+            db.execute_query(f"DELETE FROM {table}")
+            db.execute_query(f"""
+                INSERT INTO {table} ({', '.join(list(keys) + list(values))})
+                SELECT {', '.join(keys.values())}, {', '.join(f'SUM({expr})' for expr in values.values())}
+                FROM {source}
+                GROUP BY {', '.join(keys.values())}
+            """)
+    return tx.committed
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] != ["rebuild"]:
+        print("Usage: python -m data.rollups rebuild")
+        return 2
+    if rebuild():
+        print("Rollups rebuilt")
+        return 0
+    print("Rollup rebuild failed")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+"""
+Status Scheduler
+================
+Background thread that moves reservations through their lifecycle
+
+Features:
+- approved -> ongoing at start_time, ongoing -> done at end_time
+- Min-heap of upcoming start/end boundaries; sleeps until the next one
+- One realtime "reservation_status" event per transition
+- Periodic resync from the database (covers other app processes and downtime)
+- Overdue reservations go straight to done, without an "ongoing" event
+- Runs in one place only: inside websocket_server.py by default (events
+  are published there directly), or as `python -m data.scheduler` with
+  STATUS_SCHEDULER=0 on the server; the standalone runner connects to the
+  websocket server with a service token signed with REALTIME_SECRET
+"""
+
+import heapq
+import itertools
+import os
+import threading
+from datetime import date, datetime, timedelta
+
+from data.database import db
+from data.availability import to_minutes, to_date_key
+
+
+# Realtime identity of the standalone scheduler (no users row has id 0)
+SERVICE_USER_ID = 0
+
+
+def boundary(reservation_date, time_value):
+    """Datetime at which a reservation's start or end time falls"""
+    day = date.fromisoformat(to_date_key(reservation_date))
+    return datetime.combine(day, datetime.min.time()) + timedelta(minutes=to_minutes(time_value))
+
+
+class StatusScheduler:
+    """
+    Flips reservation statuses exactly when their start/end times pass.
+
+    Upcoming boundaries (today and tomorrow) are loaded from the database
+    on start and every `resync_interval` seconds; approvals made in this
+    process are added immediately through schedule(). Each transition is
+    a guarded UPDATE, so stale heap entries and several app processes
+    running a scheduler at once are harmless.
+    """
+
+    def __init__(self, resync_interval=None, horizon_days=1, clock=None, publish=None):
+        self.resync_interval = (
+            float(os.getenv('STATUS_RESYNC_INTERVAL', '300')) if resync_interval is None else resync_interval
+        )
+        self.horizon_days = horizon_days
+        self.clock = clock or datetime.now
+        self.publish = publish  # function(message dict); default: the app's realtime client
+        self._heap = []       # (when, seq, new_status, reservation_id, key)
+        self._keys = {}       # reservation_id -> (date, start, end) it is scheduled for
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stop = False
+
+    # ---------- scheduling ----------
+
+    def _key(self, row):
+        return (to_date_key(row["reservation_date"]), to_minutes(row["start_time"]), to_minutes(row["end_time"]))
+
+    def _push_locked(self, row, now):
+        key = self._key(row)
+        self._keys[row["id"]] = key
+        end = boundary(row["reservation_date"], row["end_time"])
+        # A reservation already over only needs its done transition
+        if row.get("status", "approved") == "approved" and end > now:
+            heapq.heappush(self._heap, (boundary(row["reservation_date"], row["start_time"]),
+                                        next(self._seq), "ongoing", row["id"], key))
+        heapq.heappush(self._heap, (end, next(self._seq), "done", row["id"], key))
+
+    def schedule(self, row):
+        """
+        Add the boundaries of a newly approved reservation.
+
+        Args:
+            row (dict): id, reservation_date, start_time, end_time and optionally status
+        """
+        now = self.clock()
+        horizon = now.date() + timedelta(days=self.horizon_days)
+        if to_date_key(row["reservation_date"]) > horizon.isoformat():
+            return  # picked up by a later resync
+        with self._cond:
+            self._push_locked(row, now)
+            self._cond.notify()
+
+    def resync(self):
+        """Rebuild the heap from approved/ongoing reservations up to the horizon"""
+        now = self.clock()
+        horizon = now.date() + timedelta(days=self.horizon_days)
+        db.connect()
+        query = """
+            SELECT id, reservation_date, start_time, end_time, status
+            FROM reservations
+            WHERE status IN ('approved', 'ongoing')
+            AND reservation_date <= %s
+        """
+        rows = db.fetch_all(query, (horizon,))
+        db.disconnect()
+
+        with self._cond:
+            self._heap = []
+            self._keys = {}
+            for row in rows:
+                self._push_locked(row, now)
+            self._cond.notify()
+        return len(rows)
+
+    # ---------- running ----------
+
+    def next_boundary(self):
+        """When the earliest scheduled transition is due, or None"""
+        with self._cond:
+            return self._heap[0][0] if self._heap else None
+
+    def run_pending(self):
+        """
+        Apply every transition that is due now.
+
+        Returns:
+            list: (reservation_id, new_status) for transitions that changed a row
+        """
+        from data.models import ReservationModel
+
+        now = self.clock()
+        due = []
+        with self._cond:
+            while self._heap and self._heap[0][0] <= now:
+                _, _, new_status, reservation_id, key = heapq.heappop(self._heap)
+                if self._keys.get(reservation_id) == key:
+                    due.append((reservation_id, new_status))
+                    if new_status == "done":
+                        self._keys.pop(reservation_id, None)
+
+        applied = []
+        for reservation_id, new_status in due:
+            expected = ("approved",) if new_status == "ongoing" else ("approved", "ongoing")
+            row = ReservationModel.transition_status(reservation_id, expected, new_status)
+            if row:
+                applied.append((reservation_id, new_status))
+                self._announce(row, new_status)
+        return applied
+
+    def _announce(self, row, new_status):
+        from data.models import REALTIME_ENABLED, realtime
+
+        payload = {
+            "reservation_id": row['id'],
+            "user_id": row['user_id'],
+            "classroom_id": row['classroom_id'],
+            "status": new_status,
+            "message": f"Reservation for {row['room_name']} is now {new_status}"
+        }
+        if self.publish:
+            self.publish({"type": "reservation_status", "payload": payload, "target_user_id": row['user_id']})
+        elif REALTIME_ENABLED and realtime.connected:
+            realtime.send("reservation_status", payload, target_user_id=row['user_id'])
+
+    def _run(self):
+        next_resync = self.clock()
+        while True:
+            now = self.clock()
+            if now >= next_resync:
+                try:
+                    self.resync()
+                except Exception as e:
+                    print(f"Status scheduler resync failed: {e}")
+                next_resync = now + timedelta(seconds=self.resync_interval)
+
+            try:
+                self.run_pending()
+            except Exception as e:
+                print(f"Status scheduler error: {e}")
+
+            with self._cond:
+                if self._stop:
+                    return
+                wake_at = next_resync
+                if self._heap and self._heap[0][0] < wake_at:
+                    wake_at = self._heap[0][0]
+                timeout = (wake_at - self.clock()).total_seconds()
+                if timeout > 0:
+                    self._cond.wait(timeout)
+                if self._stop:
+                    return
+
+    def start(self):
+        """Start the background thread (no-op if already running)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop = False
+        self._thread = threading.Thread(target=self._run, name="status-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        """Stop the background thread"""
+        with self._cond:
+            self._stop = True
+            self._cond.notify()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    @property
+    def running(self):
+        return bool(self._thread and self._thread.is_alive())
+
+
+# Shared scheduler, started by websocket_server.py or `python -m data.scheduler`
+status_scheduler = StatusScheduler()
+
+
+if __name__ == "__main__":
+    from utils.security import create_realtime_token
+    from utils.websocket_client import realtime
+
+    # Publish as the scheduler service (needs the server's REALTIME_SECRET)
+    try:
+        realtime.authenticate_token(create_realtime_token(SERVICE_USER_ID, "service"))
+        realtime.connect()
+    except RuntimeError as e:
+        print(f"⚠️ Status events disabled: {e}")
+    print("🕒 Status scheduler running (Ctrl+C to stop)")
+    status_scheduler.start()
+    try:
+        while status_scheduler.running:
+            status_scheduler._thread.join(1)
+    except KeyboardInterrupt:
+        status_scheduler.stop()
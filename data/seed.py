@@ -0,0 +1,414 @@
+"""
+Synthetic Data Generator
+========================
+Bulk-loads large, realistic datasets for load tests and benchmarks
+
+Features:
+- Configurable volumes of classrooms, users, reservations, activity logs
+  and notifications (e.g. 200 rooms, 20k users, 2M reservations / 10 years)
+- Realistic shape: busy weekday mornings and early afternoons, quiet
+  weekends and semester breaks, popular and unpopular rooms, a few very
+  active faculty members, and no overlapping bookings within a room
+- Rows are streamed into batched multi-row INSERTs with explicit ids, so
+  memory stays flat and foreign keys need no read-back
+- One bcrypt hash is shared by every generated user
+- Rollup triggers are dropped during the load and the rollups rebuilt
+  once at the end (see data/rollups.py)
+
+Usage:
+    python -m data.seed --rooms 200 --users 20000 --reservations 2000000 --years 10
+    python -m data.seed --sqlite bench.sqlite3 --reservations 50000
+
+All generated users share the password given by --password
+(default: Password123!).
+"""
+
+import argparse
+import random
+import sys
+import time
+from bisect import bisect
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+
+from data.database import db
+from data import rollups
+from utils.auth import hash_password
+
+DEFAULT_PASSWORD = "Password123!"
+
+# Relative weights of booking start hours
+START_HOURS = {7: 4, 8: 10, 9: 12, 10: 11, 11: 8, 12: 4, 13: 10, 14: 10, 15: 8, 16: 6, 17: 4, 18: 3, 19: 2}
+# Monday .. Sunday
+WEEKDAY_WEIGHTS = [1.0, 1.0, 1.0, 1.0, 0.85, 0.3, 0.05]
+# January .. December (semester breaks in June/July and late December)
+MONTH_WEIGHTS = [0.9, 1.0, 1.0, 1.0, 0.8, 0.4, 0.5, 1.0, 1.0, 1.0, 1.0, 0.6]
+# Booking length in minutes
+DURATIONS = {30: 1, 60: 6, 90: 5, 120: 6, 180: 2, 240: 1}
+CLOSING_MINUTE = 21 * 60
+
+PAST_STATUSES = {"done": 78, "cancelled": 9, "rejected": 13}
+FUTURE_STATUSES = {"approved": 55, "pending": 38, "cancelled": 4, "rejected": 3}
+
+BUILDINGS = ["Main Building", "Science Hall", "Engineering Building", "Library Wing", "Annex"]
+CAPACITIES = [20, 25, 30, 35, 40, 50, 60, 80, 120]
+ROOM_KINDS = ["Room", "Lab", "Lecture Hall", "Seminar Room"]
+PURPOSES = [
+    "Lecture", "Laboratory Session", "Review Class", "Midterm Exam", "Final Exam",
+    "Thesis Defense", "Department Meeting", "Workshop", "Seminar", "Consultation",
+]
+ACTIVITY_ACTIONS = {
+    "User logged in": 50, "Created reservation": 15, "Cancelled reservation": 3,
+    "Updated reservation": 4, "Approved reservation": 10, "Rejected reservation": 2,
+    "Failed login": 6, "Profile picture updated": 1, "Password changed": 1,
+}
+MAX_BOOKINGS_PER_ROOM_DAY = 8
+
+
+class SeedError(Exception):
+    """Raised when a bulk insert fails"""
+
+
+def weighted(options, rng):
+    """Return a sampler picking keys of `options` (key -> weight) at random"""
+    keys = list(options)
+    cumulative = list(accumulate(options.values()))
+    total = cumulative[-1]
+    return lambda: keys[bisect(cumulative, rng.random() * total)]
+
+
+def bulk_insert(table, columns, rows, batch_size=1000):
+    """
+    Insert `rows` (an iterable of tuples) with multi-row INSERT statements
+    of `batch_size` rows each. Each statement commits on its own.
+
+    Returns:
+        int: Number of rows inserted
+
+    Raises:
+        SeedError: if a statement fails
+    """
+    prefix = f"INSERT INTO {table} ({', '.join(columns)}) VALUES "
+    placeholders = "(" + ", ".join(["%s"] * len(columns)) + ")"
+    full_statement = prefix + ", ".join([placeholders] * batch_size)
+
+    inserted = 0
+    batch = []
+
+    def flush():
+        statement = full_statement if len(batch) == batch_size else prefix + ", ".join([placeholders] * len(batch))
+        params = [value for row in batch for value in row]
+        if db.execute_query(statement, params) is None:
+            raise SeedError(f"Bulk insert into {table} failed after {inserted} rows")
+        batch.clear()
+
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            flush()
+            inserted += batch_size
+    if batch:
+        count = len(batch)
+        flush()
+        inserted += count
+    return inserted
+
+
+class Seeder:
+    """
+    Generates and loads one synthetic dataset.
+
+    Usage:
+        Seeder(rooms=200, users=20000, reservations=2_000_000, years=10).run()
+
+    Reservations span `years` years ending `future_days` after `today`.
+    Generated ids continue after the highest existing id in each table, so
+    a dataset can be added on top of the sample data.
+    """
+
+    def __init__(self, rooms=200, users=20000, reservations=2_000_000, years=10,
+                 activity_logs=None, notifications=None, batch_size=1000, seed=42,
+                 today=None, future_days=60, password=DEFAULT_PASSWORD, verbose=False):
+        self.rooms = rooms
+        self.users = users
+        self.reservations = reservations
+        self.years = years
+        self.activity_logs = reservations // 2 if activity_logs is None else activity_logs
+        self.notifications = reservations // 4 if notifications is None else notifications
+        self.batch_size = batch_size
+        self.today = today or date.today()
+        self.future_days = future_days
+        self.password = password
+        self.verbose = verbose
+        self.rng = random.Random(seed)
+
+        self.last_day = self.today + timedelta(days=future_days)
+        self.first_day = self.last_day - timedelta(days=round(365.25 * years))
+
+    # ---------- helpers ----------
+
+    def _log(self, message):
+        if self.verbose:
+            print(message)
+
+    @staticmethod
+    def _next_id(table):
+        row = db.fetch_one(f"SELECT COALESCE(MAX(id), 0) AS max_id FROM {table}")
+        return int(row["max_id"]) + 1 if row else 1
+
+    def _random_moment(self, first, last):
+        """Random datetime between two dates, never in the future"""
+        span = (last - first).days + 1
+        moment = datetime.combine(first, datetime.min.time()) + timedelta(
+            days=self.rng.randrange(span), seconds=self.rng.randrange(7 * 3600, 21 * 3600)
+        )
+        return min(moment, datetime.now())
+
+    def _load(self, table, columns, rows):
+        started = time.perf_counter()
+        count = bulk_insert(table, columns, rows, self.batch_size)
+        elapsed = time.perf_counter() - started
+        self._log(f"{table:<16} {count:>10,} rows in {elapsed:6.1f}s ({count / max(elapsed, 1e-9):,.0f} rows/s)")
+        return count
+
+    # ---------- generators ----------
+
+    def _classroom_rows(self, first_id):
+        for number in range(self.rooms):
+            building = BUILDINGS[number % len(BUILDINGS)]
+            kind = self.rng.choice(ROOM_KINDS)
+            yield (
+                first_id + number,
+                f"{kind} {building[0]}{number // len(BUILDINGS) + 101}",
+                f"{building}, Floor {self.rng.randint(1, 5)}",
+                self.rng.choice(CAPACITIES),
+                "Maintenance" if self.rng.random() < 0.02 else "Available",
+            )
+
+    def _user_rows(self, first_id, roles, password_hash):
+        created_first = self.first_day - timedelta(days=30)
+        for offset, role in enumerate(roles):
+            user_id = first_id + offset
+            yield (
+                user_id,
+                f"{role}{user_id}@seed.eduroom.test",
+                f"SEED-{user_id:07d}",
+                password_hash,
+                role,
+                f"Seed {role.title()} {user_id}",
+                self._random_moment(created_first, self.first_day),
+            )
+
+    def _day_weights(self):
+        days = [self.first_day + timedelta(days=n) for n in range((self.last_day - self.first_day).days + 1)]
+        return days, [WEEKDAY_WEIGHTS[d.weekday()] * MONTH_WEIGHTS[d.month - 1] for d in days]
+
+    def _place_bookings(self, count, start_hour, duration):
+        """`count` non-overlapping (start, end) minute ranges within one day"""
+        hours = set()
+        while len(hours) < min(count, len(START_HOURS)):
+            hours.add(start_hour())
+        starts = sorted(hour * 60 + self.rng.choice((0, 0, 0, 30)) for hour in hours)
+        bookings = []
+        for position, start in enumerate(starts):
+            limit = starts[position + 1] if position + 1 < len(starts) else CLOSING_MINUTE
+            bookings.append((start, start + min(duration(), limit - start)))
+        return bookings
+
+    def _reservation_rows(self, first_id, room_ids, booker_ids):
+        rng = self.rng
+        days, day_weights = self._day_weights()
+        total_weight = sum(day_weights)
+
+        # Some rooms are far more popular than others
+        room_popularity = list(accumulate(rng.uniform(0.2, 1.8) for _ in room_ids))
+        # A few faculty members make most of the bookings
+        booker_activity = list(accumulate(1 / (rank + 1) ** 0.8 for rank in range(len(booker_ids))))
+        rng.shuffle(booker_ids)
+
+        start_hour = weighted(START_HOURS, rng)
+        duration = weighted(DURATIONS, rng)
+        past_status = weighted(PAST_STATUSES, rng)
+        future_status = weighted(FUTURE_STATUSES, rng)
+        capacity = len(room_ids) * MAX_BOOKINGS_PER_ROOM_DAY
+
+        reservation_id = first_id
+        weight_so_far = 0.0
+        placed = 0
+        for day, weight in zip(days, day_weights):
+            # Round the running total, so the days add up to exactly `reservations`
+            weight_so_far += weight
+            day_total = min(round(self.reservations * weight_so_far / total_weight) - placed, capacity)
+            placed += day_total
+            if not day_total:
+                continue
+
+            per_room = {}
+            while day_total:
+                room = room_ids[bisect(room_popularity, rng.random() * room_popularity[-1])]
+                if per_room.get(room, 0) < MAX_BOOKINGS_PER_ROOM_DAY:
+                    per_room[room] = per_room.get(room, 0) + 1
+                    day_total -= 1
+
+            status_of = past_status if day < self.today else future_status
+            for room, count in per_room.items():
+                for start, end in self._place_bookings(count, start_hour, duration):
+                    user_id = booker_ids[bisect(booker_activity, rng.random() * booker_activity[-1])]
+                    created_at = min(
+                        datetime.combine(day - timedelta(days=rng.randint(1, 21)), datetime.min.time())
+                        + timedelta(seconds=rng.randrange(8 * 3600, 18 * 3600)),
+                        datetime.now(),
+                    )
+                    yield (
+                        reservation_id, room, user_id, day,
+                        f"{start // 60:02d}:{start % 60:02d}:00", f"{end // 60:02d}:{end % 60:02d}:00",
+                        rng.choice(PURPOSES), status_of(), created_at,
+                    )
+                    reservation_id += 1
+
+    def _activity_rows(self, user_ids):
+        action = weighted(ACTIVITY_ACTIONS, self.rng)
+        for _ in range(self.activity_logs):
+            yield (
+                self.rng.choice(user_ids),
+                action(),
+                None,
+                f"10.{self.rng.randrange(256)}.{self.rng.randrange(256)}.{self.rng.randrange(1, 255)}",
+                self._random_moment(self.first_day, self.today),
+            )
+
+    def _notification_rows(self, first_reservation, last_reservation, admin_ids, booker_ids):
+        cutoff = datetime.combine(self.today - timedelta(days=14), datetime.min.time())
+        for _ in range(self.notifications):
+            reservation_id = self.rng.randint(first_reservation, last_reservation)
+            created_at = self._random_moment(self.first_day, self.today)
+            if self.rng.random() < 0.5:
+                user_id, message = self.rng.choice(admin_ids), "New reservation request"
+            else:
+                user_id = self.rng.choice(booker_ids)
+                message = self.rng.choice(("Reservation approved", "Reservation rejected"))
+            is_read = created_at < cutoff or self.rng.random() < 0.3
+            yield (user_id, message, reservation_id, is_read, created_at)
+
+    # ---------- loading ----------
+
+    def _drop_rollup_triggers(self):
+        """Drop the rollup triggers; returns the names that existed"""
+        connection = db.connection
+        existing = [name for name in rollups.TRIGGERS if db.backend.has_trigger(connection, name)]
+        for name in existing:
+            db.execute_query(f"DROP TRIGGER IF EXISTS {name}")
+        return existing
+
+    def _restore_rollups(self, triggers):
+        started = time.perf_counter()
+        if not rollups.rebuild():
+            raise SeedError("Rollup rebuild failed")
+        for name in triggers:
+            if db.execute_query(rollups.trigger_sql(db.backend.name, name)) is None:
+                raise SeedError(f"Could not reinstall trigger {name}")
+        self._log(f"{'rollups':<16} rebuilt in {time.perf_counter() - started:6.1f}s")
+
+    def run(self):
+        """
+        Generate and insert the whole dataset
+
+        Returns:
+            dict: rows inserted per table
+        """
+        if db.connect() is None:
+            raise SeedError("Could not connect to the database")
+        counts = {}
+        try:
+            password_hash = hash_password(self.password)   # bcrypt once for every user
+
+            first_room = self._next_id("classrooms")
+            counts["classrooms"] = self._load(
+                "classrooms", ["id", "room_name", "building", "capacity", "status"],
+                self._classroom_rows(first_room),
+            )
+            room_ids = list(range(first_room, first_room + self.rooms))
+
+            admins = max(1, self.users // 500)
+            faculty = max(1, self.users // 4)
+            roles = ["admin"] * admins + ["faculty"] * faculty + ["student"] * max(0, self.users - admins - faculty)
+            first_user = self._next_id("users")
+            counts["users"] = self._load(
+                "users", ["id", "email", "id_number", "password_hash", "role", "full_name", "created_at"],
+                self._user_rows(first_user, roles, password_hash),
+            )
+            user_ids = list(range(first_user, first_user + len(roles)))
+            admin_ids = user_ids[:admins]
+            booker_ids = user_ids[:admins + faculty]
+
+            triggers = self._drop_rollup_triggers()
+            try:
+                first_reservation = self._next_id("reservations")
+                counts["reservations"] = self._load(
+                    "reservations",
+                    ["id", "classroom_id", "user_id", "reservation_date", "start_time", "end_time",
+                     "purpose", "status", "created_at"],
+                    self._reservation_rows(first_reservation, room_ids, list(booker_ids)),
+                )
+            finally:
+                self._restore_rollups(triggers)
+
+            counts["activity_logs"] = self._load(
+                "activity_logs", ["user_id", "action", "details", "ip_address", "created_at"],
+                self._activity_rows(user_ids),
+            )
+            if counts["reservations"]:
+                counts["notifications"] = self._load(
+                    "notifications", ["user_id", "message", "reservation_id", "is_read", "created_at"],
+                    self._notification_rows(
+                        first_reservation, first_reservation + counts["reservations"] - 1, admin_ids, booker_ids
+                    ),
+                )
+        finally:
+            db.disconnect()
+        return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m data.seed", description="Load a synthetic EduROOM dataset")
+    parser.add_argument("--rooms", type=int, default=200)
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--reservations", type=int, default=2_000_000)
+    parser.add_argument("--years", type=float, default=10)
+    parser.add_argument("--activity-logs", type=int, default=None, help="default: reservations / 2")
+    parser.add_argument("--notifications", type=int, default=None, help="default: reservations / 4")
+    parser.add_argument("--batch-size", type=int, default=1000, help="rows per INSERT statement")
+    parser.add_argument("--seed", type=int, default=42, help="random seed (same seed, same dataset)")
+    parser.add_argument("--password", default=DEFAULT_PASSWORD, help="password of every generated user")
+    parser.add_argument("--sqlite", metavar="PATH", help="seed an embedded SQLite file instead of MySQL")
+    args = parser.parse_args(argv)
+
+    if args.sqlite:
+        from data.backends import SQLiteBackend
+        from data.migrations import MigrationRunner
+
+        db.use_backend(SQLiteBackend(args.sqlite))
+        connection = db.connect()
+        fresh = not db.backend.has_table(connection, "users")
+        db.disconnect()
+        if fresh:
+            db.load_schema()
+        MigrationRunner().migrate()
+
+    seeder = Seeder(
+        rooms=args.rooms, users=args.users, reservations=args.reservations, years=args.years,
+        activity_logs=args.activity_logs, notifications=args.notifications,
+        batch_size=args.batch_size, seed=args.seed, password=args.password, verbose=True,
+    )
+    started = time.perf_counter()
+    try:
+        counts = seeder.run()
+    except SeedError as e:
+        print(f"Seeding failed: {e}")
+        return 1
+    print(f"Loaded {sum(counts.values()):,} rows in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
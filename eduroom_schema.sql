@@ -53,9 +53,18 @@ USE classroom_reservation_db;
 -- =====================================================
 SET FOREIGN_KEY_CHECKS = 0;
 
+DROP TABLE IF EXISTS schema_migrations;
+DROP TABLE IF EXISTS occupancy_rollup;
+DROP TABLE IF EXISTS user_rollup;
+DROP TABLE IF EXISTS slot_rollup;
+DROP TABLE IF EXISTS classroom_rollup;
+DROP TABLE IF EXISTS date_rollup;
+DROP TABLE IF EXISTS user_daily_rollup;
+DROP TABLE IF EXISTS reservation_daily_rollup;
 DROP TABLE IF EXISTS notifications;
 DROP TABLE IF EXISTS activity_logs;
 DROP TABLE IF EXISTS reservations;
+DROP TABLE IF EXISTS reservation_series;
 DROP TABLE IF EXISTS classrooms;
 DROP TABLE IF EXISTS users;
 
@@ -78,7 +87,7 @@ CREATE TABLE users (
     is_active BOOLEAN DEFAULT TRUE,
     failed_attempts INT NOT NULL DEFAULT 0,
     last_failed_at DATETIME NULL,
-    INDEX idx_email (email),
+    INDEX idx_login (email, id_number, is_active),
     INDEX idx_id_number (id_number),
     INDEX idx_role (role)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -95,6 +104,23 @@ CREATE TABLE classrooms (
     INDEX idx_status (status)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
+-- Create Reservation Series Table (weekly recurring bookings)
+CREATE TABLE reservation_series (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    classroom_id INT NOT NULL,
+    user_id INT NOT NULL,
+    start_date DATE NOT NULL,
+    until_date DATE NOT NULL,
+    interval_weeks INT NOT NULL DEFAULT 1,
+    start_time TIME NOT NULL,
+    end_time TIME NOT NULL,
+    purpose TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (classroom_id) REFERENCES classrooms(id) ON DELETE CASCADE,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+    INDEX idx_user (user_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
 -- Create Reservations Table
 CREATE TABLE reservations (
     id INT AUTO_INCREMENT PRIMARY KEY,
@@ -105,13 +131,16 @@ CREATE TABLE reservations (
     end_time TIME NOT NULL,
     purpose TEXT NOT NULL,
     status ENUM('pending', 'approved', 'rejected', 'cancelled', 'ongoing', 'done') DEFAULT 'pending',
+    series_id INT DEFAULT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (classroom_id) REFERENCES classrooms(id) ON DELETE CASCADE,
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-    INDEX idx_classroom_date (classroom_id, reservation_date),
-    INDEX idx_user (user_id),
-    INDEX idx_status (status)
+    FOREIGN KEY (series_id) REFERENCES reservation_series(id) ON DELETE SET NULL,
+    INDEX idx_room_date_status (classroom_id, reservation_date, status, start_time, end_time),
+    INDEX idx_user_date (user_id, reservation_date, start_time),
+    INDEX idx_status_date (status, reservation_date, start_time, end_time),
+    INDEX idx_series (series_id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- Create Activity Logs Table
@@ -137,10 +166,13 @@ CREATE TABLE IF NOT EXISTS notifications (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
     FOREIGN KEY (reservation_id) REFERENCES reservations(id) ON DELETE CASCADE,
-    INDEX idx_user_read (user_id, is_read),
+    INDEX idx_user_read_created (user_id, is_read, created_at),
     INDEX idx_created_at (created_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
+-- Analytics rollup tables and their triggers are defined in data/rollups.py
+-- and created by `python -m data.migrations migrate`
+
 -- =====================================================
 -- INSERT SAMPLE DATA
 -- =====================================================
@@ -1,3 +1,4 @@
+import os
 import flet as ft
 from views.login_view import show_login
 
@@ -7,8 +8,24 @@ try:
     realtime.connect()
     print("✅ WebSocket client connecting...")
 except Exception as e:
+    realtime = None
     print(f"⚠️ WebSocket not available: {e}")
 
+# Migrating is a deploy step (`python -m data.migrations migrate`); clients
+# only warn if the schema looks unmigrated. DB_AUTO_MIGRATE=1 migrates here
+# instead, e.g. for a single-machine install
+try:
+    from data.migrations import MigrationRunner
+    runner = MigrationRunner()
+    if os.getenv('DB_AUTO_MIGRATE', '0') == '1':
+        applied = runner.migrate()
+        if applied:
+            print(f"✅ Applied schema migrations: {applied}")
+    for problem in runner.check():
+        print(f"⚠️ Database schema: {problem}")
+except Exception as e:
+    print(f"⚠️ Schema check failed: {e}")
+
 def main(page: ft.Page):
     page.title = "Classroom Reservation System"
     try:
@@ -29,6 +46,11 @@ def main(page: ft.Page):
 
     page.theme_mode = ft.ThemeMode.LIGHT
 
+    # Views register realtime callbacks per page; drop them when the
+    # session closes so closed pages are not kept alive and called
+    if realtime is not None:
+        page.on_close = lambda e: realtime.off(page)
+
     # Start with login page
     show_login(page)
 
@@ -0,0 +1,288 @@
+"""
+Model-Layer Benchmarks for EduROOM
+==================================
+Seeds a synthetic dataset (data/seed.py) and times the hot model calls
+
+Reports ops/sec, mean and p50/p90/p99/max latency, and database queries
+per call for each benchmark, as JSON so that runs can be compared over
+time. Analytics are timed with the result cache disabled, so the numbers
+are the cost of a cache miss.
+
+Usage:
+    python -m tests.benchmark_models                          # embedded SQLite, small dataset
+    python -m tests.benchmark_models --reservations 200000 --output bench.json
+    python -m tests.benchmark_models --compare bench.json     # show change against an earlier run
+    python -m tests.benchmark_models --mysql                  # the .env database (writes seed data!)
+
+Not collected by run_tests.py (the file name does not start with test_).
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.database import db
+from data.seed import Seeder, DEFAULT_PASSWORD
+from data.cache import analytics_cache
+from data.availability import availability_index
+from data.occupancy import occupancy_cube
+from data.models import UserModel, ReservationModel, NotificationModel
+from data.analytics import AnalyticsModel
+
+DATASET_DEFAULTS = {"rooms": 50, "users": 2000, "reservations": 50000, "years": 3}
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(round(fraction * len(sorted_values), 9)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def measure(function, make_args, iterations=200, seconds=2.0, warmup=3):
+    """
+    Call `function(*make_args())` repeatedly and summarize the latencies
+
+    Runs `warmup` untimed calls, then up to `iterations` timed calls or
+    until `seconds` have passed (at least 5 calls).
+
+    Returns:
+        dict: calls, ops_per_sec, mean_ms, p50_ms, p90_ms, p99_ms, max_ms,
+        queries_per_call
+    """
+    for _ in range(warmup):
+        function(*make_args())
+
+    db.stats.reset()
+    latencies = []
+    started = time.perf_counter()
+    while len(latencies) < iterations:
+        args = make_args()
+        call_started = time.perf_counter()
+        function(*args)
+        latencies.append((time.perf_counter() - call_started) * 1000)
+        if time.perf_counter() - started > seconds and len(latencies) >= 5:
+            break
+    total = sum(latencies)
+    queries = sum(row["calls"] for row in db.stats.snapshot())
+
+    latencies.sort()
+    return {
+        "calls": len(latencies),
+        "ops_per_sec": round(len(latencies) / (total / 1000), 1) if total else 0.0,
+        "mean_ms": round(total / len(latencies), 3),
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p90_ms": round(percentile(latencies, 0.90), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+        "max_ms": round(latencies[-1], 3),
+        "queries_per_call": round(queries / len(latencies), 2),
+    }
+
+
+class Workload:
+    """Random but reproducible arguments drawn from the seeded data"""
+
+    def __init__(self, seed=1):
+        self.rng = random.Random(seed)
+        db.connect()
+        try:
+            # Seeded users have a known password; fall back to any booker
+            self.users = db.fetch_all(
+                "SELECT id, email, id_number FROM users WHERE email LIKE %s AND role <> 'student'",
+                ("%@seed.eduroom.test",)
+            ) or db.fetch_all("SELECT id, email, id_number FROM users WHERE role <> 'student'")
+            self.rooms = [row["id"] for row in db.fetch_all("SELECT id FROM classrooms")]
+            span = db.fetch_one("SELECT MIN(reservation_date) AS first, MAX(reservation_date) AS last FROM reservations")
+        finally:
+            db.disconnect()
+        self.first_day = date.fromisoformat(str(span["first"])[:10])
+        self.days = (date.fromisoformat(str(span["last"])[:10]) - self.first_day).days + 1
+
+    def user(self):
+        return self.rng.choice(self.users)
+
+    def room(self):
+        return self.rng.choice(self.rooms)
+
+    def day(self):
+        return (self.first_day + timedelta(days=self.rng.randrange(self.days))).isoformat()
+
+    def slot(self):
+        start = self.rng.randrange(7, 19)
+        return f"{start:02d}:00", f"{start + self.rng.choice((1, 2)):02d}:00"
+
+
+def benchmarks(workload):
+    """name -> (function, argument factory, iteration cap)"""
+    def login():
+        user = workload.user()
+        return user["email"], user["id_number"], DEFAULT_PASSWORD
+
+    def availability():
+        return (workload.room(), workload.day()) + workload.slot()
+
+    def free_rooms():
+        return (workload.day(),) + workload.slot()
+
+    cases = {
+        # bcrypt dominates login, so fewer iterations
+        "UserModel.authenticate_with_email": (UserModel.authenticate_with_email, login, 20),
+        "ReservationModel.check_availability": (ReservationModel.check_availability, availability, 2000),
+        "ReservationModel.get_available_classrooms": (ReservationModel.get_available_classrooms, free_rooms, 500),
+        "ReservationModel.get_user_reservations": (
+            ReservationModel.get_user_reservations, lambda: (workload.user()["id"],), 500),
+        "ReservationModel.get_all_reservations": (ReservationModel.get_all_reservations, tuple, 20),
+        "NotificationModel.notify_new_reservation": (
+            NotificationModel.notify_new_reservation, lambda: (None, "Benchmark Room"), 200),
+    }
+    cases["OccupancyCube.rebuild"] = (rebuild_occupancy, tuple, 20)
+    for name in sorted(vars(AnalyticsModel)):
+        if name.startswith("get_"):
+            method = getattr(AnalyticsModel, name)
+            cases[f"AnalyticsModel.{name}"] = (getattr(method, "uncached", method), tuple, 50)
+    return cases
+
+
+def rebuild_occupancy():
+    """Full occupancy cube load, as after a restart or OCCUPANCY_TTL expiry"""
+    occupancy_cube.invalidate()
+    occupancy_cube.ensure_current()
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_benchmarks(dataset=None, iterations=None, seconds=2.0, only=None, seed=42, verbose=False):
+    """
+    Seed the current database and run every benchmark
+
+    Args:
+        dataset (dict): Seeder options (rooms, users, reservations, years, ...);
+            None skips seeding and uses the data already loaded
+        iterations (int): cap on timed calls per benchmark (default: per benchmark)
+        seconds (float): time budget per benchmark
+        only (str): run only benchmarks whose name contains this text
+
+    Returns:
+        dict: {"meta": {...}, "results": {name: measurement}}
+    """
+    seeded = {}
+    if dataset is not None:
+        started = time.perf_counter()
+        seeded = Seeder(seed=seed, **dataset).run()
+        seeded["seconds"] = round(time.perf_counter() - started, 1)
+        if verbose:
+            print(f"Seeded {seeded}")
+
+    was_enabled = analytics_cache.enabled
+    analytics_cache.enabled = False
+    availability_index.invalidate()
+    occupancy_cube.invalidate()
+    results = {}
+    try:
+        workload = Workload()
+        for name, (function, make_args, cap) in benchmarks(workload).items():
+            if only and only not in name:
+                continue
+            results[name] = measure(function, make_args, iterations or cap, seconds)
+            if verbose:
+                r = results[name]
+                print(f"{name:<48} {r['ops_per_sec']:>10,.1f} ops/s  p50 {r['p50_ms']:>9.3f} ms  "
+                      f"p99 {r['p99_ms']:>9.3f} ms  {r['queries_per_call']:>5} q/call")
+    finally:
+        analytics_cache.enabled = was_enabled
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "backend": db.backend.name,
+            "dataset": seeded,
+            "python": platform.python_version(),
+            "revision": git_revision(),
+        },
+        "results": results,
+    }
+
+
+def compare(report, baseline):
+    """Lines showing the change in ops/sec and p99 against a baseline report"""
+    lines = []
+    for name, result in report["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if not before or not before["ops_per_sec"]:
+            lines.append(f"{name:<48} (new)")
+            continue
+        speed = (result["ops_per_sec"] / before["ops_per_sec"] - 1) * 100
+        p99 = (result["p99_ms"] / before["p99_ms"] - 1) * 100 if before["p99_ms"] else 0.0
+        lines.append(f"{name:<48} ops/s {speed:+7.1f}%   p99 {p99:+7.1f}%")
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m tests.benchmark_models", description="Time the hot model calls")
+    for option, default in DATASET_DEFAULTS.items():
+        parser.add_argument(f"--{option}", type=type(default), default=default)
+    parser.add_argument("--no-seed", action="store_true", help="benchmark the data already in the database")
+    parser.add_argument("--iterations", type=int, default=None, help="cap on timed calls per benchmark")
+    parser.add_argument("--seconds", type=float, default=2.0, help="time budget per benchmark")
+    parser.add_argument("--only", help="run benchmarks whose name contains this text")
+    parser.add_argument("--sqlite", metavar="PATH", help="SQLite file to use (default: temporary)")
+    parser.add_argument("--mysql", action="store_true", help="use the MySQL database from .env")
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--compare", metavar="REPORT", help="earlier JSON report to compare against")
+    args = parser.parse_args(argv)
+
+    backend = None
+    if not args.mysql:
+        from data.backends import SQLiteBackend
+        from data.migrations import MigrationRunner
+
+        backend = SQLiteBackend(args.sqlite or ":memory:")
+        db.use_backend(backend)
+        connection = db.connect()
+        fresh = not backend.has_table(connection, "users")
+        db.disconnect()
+        if fresh:
+            db.load_schema()
+        MigrationRunner().migrate()
+
+    dataset = None if args.no_seed else {option: getattr(args, option) for option in DATASET_DEFAULTS}
+    try:
+        report = run_benchmarks(dataset, args.iterations, args.seconds, args.only, verbose=True)
+    finally:
+        if backend is not None:
+            backend.remove()
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+        print(f"Report written to {args.output}")
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare) as f:
+            print("\n".join(compare(report, json.load(f))))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+"""
+Shared Test Helpers
+===================
+Base test case that runs the model layer on the embedded SQLite backend
+"""
+
+import unittest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.database import db
+from data.backends import SQLiteBackend
+from data.availability import availability_index
+from data.cache import analytics_cache
+from data.occupancy import occupancy_cube
+from data.migrations import MigrationRunner
+
+
+class SQLiteTestCase(unittest.TestCase):
+    """
+    Test case with a fresh SQLite database loaded from eduroom_schema.sql.
+
+    The shared `db` singleton is pointed at the new database for the
+    duration of each test, so model classes can be called directly.
+    Pending migrations (triggers, rollup backfill) are applied unless
+    `migrate` is False.
+    """
+
+    migrate = True
+
+    def setUp(self):
+        self._previous_backend = db.backend
+        self.backend = SQLiteBackend()
+        db.use_backend(self.backend)
+        db.load_schema()
+        if self.migrate:
+            MigrationRunner().migrate()
+        db.stats.reset()
+        availability_index.invalidate()
+        occupancy_cube.invalidate()
+        analytics_cache.clear()
+
+    def tearDown(self):
+        db.use_backend(self._previous_backend)
+        availability_index.invalidate()
+        occupancy_cube.invalidate()
+        analytics_cache.wait(5)
+        analytics_cache.clear()
+        self.backend.remove()
@@ -0,0 +1,561 @@
+"""
+Concurrent Session Load Simulator for EduROOM
+=============================================
+Drives the real Flet views headlessly, one thread per simulated session
+
+Each session gets a FakePage (session, controls, overlay, update, open)
+and clicks through the views by firing the same on_click/on_change
+handlers a browser would, so every query, cache lookup and re-render the
+app performs is included.
+
+Flows:
+- Faculty: login -> dashboard -> availability filter -> reserve -> my reservations
+- Admin: login -> admin panel -> approve loop
+
+Reports per-view p50/p99 latency, database queries per action and
+throughput as JSON.
+
+Usage:
+    python -m tests.load_simulator                                  # embedded SQLite, 8 faculty + 2 admins
+    python -m tests.load_simulator --faculty 40 --admins 5 --duration 60 --output load.json
+    python -m tests.load_simulator --mysql --no-seed                # the .env database (creates reservations!)
+
+Not collected by run_tests.py (the file name does not start with test_).
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from contextlib import contextmanager
+from datetime import date, datetime, time as dt_time, timedelta
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.database import db
+from data.seed import Seeder, DEFAULT_PASSWORD
+from tests.benchmark_models import percentile, git_revision
+
+DATASET_DEFAULTS = {"rooms": 30, "users": 1000, "reservations": 10000, "years": 1}
+
+# Attributes that can hold child controls
+CHILD_ATTRIBUTES = ("content", "controls", "tabs", "actions", "leading", "title", "subtitle", "trailing")
+
+
+class SimulationError(Exception):
+    """A simulated user could not find the control they were looking for"""
+    pass
+
+
+# ---------- headless page ----------
+
+class FakeSession:
+    """Dict-backed stand-in for page.session"""
+
+    def __init__(self):
+        self._values = {}
+
+    def get(self, key):
+        return self._values.get(key)
+
+    def set(self, key, value):
+        self._values[key] = value
+
+    def contains_key(self, key):
+        return key in self._values
+
+    def remove(self, key):
+        self._values.pop(key, None)
+
+    def get_keys(self):
+        return list(self._values)
+
+    def clear(self):
+        self._values.clear()
+
+
+class FakePage:
+    """
+    Headless stand-in for ft.Page.
+
+    Keeps the control tree the views build and records what they ask the
+    client to do (updates and opened dialogs) instead of sending it.
+    """
+
+    def __init__(self):
+        self.session = FakeSession()
+        self.controls = []
+        self.overlay = []
+        self.opened = []        # dialogs, pickers and snack bars, most recent last
+        self.updates = 0
+        self.title = None
+        self.theme_mode = "light"
+        self.window = type("Window", (), {})()
+
+    def add(self, *controls):
+        self.controls.extend(controls)
+        self.updates += 1
+
+    def update(self, *controls):
+        self.updates += 1
+
+    def open(self, control):
+        self.opened.append(control)
+        if control not in self.overlay:
+            self.overlay.append(control)
+        self.updates += 1
+
+    def close(self, control):
+        if control in self.overlay:
+            self.overlay.remove(control)
+        self.updates += 1
+
+
+class FakeEvent:
+    """The parts of ft.ControlEvent the handlers read"""
+
+    def __init__(self, control, page, data=None):
+        self.control = control
+        self.page = page
+        self.data = data
+
+
+# ---------- finding and using controls ----------
+
+def walk(controls):
+    """Yield every control in the trees below `controls`, parents first"""
+    seen = set()
+    stack = list(reversed(controls))
+    while stack:
+        control = stack.pop()
+        if control is None or id(control) in seen:
+            continue
+        seen.add(id(control))
+        yield control
+        children = []
+        for name in CHILD_ATTRIBUTES:
+            try:
+                child = getattr(control, name, None)
+            except Exception:
+                continue
+            if isinstance(child, (list, tuple)):
+                children.extend(child)
+            elif child is not None and not isinstance(child, (str, int, float)):
+                children.append(child)
+        stack.extend(reversed(children))
+
+
+def caption(control):
+    """The text a user sees on a button-like control, or None"""
+    text = getattr(control, "text", None)
+    if isinstance(text, str):
+        return text
+    content = getattr(control, "content", None)
+    for candidate in [content] + list(getattr(content, "controls", None) or []):
+        value = getattr(candidate, "value", None)
+        if isinstance(value, str) and type(candidate).__name__ == "Text":
+            return value
+    return None
+
+
+def find_all(page, text):
+    """Clickable controls whose caption is `text`"""
+    return [
+        control for control in walk(page.controls + page.overlay)
+        if getattr(control, "on_click", None) and caption(control) == text
+    ]
+
+
+def find(page, text):
+    matches = find_all(page, text)
+    if not matches:
+        raise SimulationError(f"No '{text}' control on the page")
+    return matches[0]
+
+
+def field(page, label):
+    """The input control labelled `label`"""
+    for control in walk(page.controls + page.overlay):
+        if getattr(control, "label", None) == label and hasattr(control, "on_change"):
+            return control
+    raise SimulationError(f"No '{label}' field on the page")
+
+
+def click(page, control):
+    """Fire a control's on_click handler (a control or its caption)"""
+    if isinstance(control, str):
+        control = find(page, control)
+    if getattr(control, "disabled", False):
+        raise SimulationError(f"'{caption(control)}' is disabled")
+    control.on_click(FakeEvent(control, page))
+
+
+def type_into(page, label, value):
+    """Set a field's value and fire its on_change handler"""
+    control = field(page, label)
+    control.value = value
+    if control.on_change:
+        control.on_change(FakeEvent(control, page, value))
+
+
+def pick(page, value):
+    """Choose `value` in the most recently opened date or time picker"""
+    for control in reversed(page.opened):
+        if getattr(control, "on_change", None):
+            control.value = value
+            control.on_change(FakeEvent(control, page, value))
+            return
+    raise SimulationError("No picker is open")
+
+
+def choose_slot(page, day, start, end):
+    """Fill the Select Date / Start Time / End Time buttons of the current view"""
+    click(page, "Select Date")
+    pick(page, datetime.combine(day, dt_time()))
+    click(page, "Start Time")
+    pick(page, start)
+    click(page, "End Time")
+    pick(page, end)
+
+
+# ---------- measurements ----------
+
+class QueryCounter:
+    """Wraps db.stats to count the queries run by each thread"""
+
+    def __init__(self, stats):
+        self.stats = stats
+        self._local = threading.local()
+
+    def record(self, *args, **kwargs):
+        self._local.count = self.count() + 1
+        return self.stats.record(*args, **kwargs)
+
+    def count(self):
+        return getattr(self._local, "count", 0)
+
+    def __getattr__(self, name):
+        return getattr(self.stats, name)
+
+
+class Recorder:
+    """Thread-safe collector of per-action latencies and outcomes"""
+
+    def __init__(self, queries):
+        self.queries = queries
+        self.samples = {}       # action -> [(ms, queries)]
+        self.errors = Counter()
+        self.outcomes = Counter()
+        self.messages = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def action(self, name):
+        queries = self.queries.count()
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            with self._lock:
+                self.errors[name] += 1
+            self.note(f"{name}: {type(e).__name__}: {e}")
+            raise
+        elapsed = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self.samples.setdefault(name, []).append((elapsed, self.queries.count() - queries))
+
+    def outcome(self, name):
+        with self._lock:
+            self.outcomes[name] += 1
+
+    def note(self, message, limit=10):
+        """Keep the first `limit` error messages for the report"""
+        with self._lock:
+            if len(self.messages) < limit:
+                self.messages.append(message)
+
+    def summary(self):
+        """action -> calls, errors, mean/p50/p99/max latency and queries per call"""
+        views = {}
+        for name in sorted(set(self.samples) | set(self.errors)):
+            samples = self.samples.get(name, [])
+            latencies = sorted(ms for ms, _ in samples)
+            calls = len(latencies)
+            views[name] = {
+                "calls": calls,
+                "errors": self.errors[name],
+                "mean_ms": round(sum(latencies) / calls, 3) if calls else 0.0,
+                "p50_ms": round(percentile(latencies, 0.50), 3),
+                "p99_ms": round(percentile(latencies, 0.99), 3),
+                "max_ms": round(latencies[-1], 3) if calls else 0.0,
+                "queries_per_call": round(sum(q for _, q in samples) / calls, 2) if calls else 0.0,
+            }
+        return views
+
+
+# ---------- simulated users ----------
+
+class SimulatedSession:
+    """One browser session driven by a simulated faculty member or admin"""
+
+    def __init__(self, account, recorder, rng, think=0.0, approvals=3):
+        self.account = account
+        self.recorder = recorder
+        self.rng = rng
+        self.think = think
+        self.approvals = approvals
+
+    def pause(self):
+        if self.think:
+            time.sleep(self.rng.uniform(0, 2 * self.think))
+
+    def login(self):
+        """Open the login view on a fresh page and sign in"""
+        from views.login_view import show_login
+
+        page = FakePage()
+        with self.recorder.action("login.render"):
+            show_login(page)
+        self.pause()
+        type_into(page, "CSPC Email", self.account["email"])
+        type_into(page, "ID Number", self.account["id_number"])
+        type_into(page, "Password", DEFAULT_PASSWORD)
+        with self.recorder.action("login.submit"):
+            click(page, "Login")
+        if not page.session.get("user_id"):
+            raise SimulationError(f"Login failed for {self.account['email']}")
+        self.pause()
+        return page
+
+    def faculty_flow(self):
+        """login -> dashboard -> availability filter -> reserve -> my reservations"""
+        page = self.login()
+
+        day = date.today() + timedelta(days=self.rng.randint(1, 30))
+        start_hour = self.rng.randrange(7, 19)
+        start, end = dt_time(start_hour), dt_time(start_hour + self.rng.choice((1, 2)))
+        with self.recorder.action("dashboard.filter"):
+            choose_slot(page, day, start, end)
+            click(page, "Apply")
+        self.pause()
+
+        rooms = [control for control in find_all(page, "Reserve") if not getattr(control, "disabled", False)]
+        if not rooms:
+            self.recorder.outcome("no_free_room")
+        else:
+            with self.recorder.action("reservation.open"):
+                click(page, self.rng.choice(rooms))
+            self.pause()
+            with self.recorder.action("reservation.submit"):
+                type_into(page, "Purpose", "Load simulation")
+                choose_slot(page, day, start, end)
+                submit = find(page, "Submit Reservation")
+                if getattr(submit, "disabled", False):
+                    self.recorder.outcome("slot_taken")
+                else:
+                    click(page, submit)
+                    self.recorder.outcome("reserved")
+            self.pause()
+
+        with self.recorder.action("my_reservations.render"):
+            click(page, "Reservations")
+
+    def admin_flow(self):
+        """login -> admin panel -> approve up to `approvals` pending requests"""
+        page = self.login()
+        with self.recorder.action("admin.render"):
+            click(page, "Reservations")
+        self.pause()
+
+        for _ in range(self.approvals):
+            pending = find_all(page, "Approve")
+            if not pending:
+                self.recorder.outcome("nothing_pending")
+                break
+            with self.recorder.action("admin.approve"):
+                click(page, self.rng.choice(pending))
+            self.recorder.outcome("approved")
+            self.pause()
+
+    def run(self, deadline, flows=None):
+        """Repeat the account's flow until `deadline` or `flows` completed flows"""
+        flow = self.admin_flow if self.account["role"] == "admin" else self.faculty_flow
+        completed = 0
+        while time.perf_counter() < deadline and (flows is None or completed < flows):
+            try:
+                flow()
+                self.recorder.outcome(f"{self.account['role']}_flow")
+            except Exception:
+                self.recorder.outcome("failed_flow")
+                self.recorder.note(traceback.format_exc(limit=3))
+            completed += 1
+
+
+def load_accounts():
+    """Seeded faculty and admin accounts (they share DEFAULT_PASSWORD)"""
+    db.connect()
+    try:
+        rows = db.fetch_all(
+            "SELECT email, id_number, role FROM users WHERE email LIKE %s AND role IN ('faculty', 'admin')",
+            ("%@seed.eduroom.test",)
+        ) or []
+    finally:
+        db.disconnect()
+    accounts = {"faculty": [], "admin": []}
+    for row in rows:
+        accounts[row["role"]].append(row)
+    return accounts
+
+
+def run_simulation(faculty=8, admins=2, duration=30.0, flows=None, approvals=3, think=0.0,
+                   dataset=None, seed=42, realtime=False, verbose=False):
+    """
+    Run `faculty` + `admins` concurrent sessions against the current database
+
+    Args:
+        duration (float): seconds to keep starting new flows
+        flows (int): stop each session after this many flows (default: until duration)
+        approvals (int): approvals per admin flow
+        think (float): mean pause in seconds between user actions
+        dataset (dict): Seeder options; None uses the data already loaded
+        realtime (bool): let the views connect to the WebSocket server
+
+    Returns:
+        dict: {"meta", "throughput", "views", "outcomes", "errors"}
+    """
+    import views.admin_view as admin_view
+    import views.my_reservations_view as my_reservations_view
+
+    seeded = {}
+    if dataset is not None:
+        seeded = Seeder(seed=seed, **dataset).run()
+        if verbose:
+            print(f"Seeded {seeded}")
+
+    accounts = load_accounts()
+    if (faculty and not accounts["faculty"]) or (admins and not accounts["admin"]):
+        raise SimulationError("No seeded faculty/admin accounts; run without --no-seed or seed first (data/seed.py)")
+
+    rng = random.Random(seed)
+    sessions = []
+    for role, count in (("faculty", faculty), ("admin", admins)):
+        for _ in range(count):
+            sessions.append((rng.choice(accounts[role]), random.Random(rng.random())))
+
+    realtime_flags = (admin_view.REALTIME_ENABLED, my_reservations_view.REALTIME_ENABLED)
+    admin_view.REALTIME_ENABLED = realtime and realtime_flags[0]
+    my_reservations_view.REALTIME_ENABLED = realtime and realtime_flags[1]
+    queries = QueryCounter(db.stats)
+    db.stats = queries
+    recorder = Recorder(queries)
+    try:
+        started = time.perf_counter()
+        deadline = started + duration
+        threads = [
+            threading.Thread(
+                target=SimulatedSession(account, recorder, session_rng, think, approvals).run,
+                args=(deadline, flows), daemon=True,
+            )
+            for account, session_rng in sessions
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        db.stats = queries.stats
+        admin_view.REALTIME_ENABLED, my_reservations_view.REALTIME_ENABLED = realtime_flags
+
+    views = recorder.summary()
+    completed = recorder.outcomes["faculty_flow"] + recorder.outcomes["admin_flow"]
+    actions = sum(view["calls"] for view in views.values())
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "backend": db.backend.name,
+            "dataset": seeded,
+            "sessions": {"faculty": faculty, "admin": admins},
+            "think_seconds": think,
+            "seconds": round(elapsed, 2),
+            "python": platform.python_version(),
+            "revision": git_revision(),
+        },
+        "throughput": {
+            "flows": completed,
+            "flows_per_sec": round(completed / elapsed, 2) if elapsed else 0.0,
+            "actions_per_sec": round(actions / elapsed, 2) if elapsed else 0.0,
+        },
+        "views": views,
+        "outcomes": dict(recorder.outcomes),
+        "errors": recorder.messages,
+    }
+    if verbose:
+        for name, view in views.items():
+            print(f"{name:<26} {view['calls']:>6} calls  p50 {view['p50_ms']:>9.3f} ms  "
+                  f"p99 {view['p99_ms']:>9.3f} ms  {view['queries_per_call']:>6} q/call  {view['errors']} errors")
+        print(f"{completed} flows in {elapsed:.1f}s ({report['throughput']['flows_per_sec']} flows/s)")
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m tests.load_simulator",
+                                     description="Drive concurrent headless sessions through the views")
+    for option, default in DATASET_DEFAULTS.items():
+        parser.add_argument(f"--{option}", type=type(default), default=default)
+    parser.add_argument("--no-seed", action="store_true", help="use the data already in the database")
+    parser.add_argument("--faculty", type=int, default=8, help="concurrent faculty sessions")
+    parser.add_argument("--admins", type=int, default=2, help="concurrent admin sessions")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to run")
+    parser.add_argument("--flows", type=int, default=None, help="stop each session after this many flows")
+    parser.add_argument("--approvals", type=int, default=3, help="approvals per admin flow")
+    parser.add_argument("--think", type=float, default=0.0, help="mean pause between actions (seconds)")
+    parser.add_argument("--realtime", action="store_true", help="connect the views to the WebSocket server")
+    parser.add_argument("--sqlite", metavar="PATH", help="SQLite file to use (default: temporary)")
+    parser.add_argument("--mysql", action="store_true", help="use the MySQL database from .env")
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    args = parser.parse_args(argv)
+
+    backend = None
+    if not args.mysql:
+        from data.backends import SQLiteBackend
+        from data.migrations import MigrationRunner
+
+        backend = SQLiteBackend(args.sqlite or ":memory:")
+        db.use_backend(backend)
+        connection = db.connect()
+        fresh = not backend.has_table(connection, "users")
+        db.disconnect()
+        if fresh:
+            db.load_schema()
+        MigrationRunner().migrate()
+
+    dataset = None if args.no_seed else {option: getattr(args, option) for option in DATASET_DEFAULTS}
+    try:
+        report = run_simulation(
+            args.faculty, args.admins, args.duration, args.flows, args.approvals, args.think,
+            dataset=dataset, realtime=args.realtime, verbose=True,
+        )
+    finally:
+        if backend is not None:
+            backend.remove()
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+        print(f"Report written to {args.output}")
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
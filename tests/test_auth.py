@@ -1,7 +1,7 @@
 """
 Unit Tests for Authentication Module
 =====================================
-Tests password hashing and verification functions
+Tests password hashing and verification functions, and realtime tokens
 """
 
 import unittest
@@ -11,7 +11,10 @@ import os
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from unittest import mock
+
 from utils.auth import hash_password, verify_password
+from utils.security import create_realtime_token, verify_realtime_token
 
 
 class TestPasswordHashing(unittest.TestCase):
@@ -104,5 +107,40 @@ class TestEdgeCases(unittest.TestCase):
         self.assertFalse(verify_password("spaces", hashed))
 
 
+@mock.patch.dict(os.environ, {"REALTIME_SECRET": "test-secret"})
+class TestRealtimeTokens(unittest.TestCase):
+    """Test cases for the signed websocket handshake tokens"""
+    
+    def test_round_trip(self):
+        """Test that a fresh token yields its user id and role"""
+        token = create_realtime_token(7, "faculty")
+        self.assertEqual(verify_realtime_token(token), (7, "faculty"))
+    
+    def test_tampered_token_rejected(self):
+        """Test that changing the claims invalidates the signature"""
+        token = create_realtime_token(7, "faculty")
+        forged = create_realtime_token(7, "admin").split(".")[0] + "." + token.split(".")[1]
+        self.assertIsNone(verify_realtime_token(forged))
+        self.assertIsNone(verify_realtime_token("not-a-token"))
+    
+    def test_expired_token_rejected(self):
+        """Test that tokens past their expiry are refused"""
+        self.assertIsNone(verify_realtime_token(create_realtime_token(7, "faculty", ttl=-1)))
+    
+    def test_other_secret_rejected(self):
+        """Test that a token signed with another secret is refused"""
+        token = create_realtime_token(7, "faculty")
+        with mock.patch.dict(os.environ, {"REALTIME_SECRET": "other-secret"}):
+            self.assertIsNone(verify_realtime_token(token))
+    
+    def test_missing_secret_raises(self):
+        """Test that tokens are never silently skipped without a secret"""
+        with mock.patch.dict(os.environ, {"REALTIME_SECRET": ""}):
+            with self.assertRaises(RuntimeError):
+                create_realtime_token(7, "faculty")
+            with self.assertRaises(RuntimeError):
+                verify_realtime_token("payload.signature")
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
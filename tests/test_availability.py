@@ -0,0 +1,307 @@
+"""
+Unit Tests for the Availability Index
+=====================================
+Tests interval overlap queries, lazy loading and write-path maintenance
+"""
+
+import unittest
+from unittest import mock
+import sys
+import os
+from datetime import date, datetime, timedelta
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.availability import AvailabilityIndex, availability_index, to_minutes, slot_mask, slot_runs
+from data.database import db
+from data.models import ReservationModel
+from tests.helpers import SQLiteTestCase
+
+FUTURE = (date.today() + timedelta(days=30)).isoformat()
+
+
+def row(reservation_id, classroom_id, start, end, day="2025-12-09"):
+    return {
+        "id": reservation_id, "classroom_id": classroom_id, "reservation_date": day,
+        "start_time": start, "end_time": end, "purpose": "Class", "status": "approved",
+    }
+
+
+class TestAvailabilityIndex(unittest.TestCase):
+    """Test cases for AvailabilityIndex with an in-memory loader"""
+
+    def setUp(self):
+        self.rows = [
+            row(1, 1, timedelta(hours=8), timedelta(hours=10)),
+            row(2, 1, "13:00:00", "15:00:00"),
+            row(3, 2, "07:00", "18:00"),
+        ]
+        self.loads = []
+
+        def loader(date_keys):
+            self.loads.append(list(date_keys))
+            return [r for r in self.rows if r["reservation_date"] in date_keys]
+
+        self.index = AvailabilityIndex(ttl=60, loader=loader)
+
+    def test_to_minutes(self):
+        """Test TIME value conversion"""
+        self.assertEqual(to_minutes(timedelta(hours=9, minutes=30)), 570)
+        self.assertEqual(to_minutes("9:30"), 570)
+        self.assertEqual(to_minutes("09:30:00"), 570)
+
+    def test_overlap_and_touching_edges(self):
+        """Test that overlapping ranges conflict and touching ranges do not"""
+        self.assertFalse(self.index.is_available(1, "2025-12-09", "09:00", "11:00"))
+        self.assertFalse(self.index.is_available(1, "2025-12-09", "07:00", "16:00"))
+        self.assertTrue(self.index.is_available(1, "2025-12-09", "10:00", "13:00"))
+        self.assertTrue(self.index.is_available(1, "2025-12-09", "07:00", "08:00"))
+
+    def test_long_interval_found_behind_short_ones(self):
+        """Test that an early long reservation is found past later short ones"""
+        self.index.ensure_loaded(["2025-12-09"])
+        self.index.add(row(4, 2, "08:00", "08:30"))
+        self.index.add(row(5, 2, "16:00", "16:30"))
+        conflicts = self.index.conflicts(2, "2025-12-09", "17:00", "17:30")
+        self.assertEqual([c["id"] for c in conflicts], [3])
+
+    def test_exclude_reservation(self):
+        """Test that a reservation does not conflict with itself"""
+        self.assertTrue(self.index.is_available(1, "2025-12-09", "08:30", "09:30", exclude_reservation_id=1))
+
+    def test_busy_classrooms(self):
+        """Test the set of rooms taken during a range"""
+        self.assertEqual(self.index.busy_classrooms("2025-12-09", "09:00", "09:30"), {1, 2})
+        self.assertEqual(self.index.busy_classrooms("2025-12-09", "11:00", "12:00"), {2})
+
+    def test_loads_each_date_once(self):
+        """Test that a date is loaded once and then served from memory"""
+        for _ in range(5):
+            self.index.is_available(1, "2025-12-09", "09:00", "10:00")
+        self.index.busy_classrooms("2025-12-09", "09:00", "10:00")
+        self.assertEqual(self.loads, [["2025-12-09"]])
+
+    def test_expired_date_reloads(self):
+        """Test that dates older than the TTL are reloaded"""
+        self.index.ttl = 0
+        self.index.is_available(1, "2025-12-09", "09:00", "10:00")
+        self.index.is_available(1, "2025-12-09", "09:00", "10:00")
+        self.assertEqual(len(self.loads), 2)
+
+    def test_add_and_remove(self):
+        """Test that maintenance calls update loaded dates"""
+        self.assertTrue(self.index.is_available(1, "2025-12-09", "11:00", "12:00"))
+        self.index.add(row(6, 1, "11:00", "12:00"))
+        self.assertFalse(self.index.is_available(1, "2025-12-09", "11:30", "12:30"))
+        self.index.remove(6)
+        self.assertTrue(self.index.is_available(1, "2025-12-09", "11:30", "12:30"))
+
+    def test_remove_during_load(self):
+        """Test that a row removed while its date is loading is not indexed"""
+        def loader(date_keys):
+            rows = [r for r in self.rows if r["reservation_date"] in date_keys]
+            self.index.remove(2)  # cancelled after the SELECT read it
+            self.rows = [r for r in self.rows if r["id"] != 2]
+            return rows
+
+        self.index._loader = loader
+        self.index.ensure_loaded(["2025-12-09"])
+        self.assertTrue(self.index.is_available(1, "2025-12-09", "13:00", "14:00"))
+        self.assertEqual(self.index._loading, {})
+
+    def test_failed_load_retried(self):
+        """Test that a failed load caches nothing and is retried on next use"""
+        self.index._loader = lambda keys: self.loads.append(list(keys))  # returns None
+        self.assertTrue(self.index.is_available(1, "2025-12-09", "09:00", "10:00"))
+        self.index.is_available(1, "2025-12-09", "09:00", "10:00")
+        self.assertEqual(len(self.loads), 2)
+        self.assertEqual(self.index._days, {})
+
+    def test_add_to_unloaded_date_ignored(self):
+        """Test that adds for dates not yet loaded are left to the loader"""
+        self.index.add(row(8, 1, "11:00", "12:00", day="2025-12-10"))
+        self.assertTrue(self.index.is_available(1, "2025-12-10", "11:00", "12:00"))
+
+    def test_reservations_sorted(self):
+        """Test that reservations for a room come back in start-time order"""
+        self.index.ensure_loaded(["2025-12-09"])
+        self.index.add(row(7, 1, "11:00", "12:00"))
+        ids = [r["id"] for r in self.index.reservations_for(1, "2025-12-09")]
+        self.assertEqual(ids, [1, 7, 2])
+
+
+class TestSlotGrid(unittest.TestCase):
+    """Test cases for the 5-minute slot bitsets"""
+
+    def setUp(self):
+        rows = [
+            row(1, 1, "08:00", "10:00"),
+            row(2, 1, "10:30", "11:00"),
+            row(3, 2, "09:02", "09:58"),   # not on slot boundaries
+        ]
+        self.index = AvailabilityIndex(ttl=60, loader=lambda keys: rows)
+
+    def test_slot_mask(self):
+        """Test that partially covered slots are included"""
+        self.assertEqual(slot_mask(0, 10), 0b11)
+        self.assertEqual(slot_mask(5, 6), 0b10)
+        self.assertEqual(slot_mask(7, 7), 0)
+
+    def test_slot_runs(self):
+        """Test splitting a bitset into minute ranges"""
+        self.assertEqual(slot_runs(0b1101100), [(10, 20), (25, 35)])
+        self.assertEqual(slot_runs(0), [])
+
+    def test_grid_filter_matches_exact_check(self):
+        """Test that grid answers agree with interval checks, including unaligned edges"""
+        for start, end in [("09:00", "09:05"), ("09:58", "10:00"), ("09:55", "10:05"),
+                           ("10:00", "10:30"), ("09:59", "10:31"), ("07:00", "08:00")]:
+            expected = {
+                room for room in (1, 2)
+                if not self.index.is_available(room, "2025-12-09", start, end)
+            }
+            self.assertEqual(self.index.busy_classrooms("2025-12-09", start, end), expected, (start, end))
+
+    def test_grid_and_runs(self):
+        """Test the per-room grid and merged busy periods"""
+        grid = self.index.slot_grid("2025-12-09")
+        self.assertEqual(set(grid), {1, 2})
+        self.assertEqual(self.index.occupied_runs(1, "2025-12-09"), [(480, 600), (630, 660)])
+        self.assertEqual(self.index.occupied_runs(2, "2025-12-09"), [(540, 600)])
+
+    def test_remove_clears_bits(self):
+        """Test that removing a reservation clears its slots"""
+        self.index.ensure_loaded(["2025-12-09"])
+        self.index.remove(2)
+        self.assertEqual(self.index.occupied_runs(1, "2025-12-09"), [(480, 600)])
+
+
+class TestFreeWindows(unittest.TestCase):
+    """Test cases for the free-window sweep"""
+
+    def setUp(self):
+        rows = [
+            row(1, 1, "08:00", "10:00"),
+            row(2, 1, "09:30", "11:00"),   # overlaps the first one
+            row(3, 1, "12:00", "21:00"),
+            row(4, 2, "07:00", "20:00"),
+        ]
+        self.index = AvailabilityIndex(ttl=60, loader=lambda keys: [r for r in rows if r["reservation_date"] in keys])
+
+    def test_gaps_between_merged_intervals(self):
+        """Test that windows come from gaps between merged reservations"""
+        windows = self.index.free_windows(["2025-12-09"], [1], 60, 420, 1260, limit=10)
+        self.assertEqual(windows, [("2025-12-09", 420, 480, 1), ("2025-12-09", 660, 720, 1)])
+
+    def test_earliest_across_rooms_and_dates(self):
+        """Test ordering across rooms and spilling into the next date"""
+        windows = self.index.free_windows(["2025-12-09", "2025-12-10"], [1, 2], 90, 420, 1260, limit=3)
+        self.assertEqual(windows, [("2025-12-10", 420, 510, 1), ("2025-12-10", 420, 510, 2)])
+
+    def test_step_alignment_and_cutoff(self):
+        """Test step rounding and the not_before cutoff"""
+        windows = self.index.free_windows(
+            ["2025-12-09"], [1], 30, 420, 1260, step=15,
+            not_before=datetime(2025, 12, 9, 7, 5),
+        )
+        self.assertEqual(windows[0], ("2025-12-09", 435, 465, 1))
+
+
+class TestAvailabilityIntegration(SQLiteTestCase):
+    """Test cases for ReservationModel keeping the index current"""
+
+    def test_approve_blocks_slot_without_reload(self):
+        """Test that approving a reservation updates the index in place"""
+        reservation_id = ReservationModel.create_reservation(1, 2, FUTURE, "09:00", "10:00", "Lab")
+        self.assertTrue(ReservationModel.check_availability(1, FUTURE, "09:00", "10:00"))
+
+        ReservationModel.approve_reservation(reservation_id)
+        db.stats.reset()
+        self.assertFalse(ReservationModel.check_availability(1, FUTURE, "09:30", "10:30"))
+        self.assertEqual(db.stats.snapshot(), [])
+
+    def test_failed_load_not_cached(self):
+        """Test that a query error leaves the date unloaded instead of empty"""
+        reservation_id = ReservationModel.create_reservation(1, 2, FUTURE, "09:00", "10:00", "Lab")
+        ReservationModel.approve_reservation(reservation_id)
+        availability_index.invalidate()
+
+        translate = db.backend.translate
+        with mock.patch.object(db.backend, "translate", lambda query: (
+            "SELECT * FROM missing_table" if "FROM reservations" in query else translate(query)
+        )):
+            availability_index.ensure_loaded([FUTURE])
+        self.assertNotIn(FUTURE, availability_index._days)
+        self.assertFalse(ReservationModel.check_availability(1, FUTURE, "09:30", "10:30"))
+
+    def test_cancel_frees_slot(self):
+        """Test that cancelling a reservation frees its slot"""
+        reservation_id = ReservationModel.create_reservation(1, 2, FUTURE, "09:00", "10:00", "Lab")
+        ReservationModel.approve_reservation(reservation_id)
+        ReservationModel.cancel_reservation(reservation_id)
+        self.assertTrue(ReservationModel.check_availability(1, FUTURE, "09:00", "10:00"))
+
+    def test_update_returns_to_pending(self):
+        """Test that editing an approved reservation frees its slot until re-approved"""
+        reservation_id = ReservationModel.create_reservation(1, 2, FUTURE, "09:00", "10:00", "Lab")
+        ReservationModel.approve_reservation(reservation_id)
+        ReservationModel.update_reservation(reservation_id, FUTURE, "13:00", "14:00", "Lab")
+        self.assertTrue(ReservationModel.check_availability(1, FUTURE, "09:00", "10:00"))
+        self.assertTrue(ReservationModel.check_availability(1, FUTURE, "13:00", "14:00"))
+
+    def test_check_availability_many(self):
+        """Test batch checks with one load for several dates"""
+        db.stats.reset()
+        results = ReservationModel.check_availability_many([
+            (1, "2025-12-09", "09:00", "11:00"),
+            (1, "2025-12-09", "10:00", "10:30"),
+            {"classroom_id": 1, "reservation_date": FUTURE, "start_time": "09:00", "end_time": "10:00"},
+        ])
+        self.assertEqual([r["available"] for r in results], [False, True, True])
+        self.assertEqual(str(results[0]["conflicts"][0]["start_time"]), "8:00:00")
+        loads = [q for q in db.stats.snapshot() if "FROM reservations" in q["query"]]
+        self.assertEqual(sum(q["calls"] for q in loads), 1)
+
+    def test_check_availability_many_within_batch(self):
+        """Test that overlapping requests in the same batch are flagged"""
+        requests = [
+            (2, FUTURE, "09:00", "10:00"),
+            (2, FUTURE, "09:30", "10:30"),
+            (3, FUTURE, "09:30", "10:30"),
+        ]
+        self.assertTrue(all(r["available"] for r in ReservationModel.check_availability_many(requests)))
+        results = ReservationModel.check_availability_many(requests, check_batch=True)
+        self.assertEqual([r["available"] for r in results], [True, False, True])
+        self.assertEqual(results[1]["batch_conflicts"], [0])
+
+    def test_find_free_slots(self):
+        """Test free-slot suggestions filtered by capacity"""
+        # Lecture Room 1 (50) is busy 09-11 and 14-16, Lecture Room 2 (45) 10-12 and 15-17
+        slots = ReservationModel.find_free_slots(120, ("2025-12-09", "2025-12-09"), min_capacity=45, limit=3)
+        self.assertEqual(
+            [(s["room_name"], s["start_time"], s["end_time"]) for s in slots],
+            [("Lecture Room 1", "07:00", "09:00"), ("Lecture Room 2", "07:00", "09:00"),
+             ("Lecture Room 1", "11:00", "13:00")],
+        )
+
+    def test_find_free_slots_single_room(self):
+        """Test suggestions for one room skip gaps that are too short"""
+        slots = ReservationModel.find_free_slots(
+            timedelta(hours=1), ("2025-12-09", "2025-12-10"), classroom_ids=[1], limit=4
+        )
+        self.assertEqual(
+            [(s["reservation_date"], s["start_time"]) for s in slots],
+            [("2025-12-09", "07:00"), ("2025-12-09", "12:30"), ("2025-12-09", "16:00"), ("2025-12-10", "07:00")],
+        )
+
+    def test_occupied_slots(self):
+        """Test occupied slots served from the index"""
+        slots = ReservationModel.get_occupied_slots(1, "2025-12-09")
+        self.assertTrue(slots)
+        self.assertEqual(set(slots[0]), {"start_time", "end_time", "purpose", "status"})
+        self.assertEqual(slots[0]["start_time"], timedelta(hours=8))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+"""
+Unit Tests for the Model Benchmarks
+===================================
+Runs the benchmark suite on a tiny dataset and checks the report format
+"""
+
+import json
+import unittest
+
+from tests.helpers import SQLiteTestCase
+from tests.benchmark_models import run_benchmarks, percentile, compare
+
+
+class TestBenchmarkHelpers(unittest.TestCase):
+    """Test cases for the latency helpers"""
+
+    def test_percentile(self):
+        """Test nearest-rank percentiles"""
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.50), 50)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertEqual(percentile([7], 0.99), 7)
+        self.assertEqual(percentile([], 0.5), 0.0)
+
+    def test_compare(self):
+        """Test the change report against a baseline"""
+        baseline = {"results": {"a": {"ops_per_sec": 100.0, "p99_ms": 2.0}}}
+        report = {"results": {"a": {"ops_per_sec": 150.0, "p99_ms": 1.0}, "b": {"ops_per_sec": 1.0, "p99_ms": 1.0}}}
+        lines = compare(report, baseline)
+        self.assertIn("+50.0%", lines[0])
+        self.assertIn("-50.0%", lines[0])
+        self.assertIn("(new)", lines[1])
+
+
+class TestRunBenchmarks(SQLiteTestCase):
+    """Test cases for a full (tiny) benchmark run"""
+
+    def test_report(self):
+        """Test that a run seeds data and reports every analytics method as JSON"""
+        dataset = {"rooms": 4, "users": 20, "reservations": 200, "years": 1}
+        report = run_benchmarks(dataset, iterations=2, seconds=0.1, only="Model.get_")
+        json.dumps(report)
+
+        self.assertEqual(report["meta"]["backend"], "sqlite")
+        self.assertEqual(report["meta"]["dataset"]["reservations"], 200)
+        results = report["results"]
+        self.assertIn("AnalyticsModel.get_dashboard_snapshot", results)
+        self.assertIn("ReservationModel.get_user_reservations", results)
+        self.assertNotIn("UserModel.authenticate_with_email", results)
+        for result in results.values():
+            self.assertEqual(result["calls"], 2)
+            self.assertLessEqual(result["p50_ms"], result["max_ms"])
+            self.assertGreater(result["ops_per_sec"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,195 @@
+"""
+Unit Tests for the Stale-While-Revalidate Cache
+===============================================
+Tests freshness, background refresh, single flight and invalidation of
+data/cache.py, and that model writes invalidate cached analytics
+"""
+
+import threading
+import unittest
+from datetime import date, timedelta
+
+from tests.helpers import SQLiteTestCase
+from data.database import db
+from data.cache import SWRCache, cached, analytics_cache
+from data.models import ReservationModel
+from data.analytics import AnalyticsModel
+
+FUTURE = (date.today() + timedelta(days=30)).isoformat()
+
+
+class FakeClock:
+    """Manually advanced clock"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class Counter:
+    """Callable returning how many times it has been called"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.calls
+
+
+class TestSWRCache(unittest.TestCase):
+    """Test cases for SWRCache"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = SWRCache(max_stale=60, enabled=True, clock=self.clock)
+
+    def tearDown(self):
+        self.cache.wait(5)
+
+    def test_fresh_hit(self):
+        """Test that a fresh entry is served without recomputing"""
+        compute = Counter()
+        self.assertEqual(self.cache.get("k", compute, ttl=10), 1)
+        self.clock.advance(5)
+        self.assertEqual(self.cache.get("k", compute, ttl=10), 1)
+        self.assertEqual(compute.calls, 1)
+        self.assertEqual(self.cache.stats["hits"], 1)
+
+    def test_stale_served_while_refreshing(self):
+        """Test that an expired entry is returned at once and refreshed once"""
+        compute = Counter()
+        self.cache.get("k", compute, ttl=10)
+        self.clock.advance(15)
+
+        self.assertEqual(self.cache.get("k", compute, ttl=10), 1)
+        self.cache.wait(5)
+        self.assertEqual(compute.calls, 2)
+        self.assertEqual(self.cache.get("k", compute, ttl=10), 2)
+        self.assertEqual(self.cache.stats["refreshes"], 1)
+
+    def test_too_stale_recomputed(self):
+        """Test that an entry past ttl + max_stale is recomputed by the caller"""
+        compute = Counter()
+        self.cache.get("k", compute, ttl=10)
+        self.clock.advance(100)
+        self.assertEqual(self.cache.get("k", compute, ttl=10), 2)
+        self.assertEqual(self.cache.stats["misses"], 2)
+
+    def test_single_flight(self):
+        """Test that concurrent misses share one computation"""
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def slow():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return "value"
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self.cache.get("k", slow, ttl=10)))
+            for _ in range(5)
+        ]
+        threads[0].start()
+        started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ["value"] * 5)
+
+    def test_invalidate_marks_stale(self):
+        """Test that invalidating a tag serves the old value once and refreshes it"""
+        compute = Counter()
+        self.cache.get("k", compute, ttl=10, tags=("reservations",))
+        self.cache.get("other", Counter(), ttl=10, tags=("users",))
+        self.cache.invalidate("reservations")
+
+        self.assertEqual(self.cache.get("k", compute, ttl=10, tags=("reservations",)), 1)
+        self.cache.wait(5)
+        self.assertEqual(self.cache.get("k", compute, ttl=10, tags=("reservations",)), 2)
+        self.assertEqual(self.cache.get("other", Counter(), ttl=10, tags=("users",)), 1)
+
+    def test_invalidated_during_compute(self):
+        """Test that a value computed across an invalidation is stored as stale"""
+        def compute():
+            self.cache.invalidate("reservations")
+            return "old"
+
+        self.assertEqual(self.cache.get("k", compute, ttl=10, tags=("reservations",)), "old")
+        self.assertEqual(self.cache.get("k", lambda: "new", ttl=10, tags=("reservations",)), "old")
+        self.cache.wait(5)
+        self.assertEqual(self.cache.get("k", lambda: "newer", ttl=10, tags=("reservations",)), "new")
+
+    def test_errors_not_cached(self):
+        """Test that a failed computation raises and is retried next time"""
+        def failing():
+            raise RuntimeError("database down")
+
+        with self.assertRaises(RuntimeError):
+            self.cache.get("k", failing, ttl=10)
+        self.assertEqual(self.cache.get("k", lambda: "ok", ttl=10), "ok")
+        self.assertEqual(self.cache.stats["errors"], 1)
+
+    def test_disabled(self):
+        """Test that a disabled cache always computes"""
+        cache = SWRCache(enabled=False, clock=self.clock)
+        compute = Counter()
+        cache.get("k", compute, ttl=10)
+        self.assertEqual(cache.get("k", compute, ttl=10), 2)
+
+    def test_decorator_keys_by_arguments(self):
+        """Test that the decorator caches per argument list"""
+        calls = []
+
+        @cached(self.cache, ttl=10)
+        def square(n):
+            calls.append(n)
+            return n * n
+
+        self.assertEqual(square(3), 9)
+        self.assertEqual(square(3), 9)
+        self.assertEqual(square(n=4), 16)
+        self.assertEqual(calls, [3, 4])
+        self.assertEqual(square.uncached(3), 9)
+
+
+class TestAnalyticsCache(SQLiteTestCase):
+    """Test cases for caching AnalyticsModel results"""
+
+    def query_count(self):
+        return sum(row["calls"] for row in db.stats.snapshot())
+
+    def test_repeat_visit_served_from_cache(self):
+        """Test that a second snapshot runs no queries"""
+        first = AnalyticsModel.get_dashboard_snapshot(parallel=False)
+        queries = self.query_count()
+        self.assertEqual(AnalyticsModel.get_dashboard_snapshot(parallel=False), first)
+        self.assertEqual(self.query_count(), queries)
+
+    def test_reservation_write_invalidates(self):
+        """Test that creating a reservation refreshes the cached summary"""
+        before = AnalyticsModel.get_reservation_summary()
+        ReservationModel.create_reservation(1, 2, FUTURE, "09:00", "10:00", "Lab")
+
+        # Served stale once while the refresh runs
+        self.assertEqual(AnalyticsModel.get_reservation_summary(), before)
+        analytics_cache.wait(5)
+        after = AnalyticsModel.get_reservation_summary()
+        self.assertEqual(after["total"], before["total"] + 1)
+        self.assertEqual(after["pending"], before["pending"] + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,360 @@
+"""
+Unit Tests for the Database Layer
+==================================
+Tests connection pooling, per-thread connection scoping,
+transactions and query statistics (without a live MySQL server)
+"""
+
+import unittest
+import sys
+import os
+import sqlite3
+import threading
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mysql.connector import Error
+from data.database import ConnectionPool, PoolTimeoutError, Database, db
+from data.query_stats import QueryStats, normalize_query
+from tests.helpers import SQLiteTestCase
+
+
+class FakeCursor:
+    """Cursor that records statements; queries containing FAIL raise"""
+
+    lastrowid = 1
+    rowcount = 1
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, query, params=None):
+        if "FAIL" in query:
+            raise Error("simulated failure")
+        self.connection.executed.append(query)
+
+    def fetchone(self):
+        return None
+
+    def fetchall(self):
+        return []
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    """Stand-in for a DB-API connection"""
+
+    def __init__(self):
+        self.closed = False
+        self.healthy = True
+        self.rollbacks = 0
+        self.commits = 0
+        self.executed = []
+
+    def cursor(self, dictionary=False):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def close(self):
+        self.closed = True
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def is_connected(self):
+        return not self.closed
+
+
+def make_pool(**kwargs):
+    """Create a pool of FakeConnections and return (pool, created_list)"""
+    created = []
+
+    def factory():
+        connection = FakeConnection()
+        created.append(connection)
+        return connection
+
+    kwargs.setdefault("validate", lambda connection: connection.healthy)
+    kwargs.setdefault("reset", lambda connection: connection.rollback())
+    return ConnectionPool(factory, **kwargs), created
+
+
+class TestConnectionPool(unittest.TestCase):
+    """Test cases for ConnectionPool checkout/return"""
+
+    def test_reuses_returned_connection(self):
+        """Test that a released connection is handed out again"""
+        pool, created = make_pool()
+        first = pool.acquire()
+        pool.release(first)
+        second = pool.acquire()
+        self.assertIs(first, second)
+        self.assertEqual(len(created), 1)
+
+    def test_release_resets_connection(self):
+        """Test that connections are reset before going back to the pool"""
+        pool, _ = make_pool()
+        connection = pool.acquire()
+        pool.release(connection)
+        self.assertEqual(connection.rollbacks, 1)
+
+    def test_bounded_size_times_out(self):
+        """Test that checkout fails when the pool is exhausted"""
+        pool, _ = make_pool(max_size=2, timeout=0.05)
+        pool.acquire()
+        pool.acquire()
+        with self.assertRaises(PoolTimeoutError):
+            pool.acquire()
+
+    def test_waiter_gets_released_connection(self):
+        """Test that a blocked checkout resumes when a connection is returned"""
+        pool, _ = make_pool(max_size=1, timeout=2)
+        held = pool.acquire()
+        result = {}
+
+        def worker():
+            result["connection"] = pool.acquire()
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        pool.release(held)
+        thread.join(timeout=2)
+        self.assertIs(result.get("connection"), held)
+
+    def test_unhealthy_idle_connection_replaced(self):
+        """Test that idle connections failing the health check are replaced"""
+        pool, created = make_pool(ping_after=0)
+        connection = pool.acquire()
+        pool.release(connection)
+        connection.healthy = False
+
+        replacement = pool.acquire()
+        self.assertIsNot(replacement, connection)
+        self.assertTrue(connection.closed)
+        self.assertEqual(pool.stats()["size"], 1)
+
+    def test_max_lifetime_recycles(self):
+        """Test that connections older than max_lifetime are recycled"""
+        pool, created = make_pool(max_lifetime=0)
+        connection = pool.acquire()
+        pool.release(connection)
+
+        replacement = pool.acquire()
+        self.assertIsNot(replacement, connection)
+        self.assertTrue(connection.closed)
+        self.assertEqual(len(created), 2)
+
+    def test_stats(self):
+        """Test pool occupancy reporting"""
+        pool, _ = make_pool(max_size=3)
+        a = pool.acquire()
+        pool.acquire()
+        pool.release(a)
+        stats = pool.stats()
+        self.assertEqual(stats["size"], 2)
+        self.assertEqual(stats["idle"], 1)
+        self.assertEqual(stats["in_use"], 1)
+
+
+class FakeDatabase(Database):
+    """Database whose pool hands out FakeConnections"""
+
+    def _open_connection(self):
+        return FakeConnection()
+
+
+class TestConnectionScoping(unittest.TestCase):
+    """Test cases for per-thread connections on the shared Database"""
+
+    def test_threads_get_separate_connections(self):
+        """Test that concurrent threads never share a connection"""
+        database = FakeDatabase()
+        barrier = threading.Barrier(2)
+        seen = []
+
+        def worker():
+            database.connect()
+            barrier.wait(timeout=2)
+            seen.append(database.connection)
+            database.disconnect()
+
+        threads = [threading.Thread(target=worker) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=2)
+
+        self.assertEqual(len(seen), 2)
+        self.assertIsNot(seen[0], seen[1])
+
+    def test_nested_connect_reuses_connection(self):
+        """Test that nested connect/disconnect keeps the outer connection"""
+        database = FakeDatabase()
+        outer = database.connect()
+        inner = database.connect()
+        self.assertIs(outer, inner)
+
+        database.disconnect()
+        self.assertIs(database.connection, outer)
+
+        database.disconnect()
+        self.assertIsNone(database.connection)
+        self.assertEqual(database.pool.stats()["idle"], 1)
+
+
+class TestTransactions(unittest.TestCase):
+    """Test cases for db.transaction()"""
+
+    def setUp(self):
+        self.database = FakeDatabase()
+
+    def test_single_commit_for_block(self):
+        """Test that statements inside a transaction commit once"""
+        with self.database.transaction() as tx:
+            self.database.execute_query("UPDATE a")
+            self.database.execute_query("UPDATE b")
+            connection = self.database.connection
+        self.assertEqual(connection.commits, 1)
+        self.assertTrue(tx.committed)
+        self.assertIsNone(self.database.connection)
+
+    def test_autocommit_outside_transaction(self):
+        """Test that execute_query still commits on its own outside a block"""
+        connection = self.database.connect()
+        self.database.execute_query("UPDATE a")
+        self.database.execute_query("UPDATE b")
+        self.database.disconnect()
+        self.assertEqual(connection.commits, 2)
+
+    def test_failed_statement_rolls_back(self):
+        """Test that a failing statement rolls back the whole block"""
+        with self.database.transaction() as tx:
+            connection = self.database.connection
+            self.database.execute_query("UPDATE a")
+            self.assertIsNone(self.database.execute_query("FAIL"))
+        self.assertEqual(connection.commits, 0)
+        self.assertGreaterEqual(connection.rollbacks, 1)
+        self.assertFalse(tx.committed)
+
+    def test_exception_rolls_back(self):
+        """Test that an exception inside the block rolls back and propagates"""
+        with self.assertRaises(RuntimeError):
+            with self.database.transaction():
+                connection = self.database.connection
+                self.database.execute_query("UPDATE a")
+                raise RuntimeError("boom")
+        self.assertEqual(connection.commits, 0)
+        self.assertGreaterEqual(connection.rollbacks, 1)
+
+    def test_nested_transaction_joins_outer(self):
+        """Test that a nested block commits with the outer one"""
+        with self.database.transaction() as outer:
+            connection = self.database.connection
+            with self.database.transaction() as inner:
+                self.database.execute_query("UPDATE a")
+            self.assertIs(inner, outer)
+            self.assertEqual(connection.commits, 0)
+        self.assertEqual(connection.commits, 1)
+
+
+class TestSQLiteWriteLock(SQLiteTestCase):
+    """Test cases for when transactions take the SQLite write lock"""
+
+    def writer_blocked(self):
+        """True if another connection cannot take the write lock right now"""
+        other = sqlite3.connect(self.backend.path, timeout=0)
+        try:
+            other.execute("BEGIN IMMEDIATE")
+            other.rollback()
+            return False
+        except sqlite3.OperationalError:
+            return True
+        finally:
+            other.close()
+
+    def test_read_transaction_does_not_lock(self):
+        """Test that a plain transaction lets other connections write"""
+        with db.transaction() as tx:
+            db.fetch_one("SELECT COUNT(*) AS n FROM users")
+            self.assertFalse(tx.write)
+            self.assertFalse(self.writer_blocked())
+
+    def test_write_transaction_locks(self):
+        """Test that write=True holds the write lock from the start"""
+        with db.transaction(write=True) as tx:
+            self.assertTrue(tx.write)
+            self.assertTrue(self.writer_blocked())
+        self.assertFalse(self.writer_blocked())
+
+
+class TestQueryStats(unittest.TestCase):
+    """Test cases for query normalization and latency statistics"""
+
+    def test_normalize_collapses_literals_and_whitespace(self):
+        """Test that queries differing only in literals normalize the same"""
+        a = normalize_query("SELECT *\n  FROM users WHERE id = %s AND role = 'admin'")
+        b = normalize_query("SELECT * FROM users WHERE id = 42 AND role = 'faculty'")
+        self.assertEqual(a, b)
+        self.assertEqual(a, "SELECT * FROM users WHERE id = ? AND role = ?")
+
+    def test_normalize_in_lists(self):
+        """Test that IN lists of any length normalize the same"""
+        a = normalize_query("UPDATE r SET s = 1 WHERE id IN (%s, %s)")
+        b = normalize_query("UPDATE r SET s = 1 WHERE id IN (%s, %s, %s, %s)")
+        self.assertEqual(a, b)
+
+    def test_percentiles(self):
+        """Test that percentile estimates fall in the right buckets"""
+        stats = QueryStats(slow_query_ms=None)
+        for _ in range(98):
+            stats.record("SELECT 1", 1.0, rows=1)
+        stats.record("SELECT 1", 50.0, rows=1)
+        stats.record("SELECT 1", 100.0, rows=1)
+
+        row = stats.snapshot()[0]
+        self.assertEqual(row["calls"], 100)
+        self.assertEqual(row["rows"], 100)
+        self.assertAlmostEqual(row["p50_ms"], 1.0, delta=0.2)
+        self.assertLess(row["p95_ms"], 2.0)
+        self.assertGreaterEqual(row["p99_ms"], 50.0)
+        self.assertEqual(row["max_ms"], 100.0)
+
+    def test_slow_query_log(self):
+        """Test that queries over the threshold are logged"""
+        stats = QueryStats(slow_query_ms=10)
+        stats.record("SELECT fast", 1.0)
+        stats.record("SELECT slow", 25.0, rows=3)
+        slow = stats.slow_queries()
+        self.assertEqual(len(slow), 1)
+        self.assertEqual(slow[0]["query"], "SELECT slow")
+        self.assertEqual(slow[0]["rows"], 3)
+
+    def test_capture(self):
+        """Test that capture() collects raw statements only inside the block"""
+        stats = QueryStats(slow_query_ms=None, enabled=False)
+        stats.record("SELECT before", 1.0)
+        with stats.capture() as statements:
+            stats.record("SELECT * FROM users WHERE id = %s", 1.0, params=(7,))
+        stats.record("SELECT after", 1.0)
+        self.assertEqual(statements, [("SELECT * FROM users WHERE id = %s", (7,))])
+
+    def test_database_records_queries(self):
+        """Test that Database methods feed the statistics collector"""
+        database = FakeDatabase()
+        database.connect()
+        database.fetch_all("SELECT * FROM classrooms")
+        database.execute_query("FAIL")
+        database.disconnect()
+
+        by_query = {row["query"]: row for row in database.stats.snapshot()}
+        self.assertEqual(by_query["SELECT * FROM classrooms"]["calls"], 1)
+        self.assertEqual(by_query["FAIL"]["errors"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
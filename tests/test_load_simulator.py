@@ -0,0 +1,142 @@
+"""
+Unit Tests for the Load Simulator
+=================================
+Tests the headless page, control lookup and per-thread measurements,
+and runs a short simulation when Flet is installed
+"""
+
+import importlib.util
+import threading
+import unittest
+from datetime import date
+
+from data.database import db
+from tests.helpers import SQLiteTestCase
+from tests.load_simulator import (
+    FakePage, Recorder, QueryCounter, SimulationError, run_simulation,
+    walk, caption, find_all, click, type_into, pick,
+)
+
+HAS_FLET = importlib.util.find_spec("flet") is not None
+
+
+class Control:
+    def __init__(self, **attributes):
+        self.__dict__.update(attributes)
+
+
+class Text(Control):
+    pass
+
+
+class TestFakePage(unittest.TestCase):
+    """Test cases for FakePage and the control helpers"""
+
+    def setUp(self):
+        self.page = FakePage()
+        self.clicks = []
+        self.button = Control(text="Apply", on_click=lambda e: self.clicks.append(e.control))
+        self.date_button = Control(
+            content=Control(controls=[Text(value="Select Date"), Text(value="▼")]),
+            on_click=lambda e: self.page.open(Control(on_change=self.picked, value=None)),
+        )
+        self.purpose = Control(label="Purpose", value="", on_change=lambda e: self.clicks.append(e.data))
+        self.page.add(Control(controls=[Control(content=self.button), self.date_button, self.purpose]))
+
+    def picked(self, e):
+        self.clicks.append(e.control.value)
+
+    def test_session(self):
+        """Test the dict-backed session"""
+        self.page.session.set("user_id", 5)
+        self.assertEqual(self.page.session.get("user_id"), 5)
+        self.assertTrue(self.page.session.contains_key("user_id"))
+        self.page.session.clear()
+        self.assertIsNone(self.page.session.get("user_id"))
+
+    def test_walk_and_caption(self):
+        """Test finding controls by their visible text"""
+        self.assertIn(self.button, list(walk(self.page.controls)))
+        self.assertEqual(caption(self.date_button), "Select Date")
+        self.assertEqual(find_all(self.page, "Apply"), [self.button])
+
+    def test_click_pick_and_type(self):
+        """Test firing click, picker and field handlers"""
+        click(self.page, "Apply")
+        click(self.page, "Select Date")
+        pick(self.page, date(2026, 11, 2))
+        type_into(self.page, "Purpose", "Lab")
+        self.assertEqual(self.clicks, [self.button, date(2026, 11, 2), "Lab"])
+        self.assertEqual(self.purpose.value, "Lab")
+        self.assertEqual(len(self.page.overlay), 1)
+
+    def test_missing_or_disabled_control(self):
+        """Test that a simulated user cannot use what is not there"""
+        with self.assertRaises(SimulationError):
+            click(self.page, "Submit Reservation")
+        self.button.disabled = True
+        with self.assertRaises(SimulationError):
+            click(self.page, "Apply")
+
+
+class TestRecorder(SQLiteTestCase):
+    """Test cases for the per-thread query counts and the summary"""
+
+    def test_queries_counted_per_thread(self):
+        """Test that an action only counts its own thread's queries"""
+        counter = QueryCounter(db.stats)
+        original, db.stats = db.stats, counter
+        recorder = Recorder(counter)
+
+        def other_thread():
+            db.connect()
+            db.fetch_all("SELECT id FROM classrooms")
+            db.disconnect()
+
+        try:
+            with recorder.action("dashboard.filter"):
+                db.connect()
+                db.fetch_one("SELECT COUNT(*) AS n FROM reservations")
+                db.fetch_one("SELECT COUNT(*) AS n FROM users")
+                db.disconnect()
+                thread = threading.Thread(target=other_thread)
+                thread.start()
+                thread.join()
+        finally:
+            db.stats = original
+
+        view = recorder.summary()["dashboard.filter"]
+        self.assertEqual(view["calls"], 1)
+        self.assertEqual(view["queries_per_call"], 2)
+        self.assertEqual(len(original.snapshot()), 3)
+
+    def test_errors_recorded(self):
+        """Test that a failing action counts as an error, not a sample"""
+        recorder = Recorder(QueryCounter(db.stats))
+        with self.assertRaises(SimulationError):
+            with recorder.action("admin.approve"):
+                raise SimulationError("No 'Approve' control on the page")
+        view = recorder.summary()["admin.approve"]
+        self.assertEqual((view["calls"], view["errors"]), (0, 1))
+        self.assertEqual(len(recorder.messages), 1)
+
+
+@unittest.skipUnless(HAS_FLET, "flet is not installed")
+class TestSimulation(SQLiteTestCase):
+    """Test cases for a short end-to-end run through the views"""
+
+    def test_faculty_and_admin_flows(self):
+        """Test that both flows complete and report every view"""
+        report = run_simulation(
+            faculty=2, admins=1, duration=60, flows=1, approvals=1,
+            dataset=dict(rooms=4, users=20, reservations=100, years=1),
+        )
+        self.assertEqual(report["outcomes"].get("failed_flow", 0), 0, report["errors"])
+        self.assertEqual(report["throughput"]["flows"], 3)
+        for view in ("login.submit", "dashboard.filter", "my_reservations.render", "admin.render"):
+            self.assertGreater(report["views"][view]["calls"], 0)
+            self.assertGreater(report["views"][view]["queries_per_call"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
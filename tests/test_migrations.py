@@ -0,0 +1,183 @@
+"""
+Unit Tests for Schema Migrations
+================================
+Tests the migration runner and the hot-query index check on the
+embedded SQLite backend
+"""
+
+import unittest
+from datetime import date, timedelta
+
+from tests.helpers import SQLiteTestCase
+from data.database import db
+from data import rollups
+from data.models import ReservationModel
+from data.migrations import (
+    MigrationRunner, Migration, AddColumn, CreateIndex, MIGRATIONS, HOT_QUERIES, explain_hot_queries
+)
+
+FUTURE = (date.today() + timedelta(days=30)).isoformat()
+
+
+class TestMigrationRunner(SQLiteTestCase):
+    """Test cases for applying versioned migrations"""
+
+    migrate = False
+
+    def has_index(self, table, name):
+        connection = db.connect()
+        try:
+            return self.backend.has_index(connection, table, name)
+        finally:
+            db.disconnect()
+
+    def test_fresh_schema_records_versions(self):
+        """Test that a fresh schema gets its rollups and every version recorded"""
+        runner = MigrationRunner()
+        self.assertEqual(len(runner.pending()), len(MIGRATIONS))
+        self.assertEqual(runner.migrate(), [m.version for m in MIGRATIONS])
+        self.assertEqual(runner.pending(), [])
+        self.assertTrue(all(row["applied"] for row in runner.status()))
+
+    def test_rerun_is_noop(self):
+        """Test that running migrate twice applies nothing the second time"""
+        runner = MigrationRunner()
+        runner.migrate()
+        db.stats.reset()
+        self.assertEqual(runner.migrate(), [])
+
+    def test_upgrade_replaces_prefix_indexes(self):
+        """Test that an old index layout is upgraded to the composite indexes"""
+        connection = db.connect()
+        for name in ("idx_status_date", "idx_user_date", "idx_room_date_status"):
+            connection.execute(f"DROP INDEX reservations_{name}")
+        connection.execute("CREATE INDEX reservations_idx_status ON reservations (status)")
+        connection.commit()
+        db.disconnect()
+
+        MigrationRunner().migrate()
+        self.assertTrue(self.has_index("reservations", "idx_status_date"))
+        self.assertTrue(self.has_index("reservations", "idx_room_date_status"))
+        self.assertFalse(self.has_index("reservations", "idx_status"))
+
+    def test_upgrade_drops_unread_daily_rollup(self):
+        """Test that version 6 retires reservation_daily_rollup and keeps user_daily_rollup exact"""
+        runner = MigrationRunner()
+        runner.migrate(target=5)
+        connection = db.connect()
+        for name in rollups.triggers_for(rollups.DAILY_TABLES):
+            connection.execute(f"DROP TRIGGER {name}")
+        connection.execute("CREATE TABLE reservation_daily_rollup (reservation_date DATE, reservations INT)")
+        connection.execute("""
+            CREATE TRIGGER trg_reservations_rollup_insert AFTER INSERT ON reservations BEGIN
+                INSERT INTO reservation_daily_rollup VALUES (NEW.reservation_date, 1);
+                INSERT INTO user_daily_rollup (created_date, user_id, status, reservations)
+                VALUES (DATE(NEW.created_at), NEW.user_id, NEW.status, 1)
+                ON CONFLICT (created_date, user_id, status) DO UPDATE SET reservations = reservations + 1;
+            END
+        """)
+        connection.commit()
+        db.disconnect()
+
+        self.assertEqual(runner.migrate(), [6])
+        connection = db.connect()
+        try:
+            self.assertFalse(self.backend.has_table(connection, "reservation_daily_rollup"))
+            self.assertFalse(self.backend.has_trigger(connection, "trg_reservations_rollup_insert"))
+        finally:
+            db.disconnect()
+        self.assertTrue(ReservationModel.create_reservation(1, 2, FUTURE, "09:00", "10:00", "Lab"))
+        db.connect()
+        rolled = db.fetch_one("SELECT SUM(reservations) AS total FROM user_daily_rollup")
+        counted = db.fetch_one("SELECT COUNT(*) AS total FROM reservations")
+        db.disconnect()
+        self.assertEqual(rolled["total"], counted["total"])
+
+    def test_target_version(self):
+        """Test that migrate(target) stops at the requested version"""
+        extra = Migration(99, "room notes", [
+            AddColumn("classrooms", "notes", "TEXT"),
+            CreateIndex("classrooms", "idx_building", ["building"]),
+        ])
+        runner = MigrationRunner(migrations=MIGRATIONS + [extra])
+        runner.migrate(target=MIGRATIONS[-1].version)
+        self.assertEqual([m.version for m in runner.pending()], [99])
+
+        self.assertEqual(runner.migrate(), [99])
+        self.assertTrue(self.has_index("classrooms", "idx_building"))
+        db.connect()
+        row = db.fetch_one("SELECT notes FROM classrooms WHERE id = 1")
+        db.disconnect()
+        self.assertIsNone(row["notes"])
+
+
+class TestSchemaCheck(SQLiteTestCase):
+    """Test cases for the startup check for an unmigrated schema"""
+
+    migrate = False
+
+    def test_unmigrated_schema_reported(self):
+        """Test that pending versions, missing triggers and empty rollups are reported"""
+        problems = MigrationRunner().check()
+        self.assertEqual(len(problems), 3)
+        self.assertIn("pending migrations", problems[0])
+        self.assertIn("trigger", problems[1])
+        self.assertIn("date_rollup", problems[2])
+
+    def test_migrated_schema_passes(self):
+        """Test that a migrated schema has nothing to report"""
+        runner = MigrationRunner()
+        runner.migrate()
+        self.assertEqual(runner.check(), [])
+
+    def test_dropped_trigger_reported(self):
+        """Test that a trigger lost after migrating is noticed"""
+        runner = MigrationRunner()
+        runner.migrate()
+        connection = db.connect()
+        connection.execute("DROP TRIGGER trg_reservations_summary_insert")
+        connection.commit()
+        db.disconnect()
+        self.assertEqual(runner.check(), ["1 rollup trigger(s) missing, e.g. trg_reservations_summary_insert"])
+
+
+class TestHotQueryPlans(SQLiteTestCase):
+    """Test cases that the hot model queries are served from an index"""
+
+    def test_hot_queries_use_indexes(self):
+        """Test that no hot model query scans its table"""
+        results = explain_hot_queries()
+        self.assertEqual(len(results), len(HOT_QUERIES))
+        self.assertEqual([row["name"] for row in results if not row["statements"]], [])
+        self.assertEqual([row["name"] for row in results if row["full_scan"]], [])
+
+    def test_plans_the_model_sql(self):
+        """Test that the check explains the statement the model method runs"""
+        calls = {name: call for name, _, call in HOT_QUERIES}
+        with db.stats.capture() as statements:
+            calls["my reservations"]()
+        self.assertEqual(len(statements), 1)
+        self.assertIn("c.image_url", statements[0][0])
+        self.assertEqual(statements[0][1], (2,))
+
+    def test_full_scan_detected(self):
+        """Test that the check reports a scan once the index is gone"""
+        connection = db.connect()
+        connection.execute("DROP INDEX notifications_idx_user_read_created")
+        connection.commit()
+        db.disconnect()
+        results = {row["name"]: row["full_scan"] for row in explain_hot_queries()}
+        self.assertTrue(results["notifications"])
+
+    def test_full_scan_in_model_query_detected(self):
+        """Test that a model query that stops using its index fails the check"""
+        connection = db.connect()
+        connection.execute("DROP INDEX reservations_idx_user_date")
+        connection.commit()
+        db.disconnect()
+        scans = [row["name"] for row in explain_hot_queries() if row["full_scan"]]
+        self.assertEqual(scans, ["my reservations"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,434 @@
+"""
+Unit Tests for the Model Layer
+==============================
+Runs data/models.py and data/analytics.py against the embedded SQLite
+backend (no MySQL server needed)
+"""
+
+import unittest
+import threading
+from unittest.mock import patch
+from datetime import date, timedelta
+
+from tests.helpers import SQLiteTestCase
+from data.database import db
+from data.backends import translate_schema
+from data.models import UserModel, ReservationModel, NotificationModel, MAX_SERIES_OCCURRENCES
+from data import analytics
+from data.analytics import AnalyticsModel
+from data.occupancy import occupancy_cube
+from data.cache import analytics_cache
+
+FUTURE = (date.today() + timedelta(days=30)).isoformat()
+
+
+class TestSchemaTranslation(unittest.TestCase):
+    """Test cases for MySQL -> SQLite schema translation"""
+
+    def test_inline_indexes_become_statements(self):
+        """Test that INDEX definitions are split out of CREATE TABLE"""
+        statements = translate_schema("""
+            CREATE TABLE t (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                status ENUM('a', 'b') DEFAULT 'a',
+                INDEX idx_status (status)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+        """)
+        self.assertEqual(len(statements), 2)
+        self.assertIn("INTEGER PRIMARY KEY AUTOINCREMENT", statements[0])
+        self.assertNotIn("ENUM", statements[0])
+        self.assertNotIn("INDEX", statements[0])
+        self.assertEqual(statements[1], "CREATE INDEX IF NOT EXISTS t_idx_status ON t (status)")
+
+    def test_skips_mysql_only_statements(self):
+        """Test that CREATE DATABASE, USE, SET and SELECT are skipped"""
+        statements = translate_schema(
+            "CREATE DATABASE x; USE x; SET FOREIGN_KEY_CHECKS = 0; SELECT 1;"
+        )
+        self.assertEqual(statements, [])
+
+
+class TestUserModel(SQLiteTestCase):
+    """Test cases for authentication against the sample data"""
+
+    def test_login_success(self):
+        """Test that the sample admin account can log in"""
+        user, error = UserModel.authenticate_with_email("admin@cspc.edu.ph", "00000000", "admin123")
+        self.assertEqual(user["role"], "admin")
+        self.assertIsNone(error)
+
+    def test_failed_login_counts_attempts(self):
+        """Test that a wrong password increments failed_attempts"""
+        user, _ = UserModel.authenticate_with_email("admin@cspc.edu.ph", "00000000", "wrong")
+        self.assertIsNone(user)
+        self.assertEqual(UserModel.get_user_by_id(1)["failed_attempts"], 1)
+
+    def test_lockout_after_threshold(self):
+        """Test that repeated failures lock the account"""
+        for _ in range(5):
+            UserModel.authenticate_with_email("admin@cspc.edu.ph", "00000000", "wrong")
+        user, error = UserModel.authenticate_with_email("admin@cspc.edu.ph", "00000000", "admin123")
+        self.assertIsNone(user)
+        self.assertIn("locked", error)
+
+
+class TestReservationModel(SQLiteTestCase):
+    """Test cases for reservation queries using MySQL-specific SQL"""
+
+    def test_availability_overlap(self):
+        """Test overlap detection against approved reservations"""
+        # Sample data: CS Lab (1) is approved 08:00-10:00 on 2025-12-09
+        self.assertFalse(ReservationModel.check_availability(1, "2025-12-09", "09:00", "11:00"))
+        self.assertTrue(ReservationModel.check_availability(1, "2025-12-09", "10:00", "10:30"))
+
+    def test_available_classrooms(self):
+        """Test that busy rooms are excluded from the available list"""
+        rooms = ReservationModel.get_available_classrooms("2025-12-09", "09:00", "11:00")
+        names = {room["room_name"] for room in rooms}
+        self.assertNotIn("CS Lab", names)
+        self.assertIn("Open Lab", names)
+
+    def test_create_reservation_notifies_admins(self):
+        """Test that creating a reservation notifies every admin in one transaction"""
+        reservation_id = ReservationModel.create_reservation(1, 2, FUTURE, "09:00", "10:00", "Lab")
+        self.assertIsNotNone(reservation_id)
+        notifications = NotificationModel.get_user_notifications(1)
+        self.assertEqual(notifications[0]["reservation_id"], reservation_id)
+
+    def test_status_updates(self):
+        """Test that past approved reservations are marked done"""
+        ReservationModel.update_reservation_statuses()
+        reservation = ReservationModel.get_reservation_by_id(1)
+        self.assertEqual(reservation["status"], "done")
+
+
+class TestAtomicBooking(SQLiteTestCase):
+    """Test cases for conflict checks made under the classroom lock"""
+
+    def test_overlapping_approval_refused(self):
+        """Test that the second of two overlapping approvals fails"""
+        first = ReservationModel.create_reservation(1, 2, FUTURE, "09:00", "10:00", "Lab A")
+        second = ReservationModel.create_reservation(1, 3, FUTURE, "09:30", "10:30", "Lab B")
+        self.assertTrue(ReservationModel.approve_reservation(first))
+        self.assertFalse(ReservationModel.approve_reservation(second))
+        self.assertEqual(ReservationModel.get_reservation_by_id(second)["status"], "pending")
+
+    def test_approve_only_pending(self):
+        """Test that approving twice or approving a missing reservation fails"""
+        reservation_id = ReservationModel.create_reservation(1, 2, FUTURE, "09:00", "10:00", "Lab")
+        self.assertTrue(ReservationModel.approve_reservation(reservation_id))
+        self.assertFalse(ReservationModel.approve_reservation(reservation_id))
+        self.assertFalse(ReservationModel.approve_reservation(99999))
+
+    def test_create_rechecks_in_database(self):
+        """Test that creating a reservation over an approved slot is refused"""
+        self.assertIsNone(ReservationModel.create_reservation(1, 2, "2025-12-09", "09:00", "09:30", "Lab"))
+
+    def failing(self, fragment):
+        """Make every query containing fragment fail inside the backend"""
+        translate = db.backend.translate
+        return patch.object(db.backend, "translate", lambda query: (
+            "SELECT * FROM missing_table" if fragment in query else translate(query)
+        ))
+
+    def count_reservations(self):
+        with db.transaction():
+            return db.fetch_one("SELECT COUNT(*) AS n FROM reservations")["n"]
+
+    def test_failed_lock_refuses_booking(self):
+        """Test that a failing lock query rolls back instead of booking"""
+        before = self.count_reservations()
+        with self.failing("FROM classrooms WHERE id = %s FOR UPDATE"):
+            self.assertIsNone(ReservationModel.create_reservation(1, 2, FUTURE, "09:00", "10:00", "Lab"))
+        self.assertEqual(self.count_reservations(), before)
+
+    def test_failed_conflict_check_refuses_booking(self):
+        """Test that a failing conflict query does not read as no conflict"""
+        first = ReservationModel.create_reservation(1, 2, FUTURE, "09:00", "10:00", "Lab A")
+        second = ReservationModel.create_reservation(1, 3, FUTURE, "09:30", "10:30", "Lab B")
+        self.assertTrue(ReservationModel.approve_reservation(first))
+        before = self.count_reservations()
+        with self.failing("AND id != %s"):
+            self.assertIsNone(ReservationModel.create_reservation(1, 2, FUTURE, "09:00", "10:00", "Lab C"))
+            self.assertFalse(ReservationModel.approve_reservation(second))
+        self.assertEqual(self.count_reservations(), before)
+        self.assertEqual(ReservationModel.get_reservation_by_id(second)["status"], "pending")
+
+    def test_concurrent_approvals(self):
+        """Test that concurrent overlapping approvals let exactly one through"""
+        ids = [
+            ReservationModel.create_reservation(1, 2 + i % 3, FUTURE, "13:00", "14:00", f"Lab {i}")
+            for i in range(4)
+        ]
+        other_room = ReservationModel.create_reservation(2, 2, FUTURE, "13:00", "14:00", "Other room")
+        barrier = threading.Barrier(5)
+        results = {}
+
+        def approve(reservation_id):
+            barrier.wait(timeout=5)
+            results[reservation_id] = ReservationModel.approve_reservation(reservation_id)
+
+        threads = [threading.Thread(target=approve, args=(rid,)) for rid in ids + [other_room]]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=30)
+
+        self.assertEqual(sum(results[rid] for rid in ids), 1)
+        self.assertTrue(results[other_room])
+
+
+class TestBulkReview(SQLiteTestCase):
+    """Test cases for bulk approve/reject"""
+
+    def test_bulk_approve_single_update(self):
+        """Test that a batch is approved with one UPDATE and one notification insert"""
+        ids = [
+            ReservationModel.create_reservation(room, 2, FUTURE, "09:00", "10:00", "Lab")
+            for room in (1, 2, 3)
+        ]
+        db.stats.reset()
+        result = ReservationModel.bulk_approve(ids)
+        self.assertEqual(result["approved"], sorted(ids))
+
+        calls = {row["query"]: row["calls"] for row in db.stats.snapshot()}
+        updates = [q for q in calls if q.startswith("UPDATE reservations")]
+        inserts = [q for q in calls if q.startswith("INSERT INTO notifications")]
+        self.assertEqual(sum(calls[q] for q in updates), 1)
+        self.assertEqual(sum(calls[q] for q in inserts), 1)
+        self.assertFalse(ReservationModel.check_availability(2, FUTURE, "09:30", "09:45"))
+
+    def test_bulk_approve_conflicts(self):
+        """Test that overlaps within the selection and with approved bookings are refused"""
+        first = ReservationModel.create_reservation(1, 2, FUTURE, "09:00", "10:00", "A")
+        overlapping = ReservationModel.create_reservation(1, 3, FUTURE, "09:30", "10:30", "B")
+        clash_sample = ReservationModel.create_reservation(2, 3, FUTURE, "13:00", "14:00", "C")
+        approved = ReservationModel.create_reservation(2, 2, FUTURE, "13:30", "15:00", "D")
+        ReservationModel.approve_reservation(approved)
+
+        result = ReservationModel.bulk_approve([overlapping, first, clash_sample, 99999])
+        self.assertEqual(result["approved"], [first])
+        self.assertEqual(sorted(result["conflicts"]), sorted([overlapping, clash_sample]))
+        self.assertEqual(result["skipped"], [99999])
+        self.assertEqual(ReservationModel.get_reservation_by_id(overlapping)["status"], "pending")
+
+    def test_bulk_reject(self):
+        """Test that only pending reservations are rejected"""
+        ids = [ReservationModel.create_reservation(room, 2, FUTURE, "09:00", "10:00", "Lab") for room in (1, 2)]
+        ReservationModel.approve_reservation(ids[0])
+        result = ReservationModel.bulk_reject(ids)
+        self.assertEqual(result["rejected"], [ids[1]])
+        self.assertEqual(result["skipped"], [ids[0]])
+        self.assertEqual(ReservationModel.get_reservation_by_id(ids[1])["status"], "rejected")
+
+
+class TestRecurringReservations(SQLiteTestCase):
+    """Test cases for weekly recurring series"""
+
+    def setUp(self):
+        super().setUp()
+        self.start = date.today() + timedelta(days=14)
+        self.until = self.start + timedelta(weeks=5)
+
+    def test_series_dates(self):
+        """Test weekly and bi-weekly occurrence dates"""
+        self.assertEqual(len(ReservationModel.get_series_dates(self.start, self.until)), 6)
+        biweekly = ReservationModel.get_series_dates(self.start, self.until, interval_weeks=2)
+        self.assertEqual(biweekly, [self.start + timedelta(weeks=w) for w in (0, 2, 4)])
+
+    def test_series_created_in_one_transaction(self):
+        """Test that a series is inserted together with one notification per admin"""
+        result = ReservationModel.create_recurring_reservation(
+            1, 2, self.start, self.until, "09:00", "10:00", "Weekly lab"
+        )
+        self.assertIsNotNone(result["series_id"])
+        self.assertEqual(len(result["reservation_ids"]), 6)
+
+        inserts = [q for q in db.stats.snapshot() if q["query"].startswith("INSERT INTO reservations")]
+        self.assertEqual(sum(q["calls"] for q in inserts), 1)
+
+        notifications = NotificationModel.get_user_notifications(1, limit=50)
+        series_notes = [n for n in notifications if "weekly" in n["message"]]
+        self.assertEqual(len(series_notes), 1)
+        self.assertIn("6 dates", series_notes[0]["message"])
+
+    def test_conflicts_block_series(self):
+        """Test that a conflicting occurrence books nothing unless skipped"""
+        blocker = ReservationModel.create_reservation(
+            1, 3, (self.start + timedelta(weeks=2)).isoformat(), "09:30", "10:30", "Exam"
+        )
+        ReservationModel.approve_reservation(blocker)
+
+        result = ReservationModel.create_recurring_reservation(
+            1, 2, self.start, self.until, "09:00", "10:00", "Weekly lab"
+        )
+        self.assertIsNone(result["series_id"])
+        self.assertEqual([c["reservation_date"] for c in result["conflicts"]],
+                         [(self.start + timedelta(weeks=2)).isoformat()])
+
+        result = ReservationModel.create_recurring_reservation(
+            1, 2, self.start, self.until, "09:00", "10:00", "Weekly lab", skip_conflicts=True
+        )
+        self.assertEqual(len(result["reservation_ids"]), 5)
+        self.assertEqual(len(result["skipped"]), 1)
+
+    def test_taken_first_date_skipped(self):
+        """Test that a series can start on a taken date when conflicts are skipped"""
+        blocker = ReservationModel.create_reservation(1, 3, self.start.isoformat(), "09:00", "10:00", "Exam")
+        ReservationModel.approve_reservation(blocker)
+        result = ReservationModel.create_recurring_reservation(
+            1, 2, self.start, self.until, "09:00", "10:00", "Weekly lab", skip_conflicts=True
+        )
+        self.assertEqual(result["skipped"], [self.start.isoformat()])
+        self.assertEqual(len(result["reservation_ids"]), 5)
+
+    def test_too_many_dates_rejected(self):
+        """Test that a series past MAX_SERIES_OCCURRENCES is refused, not truncated"""
+        until = self.start + timedelta(weeks=MAX_SERIES_OCCURRENCES)
+        result = ReservationModel.create_recurring_reservation(1, 2, self.start, until, "09:00", "10:00", "Lab")
+        self.assertTrue(result["too_many"])
+        self.assertIsNone(result["series_id"])
+        self.assertEqual(db.stats.snapshot(), [])
+
+        result = ReservationModel.create_recurring_reservation(
+            1, 2, self.start, until - timedelta(weeks=1), "09:00", "10:00", "Lab"
+        )
+        self.assertFalse(result["too_many"])
+        self.assertEqual(len(result["reservation_ids"]), MAX_SERIES_OCCURRENCES)
+
+
+class TestAnalyticsModel(SQLiteTestCase):
+    """Test cases that every analytics query runs on the embedded backend"""
+
+    def test_all_metrics_run(self):
+        """Test that no analytics query fails"""
+        for name in dir(AnalyticsModel):
+            if name.startswith("get_"):
+                getattr(AnalyticsModel, name)()
+        errors = [row for row in db.stats.snapshot() if row["errors"]]
+        self.assertEqual(errors, [])
+
+    def test_summary(self):
+        """Test summary counts over the sample data"""
+        summary = AnalyticsModel.get_reservation_summary()
+        self.assertEqual(summary["total"], 26)
+        self.assertEqual(summary["pending"], 6)
+
+
+class TestDashboardSnapshot(SQLiteTestCase):
+    """Test cases for the single-pass analytics snapshot"""
+
+    def setUp(self):
+        super().setUp()
+        today = date.today()
+        for i, (room, offset) in enumerate([(1, -3), (2, -3), (3, -10), (1, 2), (4, -20)]):
+            day = (today + timedelta(days=offset)).isoformat()
+            reservation_id = ReservationModel.create_reservation(
+                room, 2 + i % 3, day, f"{9 + i:02d}:00", f"{10 + i:02d}:00", "Lab"
+            )
+            if i % 2 == 0:
+                ReservationModel.approve_reservation(reservation_id)
+        db.stats.reset()
+
+    def snapshot_rows(self):
+        """Rows the dashboard queries read, with the occupancy cube loaded"""
+        analytics_cache.clear()
+        occupancy_cube.ensure_current()
+        db.stats.reset()
+        snapshot = AnalyticsModel.get_dashboard_snapshot(parallel=False)
+        self.assertEqual(snapshot["unavailable"], [])
+        return sum(row["calls"] for row in db.stats.snapshot()), sum(row["rows"] for row in db.stats.snapshot())
+
+    def test_seven_queries(self):
+        """Test that the whole dashboard is computed with seven queries"""
+        self.assertEqual(self.snapshot_rows()[0], 7)
+
+    def add_history(self, weeks):
+        """Insert a done reservation for room 1 on each of `weeks` Mondays, over a year ago"""
+        first = date.today() - timedelta(days=400 + date.today().weekday())
+        with db.transaction():
+            for week in weeks:
+                day = first - timedelta(weeks=week)
+                db.execute_query("""
+                    INSERT INTO reservations
+                        (classroom_id, user_id, reservation_date, start_time, end_time, purpose, status, created_at)
+                    VALUES (1, 2, %s, '09:00:00', '10:00:00', 'Old lab', 'done', %s)
+                """, (day.isoformat(), f"{day.isoformat()} 08:00:00"))
+        occupancy_cube.invalidate()
+
+    def test_cost_independent_of_history(self):
+        """Test that older reservations do not add rows for the dashboard to read"""
+        self.add_history(range(1))
+        before = self.snapshot_rows()
+        self.add_history(range(1, 50))
+        self.assertEqual(self.snapshot_rows(), before)
+
+    def test_parallel_matches_serial(self):
+        """Test that running the sections on the worker pool gives the same snapshot"""
+        self.assertEqual(
+            AnalyticsModel.get_dashboard_snapshot(parallel=True),
+            AnalyticsModel.get_dashboard_snapshot(parallel=False),
+        )
+
+    def test_failed_section_renders_partially(self):
+        """Test that a failing section is reported and the others still load"""
+        faculty = analytics.SNAPSHOT_SECTIONS["faculty"]
+
+        def failing(rows=None, **options):
+            if rows is None:
+                raise RuntimeError("lost connection")
+            return faculty(rows=rows, **options)
+
+        with patch.dict(analytics.SNAPSHOT_SECTIONS, {"faculty": failing}):
+            snapshot = AnalyticsModel.get_dashboard_snapshot(parallel=True)
+        self.assertCountEqual(snapshot["unavailable"], ["faculty_activity", "most_active", "pending_status"])
+        self.assertEqual(snapshot["faculty_activity"], [])
+        self.assertEqual(snapshot["summary"], AnalyticsModel.get_reservation_summary())
+
+    def test_slow_section_times_out(self):
+        """Test that a section slower than the timeout is left out"""
+        activity = analytics.SNAPSHOT_SECTIONS["activity"]
+        release = threading.Event()
+
+        def slow(rows=None, **options):
+            if rows is None:
+                release.wait(5)
+            return activity(rows=(), **options)
+
+        try:
+            with patch.dict(analytics.SNAPSHOT_SECTIONS, {"activity": slow}):
+                snapshot = AnalyticsModel.get_dashboard_snapshot(parallel=True, timeout=0.1)
+        finally:
+            release.set()
+        self.assertIn("summary", snapshot["unavailable"])
+        self.assertEqual(snapshot["summary"]["total"], 0)
+        self.assertNotIn("utilization", snapshot["unavailable"])
+
+    def test_matches_individual_metrics(self):
+        """Test that every snapshot metric equals its get_* method"""
+        snapshot = AnalyticsModel.get_dashboard_snapshot()
+        self.assertEqual(snapshot["summary"], AnalyticsModel.get_reservation_summary())
+        self.assertEqual(snapshot["approval"], AnalyticsModel.get_approval_rate())
+        self.assertEqual(snapshot["weekly_comparison"], AnalyticsModel.get_weekly_comparison())
+        self.assertEqual(snapshot["avg_daily"], AnalyticsModel.get_average_daily_reservations())
+        self.assertEqual(snapshot["busiest_day"], AnalyticsModel.get_busiest_day())
+        self.assertEqual(snapshot["most_active"], AnalyticsModel.get_most_active_faculty())
+        self.assertEqual(snapshot["room_recommendation"], AnalyticsModel.get_room_recommendation())
+        self.assertEqual(snapshot["time_slots"], AnalyticsModel.get_reservations_by_time_slot())
+        self.assertEqual(snapshot["utilization"], AnalyticsModel.get_classroom_utilization())
+        self.assertEqual(snapshot["faculty_activity"], AnalyticsModel.get_faculty_activity())
+        self.assertEqual(snapshot["pending_status"]["pending_count"],
+                         AnalyticsModel.get_pending_bottleneck()["pending_count"])
+        self.assertCountEqual(snapshot["by_status"], AnalyticsModel.get_reservations_by_status())
+        self.assertEqual(
+            [(str(row["date"]), row["count"]) for row in snapshot["date_trends"]],
+            [(str(row["date"]), row["count"]) for row in AnalyticsModel.get_reservations_by_date(30)],
+        )
+        self.assertEqual(
+            [row["count"] for row in snapshot["peak_hours"]],
+            [row["count"] for row in AnalyticsModel.get_peak_hours()],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
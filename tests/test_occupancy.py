@@ -0,0 +1,184 @@
+"""
+Unit Tests for the Occupancy Cube
+=================================
+Tests time-weighted hour splitting, loading from the occupancy rollup and
+the utilization metrics built on the cube
+"""
+
+import unittest
+from datetime import date, timedelta
+
+from data.occupancy import OccupancyCube, OCCUPIED_STATUSES, hour_minutes, weekday_counts, occupancy_cube
+from data.database import db
+from data.availability import to_minutes, to_date_key
+from data import rollups
+from data.models import ReservationModel
+from data.analytics import AnalyticsModel
+from tests.helpers import SQLiteTestCase
+
+FUTURE = (date.today() + timedelta(days=30)).isoformat()
+
+
+def reservation(classroom_id, start, end, day="2025-12-08", status="approved"):
+    return {"classroom_id": classroom_id, "day": date.fromisoformat(day),
+            "start": start, "end": end, "status": status}
+
+
+class TestOccupancyCube(unittest.TestCase):
+    """Test cases for OccupancyCube with an in-memory loader"""
+
+    def setUp(self):
+        # 2025-12-08 is a Monday, 2025-12-14 a Sunday
+        self.reservations = [
+            reservation(1, 510, 600),
+            reservation(1, 780, 810, day="2025-12-14"),
+            reservation(2, 540, 1020, status="done"),
+            reservation(3, 600, 660, status="pending"),
+        ]
+        self.loads = 0
+
+        def loader():
+            # What occupancy_rollup and date_rollup hold for self.reservations
+            self.loads += 1
+            occupied = [r for r in self.reservations if r["status"] in OCCUPIED_STATUSES]
+            rows = [
+                {"classroom_id": r["classroom_id"], "weekday": r["day"].weekday(), "hour": hour, "minutes": minutes}
+                for r in occupied for hour, minutes in hour_minutes(r["start"], r["end"])
+            ]
+            days = [r["day"] for r in occupied]
+            return rows, {"first": min(days, default=None), "last": max(days, default=None)}
+
+        self.cube = OccupancyCube(ttl=60, loader=loader)
+
+    def test_hour_minutes(self):
+        """Test splitting intervals across hour boundaries"""
+        self.assertEqual(hour_minutes(510, 600), [(8, 30), (9, 60)])
+        self.assertEqual(hour_minutes(600, 630), [(10, 30)])
+        self.assertEqual(hour_minutes(600, 600), [])
+
+    def test_weekday_counts(self):
+        """Test counting weekdays in a date span"""
+        self.assertEqual(weekday_counts(date(2025, 12, 8), date(2025, 12, 14)), [1] * 7)
+        self.assertEqual(weekday_counts(date(2025, 12, 8), date(2025, 12, 16)), [2, 2, 1, 1, 1, 1, 1])
+        self.assertEqual(weekday_counts(None, None), [0] * 7)
+
+    def test_time_weighted_heatmap(self):
+        """Test that cells hold booked minutes, not reservation counts"""
+        heatmap = self.cube.heatmap([1])
+        self.assertEqual(heatmap["minutes"][0][8], 30)
+        self.assertEqual(heatmap["minutes"][0][9], 60)
+        self.assertEqual(heatmap["minutes"][6][13], 30)
+        self.assertEqual(heatmap["utilization"][0][8], 50.0)
+        self.assertEqual(sum(map(sum, heatmap["minutes"])), 120)
+
+    def test_utilization_by_booked_hours(self):
+        """Test that an 8-hour booking outweighs two short ones"""
+        result = self.cube.utilization([1, 2, 3])
+        self.assertEqual(result[1]["booked_minutes"], 120)
+        self.assertEqual(result[2]["booked_minutes"], 480)
+        self.assertEqual(result[3]["booked_minutes"], 0)
+        self.assertEqual(result[1]["available_minutes"], 7 * 14 * 60)
+        self.assertGreater(result[2]["utilization"], result[1]["utilization"])
+
+    def test_touch_reloads(self):
+        """Test that a touch makes the next read reload, and untouched reads do not"""
+        self.cube.ensure_current()
+        self.cube.ensure_current()
+        self.reservations[0]["status"] = "cancelled"
+        self.reservations.append(reservation(3, 600, 660))
+        self.cube.touch(1, 5)
+
+        result = self.cube.utilization([1, 3])
+        self.assertEqual(result[1]["booked_minutes"], 30)
+        self.assertEqual(result[3]["booked_minutes"], 60)
+        self.assertEqual(self.loads, 2)
+
+    def test_invalidate_rebuilds(self):
+        """Test that invalidate() reloads the whole cube"""
+        self.cube.ensure_current()
+        del self.reservations[2]
+        self.cube.invalidate()
+        self.assertEqual(self.cube.utilization([2])[2]["booked_minutes"], 0)
+        self.assertEqual(self.loads, 2)
+
+    def test_unavailable_database_keeps_cube(self):
+        """Test that a failed load leaves the last cube in place"""
+        self.cube.ensure_current()
+        self.cube._loader = lambda: None
+        self.cube.invalidate()
+        self.assertEqual(self.cube.utilization([2])[2]["booked_minutes"], 480)
+
+
+class TestOccupancyIntegration(SQLiteTestCase):
+    """Test cases for ReservationModel keeping the cube current"""
+
+    def cube_cells(self):
+        occupancy_cube.ensure_current()
+        return {room: list(cells) for room, cells in occupancy_cube._cells.items() if any(cells)}
+
+    def split_reservations(self):
+        """The cube computed in Python from every occupied reservation"""
+        db.connect()
+        rows = db.fetch_all("""
+            SELECT classroom_id, reservation_date, start_time, end_time FROM reservations
+            WHERE status IN ('approved', 'ongoing', 'done')
+        """)
+        db.disconnect()
+        cells = {}
+        for row in rows:
+            room = cells.setdefault(row["classroom_id"], [0] * 168)
+            offset = date.fromisoformat(to_date_key(row["reservation_date"])).weekday() * 24
+            for hour, minutes in hour_minutes(to_minutes(row["start_time"]), to_minutes(row["end_time"])):
+                room[offset + hour] += minutes
+        return {room: cells for room, cells in cells.items() if any(cells)}
+
+    def test_writes_match_rebuild(self):
+        """Test that approve, edit and cancel leave the cube equal to the reservations"""
+        first = ReservationModel.create_reservation(1, 2, FUTURE, "09:00", "10:30", "Lab")
+        second = ReservationModel.create_reservation(2, 3, FUTURE, "13:15", "14:00", "Lab")
+        self.cube_cells()
+        ReservationModel.approve_reservation(first)
+        ReservationModel.approve_reservation(second)
+        ReservationModel.update_reservation(second, FUTURE, "14:20", "16:05", "Moved")
+        ReservationModel.cancel_reservation(first)
+
+        db.stats.reset()
+        incremental = self.cube_cells()
+        self.assertEqual(sum(row["calls"] for row in db.stats.snapshot()), 2)
+        self.assertEqual(incremental, self.split_reservations())
+        self.assertTrue(rollups.rebuild())
+        occupancy_cube.invalidate()
+        self.assertEqual(incremental, self.cube_cells())
+
+    def test_utilization_uses_booked_hours(self):
+        """Test that many short bookings count less than one long booking"""
+        day = date.fromisoformat(FUTURE)
+        for week in range(4):
+            reservation_id = ReservationModel.create_reservation(
+                8, 2, (day + timedelta(weeks=week)).isoformat(), "08:00", "08:30", "Consult"
+            )
+            ReservationModel.approve_reservation(reservation_id)
+        long_id = ReservationModel.create_reservation(10, 3, FUTURE, "08:00", "18:00", "Seminar")
+        ReservationModel.approve_reservation(long_id)
+
+        rooms = {item["room_name"]: item for item in AnalyticsModel.get_classroom_utilization()}
+        db.connect()
+        by_id = {room["id"]: room["room_name"] for room in db.fetch_all("SELECT id, room_name FROM classrooms")}
+        db.disconnect()
+        short, long = rooms[by_id[8]], rooms[by_id[10]]
+        self.assertGreater(short["approved_reservations"], long["approved_reservations"])
+        self.assertGreater(long["booked_hours"], short["booked_hours"])
+        self.assertGreater(long["utilization"], short["utilization"])
+
+    def test_heatmap_api(self):
+        """Test the heatmap shape and that it covers the sample schedule"""
+        heatmap = AnalyticsModel.get_occupancy_heatmap()
+        self.assertEqual(heatmap["days"][0], "Monday")
+        self.assertEqual(len(heatmap["minutes"]), 7)
+        self.assertTrue(all(len(day) == 24 for day in heatmap["utilization"]))
+        self.assertGreater(sum(map(sum, heatmap["minutes"])), 0)
+        self.assertEqual(AnalyticsModel.get_dashboard_snapshot()["occupancy_heatmap"], heatmap)
+
+
+if __name__ == "__main__":
+    unittest.main()
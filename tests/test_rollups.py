@@ -0,0 +1,102 @@
+"""
+Unit Tests for the Analytics Rollups
+====================================
+Tests that the reservation triggers keep the rollup tables equal to a
+full rebuild
+"""
+
+import unittest
+from datetime import date, timedelta
+
+from tests.helpers import SQLiteTestCase
+from data.database import db
+from data import rollups
+from data.models import UserModel, ReservationModel
+from data.analytics import AnalyticsModel
+
+FUTURE = (date.today() + timedelta(days=30)).isoformat()
+
+
+def rollup_rows():
+    """Non-zero rows of every rollup table"""
+    db.connect()
+    tables = {}
+    for table, (keys, values) in rollups.ROLLUP_ROWS.items():
+        tables[table] = db.fetch_all(f"""
+            SELECT {', '.join(list(keys) + list(values))}
+            FROM {table} WHERE {next(iter(values))} <> 0
+            ORDER BY {', '.join(keys)}
+        """)
+    db.disconnect()
+    return tables
+
+
+class TestRollupTriggers(SQLiteTestCase):
+    """Test cases for incremental rollup maintenance"""
+
+    def assertMatchesRebuild(self):
+        incremental = rollup_rows()
+        self.assertTrue(rollups.rebuild())
+        self.assertEqual(incremental, rollup_rows())
+
+    def test_backfilled_by_migration(self):
+        """Test that the migration backfills the sample reservations"""
+        summary = AnalyticsModel.get_reservation_summary()
+        self.assertEqual(summary["total"], 26)
+        self.assertEqual(summary["pending"], 6)
+        self.assertMatchesRebuild()
+
+    def test_status_changes_move_counts(self):
+        """Test that create, approve, edit, cancel and reject keep the rollups exact"""
+        first = ReservationModel.create_reservation(1, 2, FUTURE, "09:00", "10:30", "Lab")
+        second = ReservationModel.create_reservation(2, 3, FUTURE, "13:00", "14:00", "Lab")
+        third = ReservationModel.create_reservation(3, 4, FUTURE, "15:00", "16:00", "Lab")
+        ReservationModel.approve_reservation(first)
+        ReservationModel.update_reservation(second, FUTURE, "14:00", "16:00", "Moved")
+        ReservationModel.cancel_reservation(first)
+        ReservationModel.bulk_reject([second, third])
+        ReservationModel.update_reservation_statuses()
+        self.assertMatchesRebuild()
+
+        summary = AnalyticsModel.get_reservation_summary()
+        self.assertEqual(summary["total"], 29)
+        self.assertEqual(summary["rejected"], AnalyticsModel.get_approval_rate()["rejected"])
+
+    def test_deleted_user_removed(self):
+        """Test that deleting a user removes their reservations from the rollups"""
+        before = AnalyticsModel.get_reservation_summary()["total"]
+        mine = len(ReservationModel.get_user_reservations(2))
+        success, _ = UserModel.delete_user(2)
+        self.assertTrue(success)
+        # Read past the analytics cache, which still holds the earlier total
+        after = AnalyticsModel.get_reservation_summary.uncached()["total"]
+        self.assertEqual(after, before - mine)
+        self.assertMatchesRebuild()
+
+    def test_summary_tables(self):
+        """Test the weekday, hour and pending-wait columns of the summary rollups"""
+        reservation_id = ReservationModel.create_reservation(1, 2, "2031-06-02", "13:30", "15:00", "Lab")
+        self.assertIsNotNone(reservation_id)
+        db.connect()
+        slot = db.fetch_one("""
+            SELECT weekday, hour FROM slot_rollup
+            WHERE status = 'pending' AND weekday = 0 AND hour = 13 AND reservations > 0
+        """)
+        room = db.fetch_one("SELECT booked_minutes FROM classroom_rollup WHERE classroom_id = 1 AND status = 'pending'")
+        user = db.fetch_one("""
+            SELECT reservations, created_days, DATEDIFF(CURDATE(), %s) AS today
+            FROM user_rollup WHERE user_id = 2 AND status = 'pending'
+        """, (rollups.ROLLUP_EPOCH,))
+        db.disconnect()
+        self.assertIsNotNone(slot)    # 2031-06-02 is a Monday
+        self.assertGreaterEqual(room["booked_minutes"], 90)
+        self.assertLessEqual(user["created_days"], user["reservations"] * user["today"])
+
+    def test_rebuild_command(self):
+        """Test the rebuild command line entry point"""
+        self.assertEqual(rollups.main(["rebuild"]), 0)
+        self.assertEqual(rollups.main([]), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
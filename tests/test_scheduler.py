@@ -0,0 +1,143 @@
+"""
+Unit Tests for the Status Scheduler
+===================================
+Tests boundary scheduling and approved -> ongoing -> done transitions
+"""
+
+import time
+import unittest
+from unittest import mock
+from datetime import date, datetime, timedelta
+
+from tests.helpers import SQLiteTestCase
+from data.database import db
+from data.models import ReservationModel
+from data.scheduler import StatusScheduler, boundary
+
+DAY = date.today() + timedelta(days=1)
+
+
+class FakeClock:
+    """Clock that only moves when told to"""
+
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestStatusScheduler(SQLiteTestCase):
+    """Test cases for StatusScheduler against the embedded database"""
+
+    def setUp(self):
+        super().setUp()
+        self.clock = FakeClock(datetime.combine(DAY, datetime.min.time()) + timedelta(hours=8))
+        self.scheduler = StatusScheduler(clock=self.clock)
+        # Sample reservations are all in the past; settle them first
+        ReservationModel.update_reservation_statuses()
+        self.reservation_id = ReservationModel.create_reservation(1, 2, DAY.isoformat(), "09:00", "10:00", "Lab")
+        ReservationModel.approve_reservation(self.reservation_id)
+
+    def status(self):
+        return ReservationModel.get_reservation_by_id(self.reservation_id)["status"]
+
+    def test_boundary(self):
+        """Test conversion of date and TIME values to datetimes"""
+        self.assertEqual(boundary("2025-12-09", timedelta(hours=9, minutes=30)), datetime(2025, 12, 9, 9, 30))
+        self.assertEqual(boundary(date(2025, 12, 9), "14:00"), datetime(2025, 12, 9, 14, 0))
+
+    def test_transitions_at_boundaries(self):
+        """Test that statuses flip exactly when start and end times pass"""
+        self.scheduler.resync()
+        self.assertEqual(self.scheduler.next_boundary(), boundary(DAY, "09:00"))
+        self.assertEqual(self.scheduler.run_pending(), [])
+
+        self.clock.now = boundary(DAY, "09:00")
+        self.assertEqual(self.scheduler.run_pending(), [(self.reservation_id, "ongoing")])
+        self.assertEqual(self.status(), "ongoing")
+
+        self.clock.now = boundary(DAY, "10:00")
+        self.assertEqual(self.scheduler.run_pending(), [(self.reservation_id, "done")])
+        self.assertEqual(self.status(), "done")
+        self.assertIsNone(self.scheduler.next_boundary())
+
+    def test_no_queries_between_boundaries(self):
+        """Test that idle ticks do not touch the database"""
+        self.scheduler.resync()
+        db.stats.reset()
+        for _ in range(10):
+            self.scheduler.run_pending()
+        self.assertEqual(db.stats.snapshot(), [])
+
+    def test_cancelled_reservation_skipped(self):
+        """Test that a reservation cancelled after scheduling is left alone"""
+        self.scheduler.resync()
+        ReservationModel.cancel_reservation(self.reservation_id)
+        self.clock.now = boundary(DAY, "09:30")
+        self.assertEqual(self.scheduler.run_pending(), [])
+        self.assertEqual(self.status(), "cancelled")
+
+    def test_rescheduled_entry_replaces_old_times(self):
+        """Test that schedule() supersedes boundaries of an earlier time range"""
+        self.scheduler.resync()
+        ReservationModel.update_reservation(self.reservation_id, DAY.isoformat(), "13:00", "14:00", "Lab")
+        ReservationModel.approve_reservation(self.reservation_id)
+        self.scheduler.schedule(ReservationModel.get_reservation_by_id(self.reservation_id))
+
+        self.clock.now = boundary(DAY, "09:30")
+        self.assertEqual(self.scheduler.run_pending(), [])
+        self.clock.now = boundary(DAY, "13:00")
+        self.assertEqual(self.scheduler.run_pending(), [(self.reservation_id, "ongoing")])
+
+    def test_overdue_reservations_caught_up(self):
+        """Test that boundaries missed while stopped are applied on resync"""
+        self.clock.now = boundary(DAY, "11:00")
+        self.scheduler.resync()
+        applied = dict(self.scheduler.run_pending())
+        self.assertEqual(applied[self.reservation_id], "done")
+        self.assertEqual(self.status(), "done")
+
+    def test_overdue_reservation_skips_ongoing(self):
+        """Test that a reservation already over announces only its done transition"""
+        self.clock.now = boundary(DAY, "11:00")
+        self.scheduler.resync()
+        with mock.patch.object(self.scheduler, "_announce") as announce:
+            self.assertEqual(self.scheduler.run_pending(), [(self.reservation_id, "done")])
+        self.assertEqual([c.args[1] for c in announce.call_args_list], ["done"])
+
+    def test_started_reservation_still_goes_ongoing(self):
+        """Test that a reservation in progress at resync is caught up to ongoing"""
+        self.clock.now = boundary(DAY, "09:30")
+        self.scheduler.resync()
+        self.assertEqual(self.scheduler.run_pending(), [(self.reservation_id, "ongoing")])
+
+    def test_publish_hook(self):
+        """Test that a publish function receives the status event instead of the app client"""
+        messages = []
+        self.scheduler.publish = messages.append
+        self.scheduler.resync()
+        self.clock.now = boundary(DAY, "09:00")
+        self.scheduler.run_pending()
+        self.assertEqual(len(messages), 1)
+        self.assertEqual(messages[0]["type"], "reservation_status")
+        self.assertEqual(messages[0]["target_user_id"], 2)
+        self.assertEqual(messages[0]["payload"]["status"], "ongoing")
+
+    def test_background_thread(self):
+        """Test that the thread starts, applies due transitions and stops"""
+        self.clock.now = boundary(DAY, "09:15")
+        self.scheduler.start()
+        try:
+            for _ in range(50):
+                if self.status() == "ongoing":
+                    break
+                time.sleep(0.02)
+            self.assertEqual(self.status(), "ongoing")
+        finally:
+            self.scheduler.stop()
+        self.assertFalse(self.scheduler.running)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+"""
+Unit Tests for the Synthetic Data Generator
+===========================================
+Seeds a small dataset into the embedded SQLite database and checks its
+volumes, shape and the rollups
+"""
+
+import unittest
+from datetime import date
+
+from tests.helpers import SQLiteTestCase
+from data.database import db
+from data import rollups
+from data.seed import Seeder, bulk_insert, DEFAULT_PASSWORD
+from data.models import UserModel
+
+
+def scalar(query, params=None):
+    db.connect()
+    row = db.fetch_one(query, params)
+    db.disconnect()
+    return list(row.values())[0]
+
+
+class TestSeeder(SQLiteTestCase):
+    """Test cases for Seeder"""
+
+    def seed(self, **options):
+        settings = dict(rooms=6, users=40, reservations=600, years=1, batch_size=100,
+                        today=date(2026, 3, 2), future_days=30)
+        settings.update(options)
+        return Seeder(**settings).run()
+
+    def test_volumes(self):
+        """Test that every table receives the requested number of rows"""
+        before = scalar("SELECT COUNT(*) FROM reservations")
+        counts = self.seed(activity_logs=50, notifications=20)
+        self.assertEqual(counts, {
+            "classrooms": 6, "users": 40, "reservations": 600, "activity_logs": 50, "notifications": 20,
+        })
+        self.assertEqual(scalar("SELECT COUNT(*) FROM reservations"), before + 600)
+
+    def test_batched_inserts(self):
+        """Test that reservations load in batch_size-row statements"""
+        self.seed()
+        inserts = [row for row in db.stats.snapshot() if row["query"].startswith("INSERT INTO reservations")]
+        self.assertEqual(sum(row["calls"] for row in inserts), 6)
+
+    def test_no_overlapping_bookings(self):
+        """Test that generated bookings never overlap within a room"""
+        self.seed()
+        overlaps = scalar("""
+            SELECT COUNT(*) FROM reservations a
+            JOIN reservations b
+                ON a.classroom_id = b.classroom_id AND a.reservation_date = b.reservation_date
+                AND a.id < b.id AND a.start_time < b.end_time AND a.end_time > b.start_time
+            WHERE a.id > 26 AND b.id > 26
+        """)
+        self.assertEqual(overlaps, 0)
+
+    def test_weekdays_busier_than_weekends(self):
+        """Test the weekday distribution"""
+        self.seed()
+        db.connect()
+        rows = db.fetch_all("SELECT reservation_date FROM reservations WHERE id > 26")
+        db.disconnect()
+        weekdays = [0] * 7
+        for row in rows:
+            weekdays[date.fromisoformat(str(row["reservation_date"])[:10]).weekday()] += 1
+        self.assertGreater(min(weekdays[:4]), weekdays[5])
+        self.assertGreater(weekdays[5], weekdays[6])
+
+    def test_shared_password_hash(self):
+        """Test that generated users share one hash and can log in"""
+        self.seed()
+        self.assertEqual(scalar(
+            "SELECT COUNT(DISTINCT password_hash) FROM users WHERE email LIKE %s", ("%@seed.eduroom.test",)
+        ), 1)
+        db.connect()
+        user = db.fetch_one(
+            "SELECT email, id_number FROM users WHERE role = 'faculty' AND email LIKE %s", ("%@seed.eduroom.test",)
+        )
+        db.disconnect()
+        self.assertIsNotNone(UserModel.authenticate_with_email(user["email"], user["id_number"], DEFAULT_PASSWORD))
+
+    def test_rollups_rebuilt_and_triggers_restored(self):
+        """Test that the rollups include the seeded rows and triggers are back"""
+        self.seed()
+        self.assertEqual(scalar("SELECT SUM(reservations) FROM user_daily_rollup"),
+                         scalar("SELECT COUNT(*) FROM reservations"))
+        connection = db.connect()
+        try:
+            for name in rollups.TRIGGERS:
+                self.assertTrue(self.backend.has_trigger(connection, name))
+        finally:
+            db.disconnect()
+
+    def test_same_seed_same_dataset(self):
+        """Test that a fixed seed is reproducible"""
+        first = Seeder(rooms=3, users=10, reservations=50, years=1, seed=7, today=date(2026, 3, 2))
+        second = Seeder(rooms=3, users=10, reservations=50, years=1, seed=7, today=date(2026, 3, 2))
+        rows = lambda seeder: [row[:8] for row in seeder._reservation_rows(1, [1, 2, 3], [1, 2, 3])]
+        self.assertEqual(rows(first), rows(second))
+
+    def test_bulk_insert_partial_batch(self):
+        """Test that a final partial batch is inserted"""
+        db.connect()
+        try:
+            count = bulk_insert(
+                "activity_logs", ["user_id", "action"], ((1, f"Action {n}") for n in range(25)), batch_size=10
+            )
+        finally:
+            db.disconnect()
+        self.assertEqual(count, 25)
+        self.assertEqual(scalar("SELECT COUNT(*) FROM activity_logs WHERE action LIKE %s", ("Action %",)), 25)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,408 @@
+"""
+Unit Tests for the WebSocket Server
+===================================
+Runs the server on a free local port and checks the credential login,
+token handshake and topic routing with real client connections, and the
+per-client send queues with stalled fake clients
+"""
+
+import asyncio
+import json
+import os
+import unittest
+from unittest import mock
+
+import websockets
+
+from utils.security import create_realtime_token, verify_realtime_token
+from utils.websocket_client import RealtimeClient
+from websocket import websocket_server as server
+
+
+class ServerTestCase(unittest.IsolatedAsyncioTestCase):
+    """Starts websocket_server.handler on a free port for each test"""
+
+    async def asyncSetUp(self):
+        server.connected_clients.clear()
+        server.subscriptions.clear()
+        server.client_topics.clear()
+        server.users.clear()
+        server.identities.clear()
+        server.outboxes.clear()
+        server.totals.clear()
+        self.secret = mock.patch.dict(os.environ, {"REALTIME_SECRET": "test-secret"})
+        self.secret.start()
+        self.server = await websockets.serve(server.handler, "localhost", 0)
+        self.url = f"ws://localhost:{self.server.sockets[0].getsockname()[1]}"
+        self.clients = []
+
+    async def asyncTearDown(self):
+        for client in self.clients:
+            await client.close()
+        self.server.close()
+        await self.server.wait_closed()
+        self.secret.stop()
+
+    async def connect(self, *topics, user=None):
+        """Open a client, authenticated as user=(user_id, role) if given"""
+        client = await websockets.connect(self.url)
+        self.clients.append(client)
+        if user:
+            await client.send(json.dumps({"type": "auth", "payload": {"token": create_realtime_token(*user)}}))
+            await self.receive(client)
+        if topics:
+            await client.send(json.dumps({"type": "subscribe", "payload": {"topics": list(topics)}}))
+            await self.receive(client)
+        return client
+
+    async def receive(self, client, timeout=2):
+        return json.loads(await asyncio.wait_for(client.recv(), timeout))
+
+    async def assertNothingReceived(self, client):
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(client.recv(), 0.2)
+
+
+class TestTopicRouting(ServerTestCase):
+    """Test cases for subscriptions and topic fan-out"""
+
+    def test_default_routes(self):
+        """Test the topics derived from the app's own events"""
+        self.assertEqual(
+            server.topics_for({"type": "new_reservation", "payload": {"classroom_id": 3}}),
+            ["role:admin", "classroom:3"]
+        )
+        self.assertEqual(
+            server.topics_for({"type": "reservations_reviewed", "payload": {
+                "approved": [{"user_id": 5, "classroom_id": 3}], "rejected": [{"user_id": 6}]
+            }}),
+            ["user:5", "user:6", "classroom:3"]
+        )
+        self.assertEqual(server.topics_for({"type": "test", "payload": {}}), [])
+        self.assertEqual(server.topics_for({"type": "test", "topics": ["classroom:1"]}), ["classroom:1"])
+        self.assertEqual(
+            server.topics_for({"type": "reservation_approved", "target_user_id": 5, "payload": {"classroom_id": 3}}),
+            ["user:5"]
+        )
+
+    async def test_subscribe_acknowledges_and_rejects_unknown_topics(self):
+        """Test that clients may only choose classroom topics"""
+        client = await self.connect()
+        await client.send(json.dumps({"type": "subscribe", "payload": {"topics": ["classroom:5", "user:5", "everyone"]}}))
+        reply = await self.receive(client)
+        self.assertEqual(reply["payload"], {"topics": ["classroom:5"], "rejected": ["user:5", "everyone"]})
+
+    async def test_events_reach_only_interested_clients(self):
+        """Test that admins get new reservations and only the owner gets the approval"""
+        admin = await self.connect(user=(1, "admin"))
+        owner = await self.connect(user=(5, "faculty"))
+        other = await self.connect(user=(6, "faculty"))
+        watcher = await self.connect("classroom:3")
+
+        await owner.send(json.dumps({"type": "new_reservation", "payload": {"classroom_id": 3}}))
+        self.assertEqual((await self.receive(admin))["type"], "new_reservation")
+        self.assertEqual((await self.receive(watcher))["type"], "new_reservation")
+
+        await admin.send(json.dumps({"type": "reservation_approved", "payload": {"user_id": 5}}))
+        self.assertEqual((await self.receive(owner))["payload"], {"user_id": 5})
+        await self.assertNothingReceived(other)
+        await self.assertNothingReceived(owner)
+
+    async def test_sender_connection_gets_event_with_origin(self):
+        """Test that a subscribed sender's connection gets its event back for its other sessions"""
+        admin = await self.connect(user=(1, "admin"))
+        await admin.send(json.dumps({"type": "new_reservation", "origin": "app-1", "payload": {}}))
+        self.assertEqual((await self.receive(admin))["origin"], "app-1")
+
+    async def test_unsubscribe_and_disconnect(self):
+        """Test that topic sets and the routing table shrink on unsubscribe and disconnect"""
+        client = await self.connect("classroom:3", "classroom:4", user=(5, "faculty"))
+        await client.send(json.dumps({"type": "unsubscribe", "payload": {"topics": ["classroom:3"]}}))
+        self.assertEqual((await self.receive(client))["payload"]["topics"], ["classroom:4", "role:faculty"])
+        self.assertNotIn("classroom:3", server.subscriptions)
+
+        await client.close()
+        for _ in range(50):
+            if not server.subscriptions:
+                break
+            await asyncio.sleep(0.01)
+        self.assertEqual(server.subscriptions, {})
+        self.assertEqual(server.client_topics, {})
+        self.assertEqual(server.users, {})
+
+
+class TestAuthentication(ServerTestCase):
+    """Test cases for the login and token handshake and per-user unicast"""
+
+    def users_table(self, **accounts):
+        """Stand in for the users table: id_number -> (password, user row)"""
+        def authenticate_with_email(email, id_number, password):
+            account = accounts.get(id_number)
+            if account and account[0] == password:
+                return account[1], None
+            return None, None
+        return mock.patch.object(server.UserModel, "authenticate_with_email", side_effect=authenticate_with_email)
+
+    async def test_login_binds_database_identity(self):
+        """Test that the server, not the client, decides the user id and role"""
+        client = await self.connect()
+        with self.users_table(f5=("secret", {"id": 5, "role": "faculty"})):
+            await client.send(json.dumps({"type": "login", "payload": {
+                "email": "f5@school.edu", "id_number": "f5", "password": "secret", "user_id": 1, "role": "admin",
+            }}))
+            payload = (await self.receive(client))["payload"]
+        self.assertEqual((payload["user_id"], payload["role"]), (5, "faculty"))
+        self.assertEqual(verify_realtime_token(payload["token"]), (5, "faculty"))
+        self.assertEqual(len(server.users[5]), 1)
+        self.assertNotIn("role:admin", server.subscriptions)
+
+    async def test_bad_credentials_rejected(self):
+        """Test that a wrong password binds nothing and issues no token"""
+        client = await self.connect()
+        with self.users_table(f5=("secret", {"id": 5, "role": "faculty"})):
+            for payload in ({"id_number": "f5", "password": "guess"}, {"id_number": "admin"}, None):
+                await client.send(json.dumps({"type": "login", "payload": payload}))
+                reply = await self.receive(client)
+                self.assertEqual(reply["type"], "error")
+                self.assertNotIn("token", reply["payload"])
+        self.assertEqual(server.users, {})
+
+    async def test_handshake_binds_user(self):
+        """Test that a server-issued token binds the socket and is renewed"""
+        client = await self.connect()
+        await client.send(json.dumps({"type": "auth", "payload": {"token": create_realtime_token(5, "faculty")}}))
+        payload = (await self.receive(client))["payload"]
+        self.assertEqual((payload["user_id"], payload["role"]), (5, "faculty"))
+        self.assertEqual(verify_realtime_token(payload["token"]), (5, "faculty"))
+        self.assertEqual(len(server.users[5]), 1)
+        self.assertIn("role:faculty", server.subscriptions)
+
+    async def test_service_token_accepted_but_not_login(self):
+        """Test that the service role comes only from a token signed with the secret"""
+        await self.connect(user=(0, "service"))
+        self.assertEqual(server.identities[next(iter(server.users[0]))], (0, "service"))
+        client = await self.connect()
+        with self.users_table(svc=("secret", {"id": 9, "role": "service"})):
+            await client.send(json.dumps({"type": "login", "payload": {"id_number": "svc", "password": "secret"}}))
+            self.assertEqual((await self.receive(client))["type"], "error")
+        self.assertNotIn(9, server.users)
+
+    async def test_scheduler_publishes_in_process(self):
+        """Test that the server-hosted scheduler's events reach the reservation owner"""
+        owner = await self.connect(user=(5, "faculty"))
+        scheduler = mock.Mock()
+        server.start_scheduler(asyncio.get_running_loop(), scheduler)
+        scheduler.start.assert_called_once()
+        await asyncio.to_thread(scheduler.publish, {
+            "type": "reservation_status", "target_user_id": 5, "payload": {"status": "done"},
+        })
+        self.assertEqual((await self.receive(owner))["payload"]["status"], "done")
+
+    async def test_bad_token_rejected(self):
+        """Test that forged and expired tokens are refused"""
+        client = await self.connect()
+        for token in (create_realtime_token(1, "admin")[:-2] + "xx", create_realtime_token(1, "admin", ttl=-1), None):
+            await client.send(json.dumps({"type": "auth", "payload": {"token": token}}))
+            self.assertEqual((await self.receive(client))["type"], "error")
+        self.assertEqual(server.users, {})
+
+    async def test_unauthenticated_cannot_send(self):
+        """Test that events from unauthenticated sockets are not delivered"""
+        admin = await self.connect(user=(1, "admin"))
+        anonymous = await self.connect()
+        await anonymous.send(json.dumps({"type": "new_reservation", "payload": {}}))
+        self.assertEqual((await self.receive(anonymous))["type"], "error")
+        await self.assertNothingReceived(admin)
+
+    async def test_users_cannot_choose_recipients(self):
+        """Test that non-admins cannot forge events for other users or role topics"""
+        admin = await self.connect(user=(1, "admin"))
+        victim = await self.connect(user=(6, "faculty"))
+        faculty = await self.connect(user=(5, "faculty"))
+        for message in (
+            {"type": "reservation_approved", "payload": {"user_id": 6}},
+            {"type": "reservation_status", "target_user_id": 6, "payload": {"status": "done"}},
+            {"type": "new_reservation", "topics": ["role:admin"], "payload": {}},
+        ):
+            await faculty.send(json.dumps(message))
+            self.assertEqual((await self.receive(faculty))["type"], "error")
+        await self.assertNothingReceived(victim)
+        await self.assertNothingReceived(admin)
+
+        await faculty.send(json.dumps({"type": "new_reservation", "payload": {"classroom_id": 3}}))
+        self.assertEqual((await self.receive(admin))["type"], "new_reservation")
+
+    async def test_unicast_to_every_socket_of_user(self):
+        """Test that target_user_id reaches all of the user's connections and nobody else"""
+        admin = await self.connect(user=(1, "admin"))
+        laptop = await self.connect(user=(5, "faculty"))
+        phone = await self.connect(user=(5, "faculty"))
+        colleague = await self.connect(user=(6, "faculty"))
+
+        await admin.send(json.dumps({"type": "reservation_status", "target_user_id": 5, "payload": {"status": "ongoing"}}))
+        self.assertEqual((await self.receive(laptop))["payload"]["status"], "ongoing")
+        self.assertEqual((await self.receive(phone))["payload"]["status"], "ongoing")
+        await self.assertNothingReceived(colleague)
+
+    async def test_logout_unbinds(self):
+        """Test that logout stops delivery of the user's events"""
+        admin = await self.connect(user=(1, "admin"))
+        client = await self.connect(user=(5, "faculty"))
+        await client.send(json.dumps({"type": "logout"}))
+        self.assertEqual((await self.receive(client))["payload"]["user_id"], None)
+        await admin.send(json.dumps({"type": "reservation_approved", "target_user_id": 5, "payload": {}}))
+        await self.assertNothingReceived(client)
+
+    async def test_client_logs_in_and_keeps_token(self):
+        """Test that the app's client trades the credentials for the server's token"""
+        client = RealtimeClient(self.url)
+        client.authenticate("f5@school.edu", "f5", "secret")
+        with self.users_table(f5=("secret", {"id": 5, "role": "faculty"})):
+            client.connect()
+            for _ in range(200):
+                if client.token:
+                    break
+                await asyncio.sleep(0.01)
+        asyncio.run_coroutine_threadsafe(client.websocket.close(), client.loop)
+        await asyncio.to_thread(client.thread.join, 2)
+        self.assertEqual(client.user_id, 5)
+        self.assertEqual(verify_realtime_token(client.token), (5, "faculty"))
+        self.assertIsNone(client._credentials)
+
+    async def test_sessions_sharing_a_client(self):
+        """Test that every session's callback runs, own-origin events included"""
+        client = RealtimeClient(self.url)
+        calls = []
+        client.on("new_reservation", lambda data: calls.append(("admin", data["origin"])), session="admin")
+        client.on("new_reservation", lambda data: calls.append(("faculty", data["origin"])), session="faculty")
+        client.on("new_reservation", lambda data: calls.append(("faculty-2", data["origin"])), session="faculty")
+        await client._handle_message(json.dumps({"type": "new_reservation", "origin": client.origin}))
+        self.assertEqual(calls, [("admin", client.origin), ("faculty-2", client.origin)])
+
+    async def test_failing_callback_isolated(self):
+        """Test that a raising callback neither skips other sessions nor escapes the listener"""
+        client = RealtimeClient(self.url)
+        calls = []
+
+        def broken(data):
+            raise KeyError("payload")
+
+        client.on("new_reservation", broken, session="closed")
+        client.on("new_reservation", lambda data: calls.append("admin"), session="admin")
+        await client._handle_message(json.dumps({"type": "new_reservation"}))
+        self.assertEqual(calls, ["admin"])
+
+    async def test_session_callbacks_removed(self):
+        """Test that off() and sign_out(session) drop only that session's callbacks"""
+        client = RealtimeClient(self.url)
+        calls = []
+        for session in ("admin", "faculty", "faculty-2"):
+            client.on("new_reservation", lambda data, session=session: calls.append(session), session=session)
+            client.on("reservation_approved", lambda data, session=session: calls.append(session), session=session)
+        client.off("faculty")
+        client.sign_out(session="faculty-2")
+        await client._handle_message(json.dumps({"type": "new_reservation"}))
+        await client._handle_message(json.dumps({"type": "reservation_approved"}))
+        self.assertEqual(calls, ["admin", "admin"])
+        self.assertEqual([list(callbacks) for callbacks in client.callbacks.values()], [["admin"], ["admin"]])
+
+    async def test_missing_secret_refuses_to_start(self):
+        """Test that the server will not start without a signing secret"""
+        with mock.patch.dict(os.environ, {"REALTIME_SECRET": ""}):
+            with self.assertRaises(SystemExit):
+                await server.main()
+
+
+
+class StalledSocket:
+    """Fake client whose send() blocks until released"""
+
+    def __init__(self):
+        self.released = asyncio.Event()
+        self.received = []
+        self.close_code = None
+
+    async def send(self, message):
+        await self.released.wait()
+        self.received.append(json.loads(message))
+
+    async def close(self, code=1000, reason=""):
+        self.close_code = code
+
+
+class TestSlowConsumers(ServerTestCase):
+    """Test cases for the bounded per-client send queues"""
+
+    async def add_client(self, socket, topic, **options):
+        outbox = server.Outbox(socket, **options).start()
+        server.outboxes[socket] = outbox
+        server.bind(socket, int(topic.split(":")[1]), "faculty")
+        self.addAsyncCleanup(outbox.close)
+        return outbox
+
+    async def event(self, kind, user_id, n):
+        await server.publish({"type": kind, "payload": {"n": n}}, [f"user:{user_id}"])
+
+    async def test_stalled_client_does_not_delay_others(self):
+        """Test that publish returns while one recipient is stalled"""
+        stalled, fast = StalledSocket(), StalledSocket()
+        fast.released.set()
+        await self.add_client(stalled, "user:5")
+        await self.add_client(fast, "user:6")
+
+        await asyncio.wait_for(server.publish({"type": "reservation_status", "payload": {}}, ["user:5", "user:6"]), 1)
+        await asyncio.sleep(0.05)
+        self.assertEqual(len(fast.received), 1)
+        self.assertEqual(stalled.received, [])
+        self.assertEqual(server.queue_metrics()["queued"], 0)  # the stalled writer holds its message
+
+    async def test_drop_policy_keeps_newest(self):
+        """Test that the oldest messages are dropped past the high-water mark"""
+        socket = StalledSocket()
+        outbox = await self.add_client(socket, "user:5", high_water=2, policy="drop")
+        await self.event("reservation_status", 5, 0)      # taken by the writer
+        await asyncio.sleep(0)
+        for n in range(1, 5):
+            await self.event("reservation_status", 5, n)
+        self.assertEqual(outbox.metrics()["depth"], 2)
+        socket.released.set()
+        await asyncio.sleep(0.05)
+        self.assertEqual([m["payload"]["n"] for m in socket.received], [0, 3, 4])
+        self.assertEqual(server.queue_metrics()["dropped"], 2)
+
+    async def test_coalesce_policy_keeps_newest_of_each_type(self):
+        """Test that a queued message is replaced by a newer one of the same type"""
+        socket = StalledSocket()
+        outbox = await self.add_client(socket, "user:5", high_water=2, policy="coalesce")
+        await self.event("reservation_status", 5, 0)      # taken by the writer
+        await asyncio.sleep(0)
+        await self.event("reservation_status", 5, 1)
+        await self.event("reservation_approved", 5, 2)
+        await self.event("reservation_status", 5, 3)
+        self.assertEqual(outbox.coalesced, 1)
+        socket.released.set()
+        await asyncio.sleep(0.05)
+        self.assertEqual([m["payload"]["n"] for m in socket.received], [0, 2, 3])
+
+    async def test_disconnect_policy_closes_slow_client(self):
+        """Test that a client past the high-water mark is disconnected"""
+        socket = StalledSocket()
+        outbox = await self.add_client(socket, "user:5", high_water=2, policy="disconnect")
+        for n in range(4):
+            await self.event("reservation_status", 5, n)
+        await asyncio.sleep(0)
+        self.assertTrue(outbox.closed)
+        self.assertEqual(socket.close_code, 1013)
+        self.assertEqual(server.queue_metrics()["disconnected"], 1)
+
+    async def test_metrics_request(self):
+        """Test that admins can read the queue metrics"""
+        admin = await self.connect(user=(1, "admin"))
+        await admin.send(json.dumps({"type": "metrics"}))
+        metrics = (await self.receive(admin))["payload"]
+        self.assertEqual(metrics["clients"], 1)
+        self.assertEqual(metrics["high_water"], server.QUEUE_HIGH_WATER)
+
+
+if __name__ == "__main__":
+    unittest.main()
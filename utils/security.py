@@ -1,5 +1,11 @@
 from datetime import datetime, timedelta
+import base64
+import hashlib
+import hmac
+import json
+import os
 import secrets
+import time
 
 # How long a session can be idle before auto-logout
 SESSION_TIMEOUT_MINUTES = 2
@@ -91,3 +97,70 @@ def validate_csrf_token(page, token_from_ui):
     """
     session_token = page.session.get("action_token")
     return bool(session_token and token_from_ui and token_from_ui == session_token)
+
+
+# ========== REALTIME TOKENS (websocket handshake) ==========
+
+# Seconds a realtime token stays valid. Only the websocket server issues
+# tokens (after checking the user's credentials) and it re-issues a fresh
+# one on every handshake, so this bounds how long a disconnected client
+# can resume without logging in again.
+REALTIME_TOKEN_TTL = 12 * 60 * 60
+
+
+def _b64encode(raw):
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _realtime_secret():
+    secret = os.getenv("REALTIME_SECRET")
+    if not secret:
+        raise RuntimeError("REALTIME_SECRET is not set; realtime tokens cannot be issued or checked")
+    return secret
+
+
+def create_realtime_token(user_id, role, ttl=REALTIME_TOKEN_TTL):
+    """
+    Sign a token binding a websocket connection to a user id and role.
+
+    The token is "<payload>.<signature>": base64url JSON {"uid", "role", "exp"}
+    and its HMAC-SHA256 under REALTIME_SECRET. The secret belongs to the
+    websocket server, which issues tokens only after verifying the user's
+    credentials; the app never signs its own. Raises RuntimeError if no
+    secret is configured.
+    """
+    secret = _realtime_secret()
+    payload = _b64encode(json.dumps(
+        {"uid": user_id, "role": role, "exp": int(time.time() + ttl)}, separators=(",", ":")
+    ).encode("utf-8"))
+    signature = hmac.new(secret.encode("utf-8"), payload.encode("ascii"), hashlib.sha256).digest()
+    return f"{payload}.{_b64encode(signature)}"
+
+
+def verify_realtime_token(token):
+    """
+    Check a realtime token's signature and expiry.
+
+    Returns:
+        tuple: (user_id, role), or None if the token is invalid or expired
+
+    Raises RuntimeError if no secret is configured.
+    """
+    secret = _realtime_secret()
+    if not isinstance(token, str) or token.count(".") != 1:
+        return None
+    payload, signature = token.split(".")
+    try:
+        expected = hmac.new(secret.encode("utf-8"), payload.encode("ascii"), hashlib.sha256).digest()
+        if not hmac.compare_digest(expected, _b64decode(signature)):
+            return None
+        claims = json.loads(_b64decode(payload))
+    except (ValueError, UnicodeError):
+        return None
+    if not isinstance(claims, dict) or claims.get("exp", 0) < time.time():
+        return None
+    return claims.get("uid"), claims.get("role")
@@ -2,12 +2,27 @@
 WebSocket Client for Real-Time Updates
 ======================================
 Connects to the WebSocket server and handles real-time messages
+
+After login the client sends the user's credentials to the server once;
+the server checks them against the database and replies with a token it
+signed, which the client keeps (instead of the password) and re-sends when
+it reconnects. The server then routes that user's events (and their
+role's) to this connection. Views may also subscribe to classroom:<id>
+topics, re-sent on every connect as well.
+
+The module-level `realtime` client is shared by the whole process and is
+bound to one user at a time: a later authenticate() re-binds it to the
+newly signed-in user. The desktop app runs one session per process; a
+process serving several sessions at once (Flet web mode, the load
+simulator) would need one RealtimeClient per session to get each user's
+events.
 """
 
 import asyncio
 import websockets
 import json
 import threading
+import uuid
 
 
 class RealtimeClient:
@@ -17,13 +32,90 @@ class RealtimeClient:
         self.url = url
         self.websocket = None
         self.connected = False
-        self.callbacks = {}  # Event type -> callback function
+        self.callbacks = {}  # Event type -> {session: callback function}
+        self.origin = uuid.uuid4().hex  # Stamped on sent events; the server echoes them to this connection too
         self.loop = None
         self.thread = None
+        self.topics = set()  # Topics to receive events for
+        self.user_id = None  # User the server has bound this connection to
+        self.token = None  # Server-issued token, re-sent on reconnect
+        self._credentials = None  # Login waiting for the connection; dropped once sent
+        self._lock = threading.Lock()
+    
+    def on(self, event_type, callback, session=None):
+        """
+        Register a callback for an event type.
+
+        Every session sharing this client keeps its own callback (a later
+        registration for the same session replaces the earlier one), so an
+        event reaches all of them, including events this process sent.
+        Compare data["origin"] with self.origin to tell those apart.
+        Call off(session) when the session ends.
+        """
+        with self._lock:
+            self.callbacks.setdefault(event_type, {})[session] = callback
+    
+    def off(self, session):
+        """Remove every callback `session` registered (when its page closes or signs out)"""
+        with self._lock:
+            for callbacks in self.callbacks.values():
+                callbacks.pop(session, None)
     
-    def on(self, event_type, callback):
-        """Register a callback for an event type"""
-        self.callbacks[event_type] = callback
+    def authenticate(self, email, id_number, password):
+        """
+        Bind this connection to a user so their events are delivered here.
+
+        The server verifies the credentials and decides the user id and
+        role; any user previously bound to this process-wide client is
+        replaced.
+        """
+        credentials = {"email": email, "id_number": id_number, "password": password}
+        with self._lock:
+            if self.user_id is not None:
+                print(f"⚠️ Realtime connection re-bound from user {self.user_id} to a new login")
+            self.token = None
+            connected = self.connected
+            self._credentials = None if connected else credentials
+        if connected:
+            self.send("login", credentials)
+    
+    def authenticate_token(self, token):
+        """Bind this connection with a token signed by the server's secret (service processes)"""
+        with self._lock:
+            self.token = token
+            self._credentials = None
+            connected = self.connected
+        if connected:
+            self.send("auth", {"token": token})
+    
+    def sign_out(self, session=None):
+        """Stop receiving the signed-out user's events and drop `session`'s callbacks"""
+        if session is not None:
+            self.off(session)
+        with self._lock:
+            had_identity = self.token is not None or self._credentials is not None
+            self.user_id = self.token = self._credentials = None
+            connected = self.connected
+        if had_identity and connected:
+            self.send("logout")
+    
+    def subscribe(self, *topics):
+        """Receive events for these topics (e.g. "classroom:3")"""
+        with self._lock:
+            new = [topic for topic in topics if topic not in self.topics]
+            self.topics.update(new)
+            connected = self.connected
+        if new and connected:
+            self.send("subscribe", {"topics": new})
+    
+    def unsubscribe(self, *topics):
+        """Stop receiving events for these topics"""
+        with self._lock:
+            old = [topic for topic in topics if topic in self.topics]
+            self.topics.difference_update(old)
+            connected = self.connected
+        if old and connected:
+            self.send("unsubscribe", {"topics": old})
     
     def connect(self):
         """Connect to WebSocket server in background thread"""
@@ -41,7 +133,18 @@ class RealtimeClient:
         try:
             async with websockets.connect(self.url) as websocket:
                 self.websocket = websocket
-                self.connected = True
+                with self._lock:
+                    token, credentials = self.token, self._credentials
+                    self._credentials = None
+                    topics = sorted(self.topics)
+                    self.connected = True
+                if token:
+                    # The server answers with a fresh token
+                    await websocket.send(json.dumps({"type": "auth", "payload": {"token": token}}))
+                elif credentials:
+                    await websocket.send(json.dumps({"type": "login", "payload": credentials}))
+                if topics:
+                    await websocket.send(json.dumps({"type": "subscribe", "payload": {"topics": topics}}))
                 print(f"✅ Connected to WebSocket server: {self.url}")
                 
                 # Listen for messages
@@ -60,21 +163,45 @@ class RealtimeClient:
         try:
             data = json.loads(message)
             event_type = data.get("type", "unknown")
+
+            if event_type == "authenticated":
+                payload = data.get("payload") or {}
+                with self._lock:
+                    self.user_id = payload.get("user_id")
+                    self.token = payload.get("token")
             
-            # Call the registered callback
-            if event_type in self.callbacks:
-                self.callbacks[event_type](data)
+            # Call every session's registered callback; one that fails must
+            # not stop the others or the listener shared by all sessions
+            with self._lock:
+                callbacks = list(self.callbacks.get(event_type, {}).values())
+            for callback in callbacks:
+                try:
+                    callback(data)
+                except Exception as e:
+                    print(f"❌ Realtime callback for {event_type} failed: {e}")
             
         except json.JSONDecodeError:
             print(f"Invalid JSON received: {message}")
     
-    def send(self, event_type, payload=None):
-        """Send a message to the server"""
+    def send(self, event_type, payload=None, topics=None, target_user_id=None):
+        """
+        Send a message to the server
+        
+        Args:
+            topics (list): deliver to these topics instead of the server's
+                default routing for event_type
+            target_user_id (int or list): deliver only to these users' connections
+        """
         if self.connected and self.loop:
             message = {
                 "type": event_type,
-                "payload": payload or {}
+                "payload": payload or {},
+                "origin": self.origin,
             }
+            if topics is not None:
+                message["topics"] = list(topics)
+            if target_user_id is not None:
+                message["target_user_id"] = target_user_id
             asyncio.run_coroutine_threadsafe(
                 self._send_async(json.dumps(message)),
                 self.loop
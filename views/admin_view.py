@@ -46,7 +46,7 @@ def show_admin_panel(page, user_id, role, name):
             refresh_panel()
         
         # Register callback and connect
-        realtime.on("new_reservation", on_new_reservation)
+        realtime.on("new_reservation", on_new_reservation, session=page)
         if not realtime.connected:
             realtime.connect()
     
@@ -59,7 +59,14 @@ def show_admin_panel(page, user_id, role, name):
         show_admin_panel(page, user_id, role, name)
     
     def handle_approve(reservation_id, room_name, requester):
-        ReservationModel.approve_reservation(reservation_id)
+        if not ReservationModel.approve_reservation(reservation_id):
+            page.open(ft.SnackBar(
+                content=ft.Text(f"Could not approve: {room_name} is already booked at that time"),
+                bgcolor=ft.Colors.RED,
+                duration=4000
+            ))
+            refresh_panel()
+            return
         ActivityLogModel.log_activity(
             user_id, 
             "Approved reservation", 
@@ -79,11 +86,94 @@ def show_admin_panel(page, user_id, role, name):
     # Get all reservations from database
     reservations = ReservationModel.get_all_reservations()
     pending = [r for r in reservations if r["status"] == "pending"]
+    pending_by_id = {r["id"]: r for r in pending}
     approved = [r for r in reservations if r["status"] == "approved"]
     ongoing = [r for r in reservations if r["status"] == "ongoing"]
     done = [r for r in reservations if r["status"] == "done"]
     rejected = [r for r in reservations if r["status"] == "rejected"]
     
+    # Bulk selection of pending reservations
+    selected_ids = set()
+    select_checkboxes = {}
+    selected_count_text = ft.Text("0 selected", size=13, color=ft.Colors.GREY_700)
+    
+    def update_selection_count():
+        selected_count_text.value = f"{len(selected_ids)} selected"
+        page.update()
+    
+    def toggle_selected(reservation_id, checked):
+        if checked:
+            selected_ids.add(reservation_id)
+        else:
+            selected_ids.discard(reservation_id)
+        update_selection_count()
+    
+    def toggle_select_all(e):
+        selected_ids.clear()
+        if e.control.value:
+            selected_ids.update(pending_by_id)
+        for checkbox in select_checkboxes.values():
+            checkbox.value = e.control.value
+        update_selection_count()
+    
+    def handle_bulk_approve(e):
+        if not selected_ids:
+            return
+        result = ReservationModel.bulk_approve(list(selected_ids))
+        ActivityLogModel.log_activities([
+            (user_id, "Approved reservation",
+             f"Approved {pending_by_id[rid]['room_name']} reservation by {pending_by_id[rid]['full_name']}")
+            for rid in result["approved"] if rid in pending_by_id
+        ])
+        message = f"Approved {len(result['approved'])} reservation(s)"
+        if result["conflicts"]:
+            message += f"; {len(result['conflicts'])} skipped because of overlapping bookings"
+        page.open(ft.SnackBar(
+            content=ft.Text(message),
+            bgcolor=ft.Colors.ORANGE if result["conflicts"] else ft.Colors.GREEN,
+            duration=4000
+        ))
+        refresh_panel()
+    
+    def handle_bulk_reject(e):
+        if not selected_ids:
+            return
+        result = ReservationModel.bulk_reject(list(selected_ids))
+        ActivityLogModel.log_activities([
+            (user_id, "Rejected reservation",
+             f"Rejected {pending_by_id[rid]['room_name']} reservation by {pending_by_id[rid]['full_name']}")
+            for rid in result["rejected"] if rid in pending_by_id
+        ])
+        page.open(ft.SnackBar(
+            content=ft.Text(f"Rejected {len(result['rejected'])} reservation(s)"),
+            bgcolor=ft.Colors.RED,
+            duration=4000
+        ))
+        refresh_panel()
+    
+    bulk_bar = ft.Container(
+        content=ft.Row([
+            ft.Checkbox(label="Select all", on_change=toggle_select_all),
+            selected_count_text,
+            ft.Container(expand=True),
+            ft.ElevatedButton(
+                "Approve selected",
+                color="white",
+                bgcolor="#10B981",
+                style=ft.ButtonStyle(shape=ft.RoundedRectangleBorder(radius=16)),
+                on_click=handle_bulk_approve
+            ),
+            ft.ElevatedButton(
+                "Reject selected",
+                color="white",
+                bgcolor="#EF4444",
+                style=ft.ButtonStyle(shape=ft.RoundedRectangleBorder(radius=16)),
+                on_click=handle_bulk_reject
+            ),
+        ], spacing=15),
+        padding=ft.padding.symmetric(horizontal=10, vertical=5),
+    )
+    
     def create_reservation_card(res, show_actions=True):
         """Create a reservation card with optional approve/reject buttons"""
         
@@ -104,6 +194,16 @@ def show_admin_panel(page, user_id, role, name):
         # Create room image path
         image_src = res.get("image_url") if res.get("image_url") else "../assets/images/classroom-default.png"
         
+        # Selection checkbox for bulk actions
+        if show_actions and res["status"] == "pending":
+            checkbox = ft.Checkbox(
+                value=False,
+                on_change=lambda e, rid=res["id"]: toggle_selected(rid, e.control.value)
+            )
+            select_checkboxes[res["id"]] = checkbox
+        else:
+            checkbox = None
+        
         # Left side - Room image
         left_section = ft.Container(
             content=ft.Image(
@@ -161,11 +261,12 @@ def show_admin_panel(page, user_id, role, name):
         
         return ft.Card(
             content=ft.Container(
-                content=ft.Row([
-                    left_section,
-                    middle_section,
-                    right_section
-                ], alignment=ft.MainAxisAlignment.START, vertical_alignment=ft.CrossAxisAlignment.CENTER),
+                content=ft.Row(
+                    ([checkbox] if checkbox else []) + [
+                        left_section,
+                        middle_section,
+                        right_section
+                    ], alignment=ft.MainAxisAlignment.START, vertical_alignment=ft.CrossAxisAlignment.CENTER),
                 padding=15,
                 bgcolor=ft.Colors.WHITE
             ),
@@ -196,7 +297,10 @@ def show_admin_panel(page, user_id, role, name):
         tabs=[
             ft.Tab(
                 text=f"Pending ({len(pending)})",
-                content=create_scrollable_tab_content(pending, "No pending reservations"),
+                content=ft.Column([
+                    bulk_bar,
+                    create_scrollable_tab_content(pending, "No pending reservations"),
+                ], spacing=0, expand=True) if pending else create_scrollable_tab_content(pending, "No pending reservations"),
             ),
             ft.Tab(
                 text=f"Approved ({len(approved)})",
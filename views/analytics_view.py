@@ -35,31 +35,55 @@ def show_analytics_dashboard(page, user_id, role, name):
         """Refresh all analytics data"""
         show_analytics_dashboard(page, user_id, role, name)
     
-    # Fetch analytics data
-    summary = AnalyticsModel.get_reservation_summary()
-    status_data = AnalyticsModel.get_reservations_by_status()
-    popular_rooms = AnalyticsModel.get_popular_classrooms(5)
-    date_trends = AnalyticsModel.get_reservations_by_date(30)
-    time_slots = AnalyticsModel.get_reservations_by_time_slot()
-    faculty_activity = AnalyticsModel.get_faculty_activity()
-    utilization = AnalyticsModel.get_classroom_utilization()
-    approval_stats = AnalyticsModel.get_approval_rate()
-    peak_hours = AnalyticsModel.get_peak_hours()
-    
-    # Fetch derived insights
-    weekly_comparison = AnalyticsModel.get_weekly_comparison()
-    busiest_day = AnalyticsModel.get_busiest_day()
-    avg_daily = AnalyticsModel.get_average_daily_reservations()
-    most_active = AnalyticsModel.get_most_active_faculty()
-    room_recommendation = AnalyticsModel.get_room_recommendation()
-    pending_status = AnalyticsModel.get_pending_bottleneck()
+    # Fetch every metric in one pass (see AnalyticsModel.get_dashboard_snapshot)
+    snapshot = AnalyticsModel.get_dashboard_snapshot(popular_limit=5, trend_days=30)
+    summary = snapshot['summary']
+    status_data = snapshot['by_status']
+    popular_rooms = snapshot['popular_classrooms']
+    date_trends = snapshot['date_trends']
+    time_slots = snapshot['time_slots']
+    faculty_activity = snapshot['faculty_activity']
+    utilization = snapshot['utilization']
+    approval_stats = snapshot['approval']
+    peak_hours = snapshot['peak_hours']
+    
+    # Derived insights
+    weekly_comparison = snapshot['weekly_comparison']
+    busiest_day = snapshot['busiest_day']
+    avg_daily = snapshot['avg_daily']
+    most_active = snapshot['most_active']
+    room_recommendation = snapshot['room_recommendation']
+    occupancy_heatmap = snapshot['occupancy_heatmap']
+    pending_status = snapshot['pending_status']
+    
+    # Sections that failed or timed out render as placeholders
+    unavailable = set(snapshot['unavailable'])
+    
+    def shown(metric, value):
+        return "—" if metric in unavailable else value
+    
+    def table_or_placeholder(metric, title, build, data):
+        return create_unavailable_card(title) if metric in unavailable else build(data)
+    
+    unavailable_banner = ft.Container(
+        content=ft.Row([
+            ft.Icon(ICONS.WARNING_AMBER, size=18, color="#B45309"),
+            ft.Text("Some analytics could not be loaded in time.", size=13, color="#92400E"),
+            ft.TextButton("Retry", on_click=refresh_dashboard),
+        ], spacing=8),
+        bgcolor="#FEF3C7",
+        border_radius=8,
+        padding=ft.padding.symmetric(horizontal=15, vertical=5),
+        width=850,
+        visible=bool(unavailable),
+    )
     
     # Row 1: Status Metrics (4 Columns)
     status_row = ft.Row([
         ft.Container(
             content=ft.Column([
                 ft.Text("TOTAL", size=11, color="#6B7280", weight=ft.FontWeight.W_500),
-                ft.Text(str(summary['total']), size=36, weight=ft.FontWeight.BOLD, color="#111827"),
+                ft.Text(shown('summary', str(summary['total'])), size=36, weight=ft.FontWeight.BOLD, color="#111827"),
                 ft.Row([
                     ft.Icon(ICONS.CALENDAR_MONTH, size=16, color="#3B82F6"),
                     ft.Text("Total Reservations", size=13, color="#3B82F6"),
@@ -73,21 +97,21 @@ def show_analytics_dashboard(page, user_id, role, name):
         ),
         create_modern_stat_card(
             "APPROVED", 
-            str(summary['approved']), 
+            shown('summary', str(summary['approved'])), 
             "Approved Requests",
             ICONS.CHECK_CIRCLE, 
             "#10B981"
         ),
         create_modern_stat_card(
             "PENDING", 
-            str(summary['pending']), 
+            shown('summary', str(summary['pending'])), 
             "Awaiting Review",
             ICONS.HOURGLASS_EMPTY, 
             "#F59E0B"
         ),
         create_modern_stat_card(
             "REJECTED", 
-            str(summary['rejected']), 
+            shown('summary', str(summary['rejected'])), 
             "Declined Requests",
             ICONS.CANCEL, 
             "#EF4444"
@@ -101,15 +125,17 @@ def show_analytics_dashboard(page, user_id, role, name):
     )
     
     # Weekly Trends (Full Width)
-    weekly_trend_card = create_weekly_trends_card(weekly_comparison)
+    weekly_trend_card = table_or_placeholder(
+        'weekly_comparison', "Weekly Trends", create_weekly_trends_card, weekly_comparison
+    )
     
     # Peak Hour, Most Popular Room, Daily Average (3 Columns)
-    peak_hour_text = f"{peak_hours[0]['hour']}:00" if peak_hours else "N/A"
-    most_popular_room = popular_rooms[0]['room_name'] if popular_rooms else "N/A"
+    peak_hour_text = shown('peak_hours', f"{peak_hours[0]['hour']}:00" if peak_hours else "N/A")
+    most_popular_room = shown('popular_classrooms', popular_rooms[0]['room_name'] if popular_rooms else "N/A")
     
     secondary_row = ft.Row([
         create_metric_card("Peak Hour", peak_hour_text, "Highest booking activity", ICONS.ACCESS_TIME, "#F59E0B"),
-        create_metric_card("Daily Average", str(avg_daily), "Reservations per day (30d)", ICONS.SHOW_CHART, "#F59E0B"),
+        create_metric_card("Daily Average", shown('avg_daily', str(avg_daily)), "Reservations per day (30d)", ICONS.SHOW_CHART, "#F59E0B"),
         create_metric_card("Most Popular Room", most_popular_room, "Top requested classroom", ICONS.STAR, "#F59E0B"),
     ], spacing=15, alignment=ft.MainAxisAlignment.CENTER)
     
@@ -117,12 +143,12 @@ def show_analytics_dashboard(page, user_id, role, name):
     bottom_row = ft.Row([
         create_info_card(
             "Most Active Faculty", 
-            most_active['full_name'] if most_active else "N/A",
+            shown('most_active', most_active['full_name'] if most_active else "N/A"),
             f"{most_active['reservation_count']} reservations this month" if most_active else "No data",
         ),
         create_recommendation_card(
             "Recommendation",
-            room_recommendation['room_name'] if room_recommendation else "N/A",
+            shown('room_recommendation', room_recommendation['room_name'] if room_recommendation else "N/A"),
             room_recommendation['message'] if room_recommendation else "No recommendation available",
         ),
     ], spacing=15, alignment=ft.MainAxisAlignment.CENTER)
@@ -131,6 +157,7 @@ def show_analytics_dashboard(page, user_id, role, name):
     page.add(
         ft.Column([
             header,
+            unavailable_banner,
             
             # Title (Fixed)
             ft.Container(
@@ -172,27 +199,31 @@ def show_analytics_dashboard(page, user_id, role, name):
                 ),
                 
                 # Status Distribution
-                create_status_table(status_data),
+                table_or_placeholder('by_status', "Status Distribution", create_status_table, status_data),
                 ft.Container(height=20),
                 
                 # Popular Classrooms
-                create_popular_rooms_table(popular_rooms),
+                table_or_placeholder('popular_classrooms', "Most Popular Classrooms", create_popular_rooms_table, popular_rooms),
                 ft.Container(height=20),
                 
                 # Faculty Activity
-                create_faculty_activity_table(faculty_activity),
+                table_or_placeholder('faculty_activity', "Faculty Activity", create_faculty_activity_table, faculty_activity),
                 ft.Container(height=20),
                 
                 # Recent Trends
-                create_trends_table(date_trends),
+                table_or_placeholder('date_trends', "Recent Trends", create_trends_table, date_trends),
                 ft.Container(height=20),
                 
                 # Time Slot Distribution
-                create_time_slots_table(time_slots),
+                table_or_placeholder('time_slots', "Peak Hours Distribution", create_time_slots_table, time_slots),
                 ft.Container(height=20),
                 
                 # Utilization
-                create_utilization_table(utilization),
+                table_or_placeholder('utilization', "Classroom Utilization", create_utilization_table, utilization),
+                ft.Container(height=20),
+                
+                # Occupancy by weekday and hour
+                table_or_placeholder('occupancy_heatmap', "Weekly Occupancy", create_occupancy_heatmap, occupancy_heatmap),
                 ft.Container(height=20),
             ], 
             horizontal_alignment=ft.CrossAxisAlignment.CENTER,
@@ -208,6 +239,21 @@ def show_analytics_dashboard(page, user_id, role, name):
     page.update()
 
 
+def create_unavailable_card(title):
+    """Placeholder for a section that could not be loaded"""
+    return ft.Container(
+        content=ft.Column([
+            ft.Text(title, size=16, weight=ft.FontWeight.BOLD),
+            ft.Text("Temporarily unavailable - try refreshing", size=14, color="grey"),
+        ]),
+        border=ft.border.all(1, "#E0E0E0"),
+        border_radius=10,
+        padding=15,
+        bgcolor="white",
+        width=850,
+    )
+
+
 def create_modern_stat_card(label, value, subtitle, icon, color):
     """Create modern status card matching the design"""
     return ft.Container(
@@ -702,16 +748,14 @@ def create_utilization_table(utilization):
     rows = []
     
     for item in utilization[:10]:  # Top 10
-        approval_rate = (item['approved_reservations'] / item['total_reservations'] * 100) if item['total_reservations'] > 0 else 0
-        
         rows.append(
             ft.DataRow(
                 cells=[
                     ft.DataCell(ft.Text(item['room_name'], size=14)),
                     ft.DataCell(ft.Text(item['building'], size=14)),
                     ft.DataCell(ft.Text(str(item['total_reservations']), size=14)),
-                    ft.DataCell(ft.Text(str(item['approved_reservations']), size=14)),
-                    ft.DataCell(ft.Text(f"{approval_rate:.1f}%", size=14)),
+                    ft.DataCell(ft.Text(f"{item['booked_hours']:.1f}", size=14)),
+                    ft.DataCell(ft.Text(f"{item['utilization']:.1f}%", size=14)),
                 ]
             )
         )
@@ -724,11 +768,11 @@ def create_utilization_table(utilization):
                     ft.DataColumn(ft.Text("Room", weight=ft.FontWeight.BOLD)),
                     ft.DataColumn(ft.Text("Building", weight=ft.FontWeight.BOLD)),
                     ft.DataColumn(ft.Text("Total", weight=ft.FontWeight.BOLD), numeric=True),
-                    ft.DataColumn(ft.Text("Approved", weight=ft.FontWeight.BOLD), numeric=True),
-                    ft.DataColumn(ft.Text("Rate", weight=ft.FontWeight.BOLD), numeric=True),
+                    ft.DataColumn(ft.Text("Booked (h)", weight=ft.FontWeight.BOLD), numeric=True),
+                    ft.DataColumn(ft.Text("Utilization", weight=ft.FontWeight.BOLD), numeric=True),
                 ],
                 rows=rows,
-                column_spacing=140,
+                column_spacing=120,
                 data_row_min_height=50,
                 data_row_max_height=50,
                 horizontal_margin=0,
@@ -739,4 +783,47 @@ def create_utilization_table(utilization):
         padding=15,
         bgcolor="white",
         width=850,
-    )
\ No newline at end of file
+    )
+
+
+def create_occupancy_heatmap(heatmap, first_hour=7, last_hour=21):
+    """Create weekday × hour grid shaded by the share of each hour booked"""
+    hours = range(first_hour, last_hour)
+    
+    header = ft.Row(
+        [ft.Container(width=90)] + [
+            ft.Container(ft.Text(f"{hour:02d}", size=11, color="grey"), width=44, alignment=ft.alignment.center)
+            for hour in hours
+        ],
+        spacing=4,
+    )
+    
+    grid = [header]
+    for day, row in zip(heatmap['days'], heatmap['utilization']):
+        cells = [ft.Container(ft.Text(day[:3], size=12, weight=ft.FontWeight.BOLD), width=90)]
+        for hour in hours:
+            percent = row[hour]
+            cells.append(
+                ft.Container(
+                    width=44,
+                    height=28,
+                    bgcolor="#2196F3",
+                    opacity=0.08 + 0.92 * percent / 100,
+                    border_radius=3,
+                    tooltip=f"{day} {hour:02d}:00 - {percent:.0f}% booked",
+                )
+            )
+        grid.append(ft.Row(cells, spacing=4))
+    
+    return ft.Container(
+        content=ft.Column([
+            ft.Text("Weekly Occupancy", size=16, weight=ft.FontWeight.BOLD),
+            ft.Text("Share of each hour booked, all classrooms", size=12, color="grey"),
+            ft.Column(grid, spacing=4),
+        ]),
+        border=ft.border.all(1, "#E0E0E0"),
+        border_radius=10,
+        padding=15,
+        bgcolor="white",
+        width=850,
+    )
@@ -16,11 +16,8 @@ def show_dashboard(page, user_id, role, name):
     # Optional: get CSRF token if you ever need it here
     # csrf_token = get_csrf_token(page)
 
-    # Auto-update reservation statuses (approved → ongoing → done)
-    try:
-        ReservationModel.update_reservation_statuses()
-    except Exception:
-        pass  # Silently fail if database is unavailable
+    # Reservation statuses (approved → ongoing → done) are kept current by
+    # the background scheduler started in main.py (data/scheduler.py)
 
     # Create header with photo
     header, drawer = create_app_header(page, user_id, role, name, current_page="classrooms")
@@ -4,6 +4,12 @@ from data.models import UserModel, ActivityLogModel
 from views.dashboard_view import show_dashboard
 from utils.security import touch_session, get_csrf_token
 
+try:
+    from utils.websocket_client import realtime
+    REALTIME_ENABLED = True
+except ImportError:
+    REALTIME_ENABLED = False
+
 
 def show_login(page):
     """Display the enhanced login page with database authentication"""
@@ -168,6 +174,11 @@ def show_login(page):
             touch_session(page)       # sets last_activity
             get_csrf_token(page)      # generates & stores action_token
 
+            # Route this user's realtime events to this app's connection
+            # (the websocket server re-checks the credentials itself)
+            if REALTIME_ENABLED:
+                realtime.authenticate(email, id_number, password)
+
             # Login successful - navigate to dashboard
             show_dashboard(page, user['id'], user['role'], user['full_name'])
         else:
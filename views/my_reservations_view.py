@@ -60,8 +60,29 @@ def show_my_reservations(page, user_id, role, name):
                 page.update()
                 refresh_view()
         
-        realtime.on("reservation_approved", on_reservation_approved)
-        realtime.on("reservation_rejected", on_reservation_rejected)
+        def on_reservations_reviewed(data):
+            """Handle a batch of approvals/rejections from the admin panel"""
+            payload = data['payload']
+            approved = [item for item in payload.get('approved', []) if item.get('user_id') == user_id]
+            rejected = [item for item in payload.get('rejected', []) if item.get('user_id') == user_id]
+            if not approved and not rejected:
+                return
+            parts = []
+            if approved:
+                parts.append(f"{len(approved)} approved")
+            if rejected:
+                parts.append(f"{len(rejected)} rejected")
+            page.open(ft.SnackBar(
+                content=ft.Text(f"Your reservations were reviewed: {', '.join(parts)}"),
+                bgcolor=ft.Colors.GREEN if not rejected else ft.Colors.ORANGE,
+                duration=4000
+            ))
+            page.update()
+            refresh_view()
+        
+        realtime.on("reservation_approved", on_reservation_approved, session=page)
+        realtime.on("reservations_reviewed", on_reservations_reviewed, session=page)
+        realtime.on("reservation_rejected", on_reservation_rejected, session=page)
         if not realtime.connected:
             realtime.connect()
     
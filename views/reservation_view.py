@@ -1,13 +1,19 @@
 import flet as ft
 from utils.config import ICONS, COLORS
-from data.models import ClassroomModel, ReservationModel, ActivityLogModel
-from datetime import datetime
+from data.models import ClassroomModel, ReservationModel, ActivityLogModel, MAX_SERIES_OCCURRENCES
+from datetime import datetime, timedelta
+from data.availability import to_minutes
 from components.app_header import create_app_header
 from components.datetime_picker import DateTimePicker
 from utils.security import ensure_authenticated, touch_session, get_csrf_token
 
-def show_reservation_form(page, user_id, role, name, classroom_id):
-    """Display the reservation form for faculty to book classrooms"""
+def show_reservation_form(page, user_id, role, name, classroom_id, preset=None):
+    """
+    Display the reservation form for faculty to book classrooms
+    
+    Args:
+        preset (dict): Optional suggested slot (reservation_date, start_time, end_time) to pre-fill
+    """
     
     # Session guard
     if not ensure_authenticated(page):
@@ -127,9 +133,119 @@ def show_reservation_form(page, user_id, role, name, classroom_id):
         bgcolor="#FAFAFA",
     )
     
+    # Recurrence options (weekly series)
+    repeat_dropdown = ft.Dropdown(
+        label="Repeat",
+        value="none",
+        options=[
+            ft.dropdown.Option("none", "Does not repeat"),
+            ft.dropdown.Option("1", "Weekly"),
+            ft.dropdown.Option("2", "Every 2 weeks"),
+        ],
+        width=210,
+        border_radius=10,
+        text_size=14,
+        border_color="#E0E0E0",
+        focused_border_color="#4A7BA7",
+    )
+    until_text = ft.Text("Repeat until", size=15, color=ft.Colors.GREY_600, weight=ft.FontWeight.W_500)
+    until_date = {"value": None}
+    skip_conflicts_checkbox = ft.Checkbox(label="Skip dates that are already booked", value=False, visible=False)
+    
+    def on_until_selected(e):
+        until_date["value"] = e.control.value
+        until_text.value = e.control.value.strftime('%B %d, %Y')
+        until_text.color = "#212121"
+        page.update()
+    
+    def open_until_picker(e):
+        page.open(
+            ft.DatePicker(
+                first_date=datetime.now(),
+                last_date=datetime.now() + timedelta(days=365),
+                on_change=on_until_selected
+            )
+        )
+    
+    def on_repeat_changed(e):
+        until_button.visible = repeat_dropdown.value != "none"
+        skip_conflicts_checkbox.visible = repeat_dropdown.value != "none"
+        check_form_ready()
+    
+    repeat_dropdown.on_change = on_repeat_changed
+    
+    until_button = ft.Container(
+        content=ft.Row([
+            ft.Icon(ft.Icons.EVENT_REPEAT, size=20, color=ft.Colors.GREY_600),
+            until_text,
+        ], spacing=10),
+        padding=ft.padding.symmetric(horizontal=18, vertical=16),
+        border=ft.border.all(2, "#E0E0E0"),
+        border_radius=10,
+        bgcolor="#FAFAFA",
+        on_click=open_until_picker,
+        ink=True,
+        width=210,
+        visible=False,
+    )
+    
     success_text = ft.Text("", size=13, weight=ft.FontWeight.W_500)
     availability_text = ft.Text("", size=13, weight=ft.FontWeight.W_500)
     submit_button_ref = ft.Ref[ft.ElevatedButton]()
+    suggestions_ref = ft.Ref[ft.Column]()
+    
+    def apply_slot(slot):
+        """Fill the form with a suggested slot"""
+        date = datetime.strptime(slot["reservation_date"], '%Y-%m-%d')
+        datetime_picker.set_values(date, slot["start_time"], slot["end_time"])
+        on_date_selected(date)
+        on_start_time_selected(slot["start_time"])
+        on_end_time_selected(slot["end_time"])
+        check_form_ready()
+    
+    def choose_suggestion(slot):
+        """Use a suggested slot, opening the other room's form if needed"""
+        if slot["classroom_id"] == classroom_id:
+            apply_slot(slot)
+        else:
+            show_reservation_form(page, user_id, role, name, slot["classroom_id"], preset=slot)
+    
+    def show_suggestions(date, start_time, end_time):
+        """Suggest the nearest free windows of the same length"""
+        duration = to_minutes(end_time) - to_minutes(start_time)
+        suggestions = []
+        if duration > 0:
+            first_day = date.date() if isinstance(date, datetime) else date
+            # This room first, then similar rooms
+            suggestions = ReservationModel.find_free_slots(
+                duration, (first_day, first_day + timedelta(days=6)),
+                classroom_ids=[classroom_id], limit=3, not_before=datetime.now()
+            ) + ReservationModel.find_free_slots(
+                duration, (first_day, first_day),
+                min_capacity=classroom['capacity'], limit=4, not_before=datetime.now()
+            )
+        
+        seen = set()
+        controls = []
+        for slot in suggestions:
+            key = (slot["classroom_id"], slot["reservation_date"], slot["start_time"])
+            if key in seen:
+                continue
+            seen.add(key)
+            slot_date = datetime.strptime(slot["reservation_date"], '%Y-%m-%d')
+            controls.append(
+                ft.TextButton(
+                    f"{slot['room_name']} · {slot_date.strftime('%b %d')} · "
+                    f"{slot['start_time']} - {slot['end_time']}",
+                    icon=ft.Icons.EVENT_AVAILABLE,
+                    on_click=lambda e, slot=slot: choose_suggestion(slot),
+                )
+            )
+        
+        if controls:
+            controls.insert(0, ft.Text("Free alternatives:", size=13, weight=ft.FontWeight.BOLD, color="#424242"))
+        suggestions_ref.current.controls = controls
+        suggestions_ref.current.visible = bool(controls)
     
     def validate_availability(date, start_time, end_time):
         """Validate if the selected time slot is available"""
@@ -148,11 +264,13 @@ def show_reservation_form(page, user_id, role, name, classroom_id):
             availability_text.value = "⚠  This time slot is already booked! Please select a different time."
             availability_text.color = "#D32F2F"
             submit_button_ref.current.disabled = True
+            show_suggestions(date, start_time, end_time)
             page.update()
             return False
         else:
             availability_text.value = "✓  Time slot is available for booking"
             availability_text.color = "#2E7D32"
+            suggestions_ref.current.visible = False
             page.update()
             return True
     
@@ -167,7 +285,9 @@ def show_reservation_form(page, user_id, role, name, classroom_id):
                     values["start_time"],
                     values["end_time"]
                 )
-                submit_button_ref.current.disabled = not is_available
+                # A series may still be booked around a taken first date
+                # (create_recurring_reservation reports or skips conflicts)
+                submit_button_ref.current.disabled = not is_available and repeat_dropdown.value == "none"
         else:
             submit_button_ref.current.disabled = True
         page.update()
@@ -191,6 +311,11 @@ def show_reservation_form(page, user_id, role, name, classroom_id):
         # Format date for database (convert datetime to string)
         date_str = values["date"].strftime('%Y-%m-%d')
         
+        # A series checks every date itself (and can skip taken ones)
+        if repeat_dropdown.value != "none":
+            submit_series(values, date_str)
+            return
+        
         # Double-check availability before submitting
         is_available = ReservationModel.check_availability(
             classroom_id,
@@ -231,6 +356,53 @@ def show_reservation_form(page, user_id, role, name, classroom_id):
             success_text.color = "#D32F2F"
             page.update()
     
+    def submit_series(values, date_str):
+        """Create a weekly series from the form values"""
+        if not until_date["value"]:
+            success_text.value = "⚠  Please choose a repeat-until date"
+            success_text.color = "#D32F2F"
+            page.update()
+            return
+        
+        result = ReservationModel.create_recurring_reservation(
+            classroom_id,
+            user_id,
+            date_str,
+            until_date["value"].strftime('%Y-%m-%d'),
+            values["start_time"],
+            values["end_time"],
+            purpose.value,
+            interval_weeks=int(repeat_dropdown.value),
+            skip_conflicts=skip_conflicts_checkbox.value,
+        )
+        
+        if not result["series_id"]:
+            if result["too_many"]:
+                success_text.value = (
+                    f"⚠  A series can have at most {MAX_SERIES_OCCURRENCES} dates. "
+                    "Please choose an earlier repeat-until date."
+                )
+            elif result["conflicts"]:
+                booked = ", ".join(
+                    datetime.strptime(c["reservation_date"], '%Y-%m-%d').strftime('%b %d')
+                    for c in result["conflicts"]
+                )
+                success_text.value = f"⚠  Already booked on: {booked}. Tick 'Skip dates' to book the rest."
+            else:
+                success_text.value = "⚠  Failed to create reservations. Please try again."
+            success_text.color = "#D32F2F"
+            page.update()
+            return
+        
+        ActivityLogModel.log_activity(
+            user_id,
+            "Created recurring reservation",
+            f"Reserved {classroom['room_name']} on {len(result['reservation_ids'])} dates from {date_str}"
+        )
+        
+        from views.dashboard_view import show_dashboard
+        show_dashboard(page, user_id, role, name)
+    
     def back_to_dashboard(e):
         from views.dashboard_view import show_dashboard
         show_dashboard(page, user_id, role, name)
@@ -431,6 +603,28 @@ def show_reservation_form(page, user_id, role, name, classroom_id):
                             width=450
                         ),
                         
+                        # Free alternatives when the chosen slot is taken
+                        ft.Column(
+                            ref=suggestions_ref,
+                            controls=[],
+                            spacing=2,
+                            width=450,
+                            visible=False,
+                        ),
+                        
+                        ft.Container(height=25),
+                        
+                        # Recurrence section
+                        ft.Column([
+                            ft.Text("Recurrence", size=13, weight=ft.FontWeight.BOLD, color="#424242"),
+                            ft.Container(height=8),
+                            ft.Row([
+                                repeat_dropdown,
+                                until_button,
+                            ], spacing=30, alignment=ft.MainAxisAlignment.START),
+                            skip_conflicts_checkbox,
+                        ], spacing=0),
+                        
                         ft.Container(height=25),
                         
                         # Purpose section
@@ -499,4 +693,8 @@ def show_reservation_form(page, user_id, role, name, classroom_id):
             )
         ], spacing=0, expand=True)
     )
-    page.update()
\ No newline at end of file
+    page.update()
+    
+    # Pre-fill a slot picked from another room's suggestions
+    if preset:
+        apply_slot(preset)
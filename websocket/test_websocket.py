@@ -1,15 +1,28 @@
-"""Quick test for WebSocket"""
+"""Quick test for WebSocket (run on the server host: signs tokens with its REALTIME_SECRET)"""
 import asyncio
+import json
+import os
+import sys
 import websockets
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.security import create_realtime_token
+
+load_dotenv()
 
 async def test():
     uri = "ws://localhost:8765"
     try:
-        async with websockets.connect(uri) as websocket:
+        async with websockets.connect(uri) as listener, websockets.connect(uri) as websocket:
             print("✅ Connected!")
-            await websocket.send('{"type": "test", "payload": {"msg": "Hello!"}}')
+            await listener.send(json.dumps({"type": "auth", "payload": {"token": create_realtime_token(1, "admin")}}))
+            await websocket.send(json.dumps({"type": "auth", "payload": {"token": create_realtime_token(2, "admin")}}))
+            print(f"✅ Authenticated: {await asyncio.wait_for(listener.recv(), timeout=5)}")
+            await asyncio.wait_for(websocket.recv(), timeout=5)
+            await websocket.send('{"type": "test", "topics": ["role:admin"], "payload": {"msg": "Hello!"}}')
             print("✅ Message sent!")
-            response = await asyncio.wait_for(websocket.recv(), timeout=5)
+            response = await asyncio.wait_for(listener.recv(), timeout=5)
             print(f"✅ Received: {response}")
     except ConnectionRefusedError:
         print("❌ Server not running!")
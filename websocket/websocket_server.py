@@ -2,58 +2,488 @@
 WebSocket Server for Real-Time Updates
 =======================================
 Run this separately: python websocket_server.py
+
+Features:
+- Authenticated handshake: a client logs in with {"type": "login", "payload":
+  {"email", "id_number", "password"}}, checked against the users table
+  (with its lockout) off the event loop. The server is the only token
+  issuer: the "authenticated" reply carries a token signed with its
+  REALTIME_SECRET, which the client re-sends as {"type": "auth", "payload":
+  {"token": ...}} when it reconnects. The socket is then bound to the user
+  id and the role from the database (role:<role> and user:<id> topics)
+- Refuses to start without REALTIME_SECRET
+- Runs the status scheduler (approved -> ongoing -> done) and publishes
+  its events in-process, unless STATUS_SCHEDULER=0; a standalone
+  `python -m data.scheduler` authenticates with a "service" token instead
+- Routing table from user id to sockets, so user events are unicast
+  (message "target_user_id", or user:<id> topics)
+- Topic subscriptions: clients send {"type": "subscribe", "payload": {"topics": [...]}}
+  (and "unsubscribe") for classroom:<id>
+- Events go only to clients on one of their topics; only authenticated
+  clients may send events. Admins and services may name the recipients
+  with the message's "topics"/"target_user_id"; everyone else may only
+  send USER_EVENTS, whose topics the server derives from ROUTES
+- The sending connection gets its own event back if subscribed, since
+  other app sessions may share it; clients stamp an "origin" id on what
+  they send so handlers can tell their own events
+- Per-client bounded send queues drained by a writer task, so a slow
+  client never delays delivery to the others. Past WS_QUEUE_HIGH_WATER
+  queued messages, WS_SLOW_CLIENT_POLICY decides: drop the oldest,
+  coalesce (keep only the newest message of each type) or disconnect
+- Queue-depth metrics: queue_metrics(), a "metrics" request from admins,
+  and a log line every WS_METRICS_INTERVAL seconds
 """
 
 import asyncio
+from collections import Counter, deque
+import os
+import re
+import sys
 import websockets
 import json
 
-# Store all connected clients
+from dotenv import load_dotenv
+
+# Make utils/ importable when run as `python websocket_server.py`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.models import UserModel
+from data.scheduler import status_scheduler
+from utils.security import create_realtime_token, verify_realtime_token
+
+load_dotenv()
+
+# Slow-consumer handling
+QUEUE_HIGH_WATER = int(os.getenv("WS_QUEUE_HIGH_WATER", "100"))
+SLOW_CLIENT_POLICIES = ("drop", "coalesce", "disconnect")
+SLOW_CLIENT_POLICY = os.getenv("WS_SLOW_CLIENT_POLICY", "coalesce")
+METRICS_INTERVAL = float(os.getenv("WS_METRICS_INTERVAL", "60"))
+
+# Run the status scheduler here (set to 0 when `python -m data.scheduler` runs instead)
+STATUS_SCHEDULER = os.getenv("STATUS_SCHEDULER", "1") != "0"
+
+# Store all connected clients, and each client's outbound queue
 connected_clients = set()
+outboxes = {}
+
+# Messages dropped/coalesced and clients disconnected since startup
+totals = Counter()
+
+# topic -> clients subscribed to it, and client -> its topics
+subscriptions = {}
+client_topics = {}
+
+# user id -> authenticated sockets, and socket -> (user_id, role)
+users = {}
+identities = {}
+
+ROLES = ("admin", "faculty", "student")
+
+# Role of processes holding REALTIME_SECRET themselves (the standalone
+# status scheduler); only accepted from tokens, never from a login
+SERVICE_ROLE = "service"
+
+# Roles that may choose an event's recipients ("topics"/"target_user_id")
+PUBLISHER_ROLES = ("admin", SERVICE_ROLE)
+
+# Events everyone else may send; their recipients always come from ROUTES
+USER_EVENTS = ("new_reservation",)
+
+# Topics clients may subscribe to; role and user topics come from the token
+TOPIC_PATTERN = re.compile(r"^classroom:\d+$")
+
+
+def _ids(payload, key, prefix):
+    """Topics for payload[key] and for the same key in approved/rejected items"""
+    values = [payload.get(key)]
+    for item in payload.get("approved", []) + payload.get("rejected", []):
+        values.append(item.get(key))
+    return [f"{prefix}:{value}" for value in values if value is not None]
+
+
+# Event type -> function(payload) returning the topics interested in it
+ROUTES = {
+    "new_reservation": lambda p: ["role:admin"] + _ids(p, "classroom_id", "classroom"),
+    "reservation_approved": lambda p: _ids(p, "user_id", "user") + _ids(p, "classroom_id", "classroom"),
+    "reservation_rejected": lambda p: _ids(p, "user_id", "user") + _ids(p, "classroom_id", "classroom"),
+    "reservations_reviewed": lambda p: _ids(p, "user_id", "user") + _ids(p, "classroom_id", "classroom"),
+    "reservation_status": lambda p: _ids(p, "user_id", "user") + _ids(p, "classroom_id", "classroom"),
+}
+
+
+def topics_for(message):
+    """Topics a message should be delivered to"""
+    topics = message.get("topics")
+    targets = message.get("target_user_id")
+    if isinstance(topics, list) or targets is not None:
+        topics = [topic for topic in topics or [] if isinstance(topic, str)]
+        if targets is not None:
+            targets = targets if isinstance(targets, list) else [targets]
+            topics += [f"user:{user_id}" for user_id in targets]
+        return topics
+    route = ROUTES.get(message.get("type"))
+    payload = message.get("payload")
+    if route is None or not isinstance(payload, dict):
+        return []
+    return route(payload)
+
+
+def _join(websocket, topic):
+    subscriptions.setdefault(topic, set()).add(websocket)
+    client_topics.setdefault(websocket, set()).add(topic)
+
+
+def subscribe(websocket, topics):
+    """Add a client to the valid topics; returns (accepted, rejected)"""
+    accepted, rejected = [], []
+    for topic in topics:
+        if isinstance(topic, str) and TOPIC_PATTERN.match(topic):
+            _join(websocket, topic)
+            accepted.append(topic)
+        else:
+            rejected.append(topic)
+    return accepted, rejected
+
+
+def unsubscribe(websocket, topics=None):
+    """Remove a client from some (default: all) of its topics"""
+    mine = client_topics.get(websocket, set())
+    for topic in list(mine if topics is None else topics):
+        clients = subscriptions.get(topic)
+        if clients is not None:
+            clients.discard(websocket)
+            if not clients:
+                del subscriptions[topic]
+        mine.discard(topic)
+    if not mine:
+        client_topics.pop(websocket, None)
+
+
+def bind(websocket, user_id, role):
+    """Route user:<user_id> and role:<role> events to this socket"""
+    unbind(websocket)
+    identities[websocket] = (user_id, role)
+    users.setdefault(user_id, set()).add(websocket)
+    _join(websocket, f"role:{role}")
+
+
+def unbind(websocket):
+    """Forget the user a socket was authenticated as"""
+    identity = identities.pop(websocket, None)
+    if identity is None:
+        return
+    user_id, role = identity
+    sockets = users.get(user_id)
+    if sockets is not None:
+        sockets.discard(websocket)
+        if not sockets:
+            del users[user_id]
+    unsubscribe(websocket, [f"role:{role}"])
+
+
+def clients_for(topic):
+    """Sockets on a topic; user:<id> topics use the routing table"""
+    if topic.startswith("user:"):
+        try:
+            return users.get(int(topic[5:]), set())
+        except ValueError:
+            return set()
+    return subscriptions.get(topic, set())
+
+
+class Outbox:
+    """
+    Bounded outbound queue for one client, drained by its own writer task.
+
+    put() never waits, so publishing costs the same whether the client
+    is fast or stalled. When `high_water` messages are already waiting,
+    the policy applies:
+    - "drop": discard the oldest queued message
+    - "coalesce": replace the queued message of the same type (the views
+      refresh from the database on any event, so only the newest matters);
+      drop the oldest if there is none
+    - "disconnect": close the connection; the client reconnects and
+      reloads its view
+    """
+
+    def __init__(self, websocket, high_water=None, policy=None):
+        self.websocket = websocket
+        self.high_water = QUEUE_HIGH_WATER if high_water is None else high_water
+        self.policy = policy or SLOW_CLIENT_POLICY
+        if self.policy not in SLOW_CLIENT_POLICIES:
+            print(f"⚠️ Unknown WS_SLOW_CLIENT_POLICY {self.policy!r}; using coalesce")
+            self.policy = "coalesce"
+        self.queue = deque()  # (kind, message_json)
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.max_depth = 0
+        self.closed = False
+        self._ready = asyncio.Event()
+        self._task = None
+        self._closing = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._writer())
+        return self
+
+    def put(self, message_json, kind=None):
+        """Queue a message; returns False if it was not queued"""
+        if self.closed:
+            return False
+        if len(self.queue) >= self.high_water:
+            if self.policy == "disconnect":
+                self.disconnect()
+                return False
+            if not (self.policy == "coalesce" and kind is not None and self._coalesce(kind)):
+                self.queue.popleft()
+                self.dropped += 1
+                totals["dropped"] += 1
+        self.queue.append((kind, message_json))
+        self.max_depth = max(self.max_depth, len(self.queue))
+        self._ready.set()
+        return True
+
+    def _coalesce(self, kind):
+        for index, (queued_kind, _) in enumerate(self.queue):
+            if queued_kind == kind:
+                del self.queue[index]
+                self.coalesced += 1
+                totals["coalesced"] += 1
+                return True
+        return False
+
+    def disconnect(self):
+        """Close a client that cannot keep up"""
+        self.closed = True
+        self.queue.clear()
+        totals["disconnected"] += 1
+        print(f"🐢 Disconnecting slow client ({self.high_water} messages queued)")
+        self._closing = asyncio.create_task(self.websocket.close(1013, "Client too slow"))
+
+    async def _writer(self):
+        try:
+            while not self.closed:
+                if not self.queue:
+                    self._ready.clear()
+                    await self._ready.wait()
+                    continue
+                _, message_json = self.queue.popleft()
+                await self.websocket.send(message_json)
+                self.sent += 1
+        except websockets.exceptions.ConnectionClosed:
+            self.closed = True
+            self.queue.clear()
+
+    async def close(self):
+        """Stop the writer task"""
+        self.closed = True
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def metrics(self):
+        return {
+            "depth": len(self.queue), "max_depth": self.max_depth, "sent": self.sent,
+            "dropped": self.dropped, "coalesced": self.coalesced,
+        }
+
+
+def queue_metrics():
+    """Queue depths across clients and slow-consumer counters since startup"""
+    depths = sorted(len(outbox.queue) for outbox in outboxes.values())
+    return {
+        "clients": len(outboxes),
+        "queued": sum(depths),
+        "max_depth": depths[-1] if depths else 0,
+        "over_half_full": sum(1 for depth in depths if depth * 2 >= QUEUE_HIGH_WATER),
+        "high_water": QUEUE_HIGH_WATER,
+        "policy": SLOW_CLIENT_POLICY,
+        "dropped": totals["dropped"],
+        "coalesced": totals["coalesced"],
+        "disconnected": totals["disconnected"],
+    }
+
+
+def reply(websocket, message):
+    """Queue a server reply to one client"""
+    outbox = outboxes.get(websocket)
+    if outbox is not None:
+        outbox.put(json.dumps(message))
 
 
 async def handler(websocket):
     """Handle WebSocket connections (new API - no path parameter)"""
     # Register new client
     connected_clients.add(websocket)
+    outboxes[websocket] = Outbox(websocket).start()
     print(f"✅ Client connected. Total clients: {len(connected_clients)}")
-    
+
     try:
         async for message in websocket:
             # Parse incoming message
-            data = json.loads(message)
-            print(f"📨 Received: {data}")
-            
-            # Broadcast to ALL connected clients (including sender)
-            await broadcast(data)
-            
+            try:
+                data = json.loads(message)
+            except json.JSONDecodeError:
+                print(f"Invalid JSON received: {message}")
+                continue
+            if not isinstance(data, dict):
+                continue
+
+            if data.get("type") in ("login", "auth"):
+                payload = data.get("payload") or {}
+                if data["type"] == "login":
+                    identity = await asyncio.to_thread(check_credentials, payload)
+                    roles = ROLES
+                    failure = "Invalid credentials"
+                else:
+                    identity = verify_realtime_token(payload.get("token"))
+                    roles = ROLES + (SERVICE_ROLE,)
+                    failure = "Invalid or expired token"
+                if identity and identity[1] in roles:
+                    bind(websocket, *identity)
+                    reply(websocket, {"type": "authenticated", "payload": {
+                        "user_id": identity[0], "role": identity[1], "token": create_realtime_token(*identity),
+                    }})
+                else:
+                    unbind(websocket)
+                    reply(websocket, {"type": "error", "payload": {"message": failure}})
+                continue
+
+            if data.get("type") == "logout":
+                unbind(websocket)
+                reply(websocket, {"type": "authenticated", "payload": {"user_id": None, "role": None}})
+                continue
+
+            if data.get("type") in ("subscribe", "unsubscribe"):
+                topics = (data.get("payload") or {}).get("topics") or []
+                if data["type"] == "subscribe":
+                    accepted, rejected = subscribe(websocket, topics)
+                else:
+                    unsubscribe(websocket, topics)
+                    accepted, rejected = [], []
+                reply(websocket, {
+                    "type": "subscriptions",
+                    "payload": {"topics": sorted(client_topics.get(websocket, ())), "rejected": rejected},
+                })
+                continue
+
+            if websocket not in identities:
+                reply(websocket, {"type": "error", "payload": {"message": "Authenticate before sending events"}})
+                continue
+
+            if data.get("type") == "metrics" and identities[websocket][1] == "admin":
+                reply(websocket, {"type": "metrics", "payload": queue_metrics()})
+                continue
+
+            if not may_send(identities[websocket][1], data):
+                reply(websocket, {"type": "error", "payload": {"message": "Not allowed to send this event"}})
+                continue
+
+            # Deliver to interested clients only
+            await publish(data, topics_for(data))
+
     except websockets.exceptions.ConnectionClosed:
         print("❌ Client disconnected")
     finally:
         # Remove client on disconnect
         connected_clients.discard(websocket)
+        unbind(websocket)
+        unsubscribe(websocket)
+        outbox = outboxes.pop(websocket, None)
+        if outbox is not None:
+            await outbox.close()
         print(f"📊 Remaining clients: {len(connected_clients)}")
 
 
-async def broadcast(message):
-    """Send message to all connected clients"""
-    if connected_clients:
-        message_json = json.dumps(message)
-        # Send to all clients
-        await asyncio.gather(
-            *[client.send(message_json) for client in connected_clients],
-            return_exceptions=True
+def may_send(role, message):
+    """
+    Whether a sender with `role` may publish `message`: admins and services
+    may send anything to anyone; other users only USER_EVENTS, routed by
+    the server (no "topics" or "target_user_id" of their own)
+    """
+    if role in PUBLISHER_ROLES:
+        return True
+    return (message.get("type") in USER_EVENTS
+            and "topics" not in message and "target_user_id" not in message)
+
+
+def check_credentials(credentials):
+    """
+    Verify login credentials against the users table.
+
+    Returns:
+        tuple: (user_id, role) from the database, or None
+    """
+    if not isinstance(credentials, dict):
+        return None
+    try:
+        user, _ = UserModel.authenticate_with_email(
+            str(credentials.get("email") or ""),
+            str(credentials.get("id_number") or ""),
+            str(credentials.get("password") or ""),
         )
-        print(f"📢 Broadcasted to {len(connected_clients)} client(s)")
+    except Exception as e:
+        print(f"❌ Credential check failed: {e}")
+        return None
+    return (user["id"], user["role"]) if user else None
+
+
+async def publish(message, topics):
+    """
+    Queue message for the clients subscribed to any of `topics`. Returns
+    without waiting for any client to receive it.
+    """
+    recipients = set()
+    for topic in topics:
+        recipients |= clients_for(topic)
+    if recipients:
+        message_json = json.dumps(message)
+        for client in recipients:
+            outbox = outboxes.get(client)
+            if outbox is not None:
+                outbox.put(message_json, kind=message.get("type"))
+    print(f"📢 {message.get('type')} sent to {len(recipients)} of {len(connected_clients)} client(s)")
+    return len(recipients)
+
+
+async def log_metrics(interval):
+    """Print queue metrics every `interval` seconds"""
+    while True:
+        await asyncio.sleep(interval)
+        m = queue_metrics()
+        print(f"📈 {m['clients']} client(s), {m['queued']} queued (max {m['max_depth']}/{m['high_water']}), "
+              f"{m['dropped']} dropped, {m['coalesced']} coalesced, {m['disconnected']} slow disconnects")
 
 
 async def main():
     """Start the WebSocket server"""
+    if not os.getenv("REALTIME_SECRET"):
+        raise SystemExit("❌ REALTIME_SECRET is not set; the server cannot issue realtime tokens")
     async with websockets.serve(handler, "localhost", 8765):
         print("🚀 WebSocket Server started on ws://localhost:8765")
+        print(f"   Slow clients: {SLOW_CLIENT_POLICY} past {QUEUE_HIGH_WATER} queued messages")
         print("   Waiting for connections...")
-        await asyncio.Future()  # Run forever
+        if STATUS_SCHEDULER:
+            start_scheduler(asyncio.get_running_loop())
+        if METRICS_INTERVAL > 0:
+            await log_metrics(METRICS_INTERVAL)  # Runs forever
+        else:
+            await asyncio.Future()  # Run forever
+
+
+def start_scheduler(loop, scheduler=status_scheduler):
+    """Run the status scheduler in this process, publishing its events directly"""
+    def publish_threadsafe(message):
+        asyncio.run_coroutine_threadsafe(publish(message, topics_for(message)), loop)
+
+    scheduler.publish = publish_threadsafe
+    scheduler.start()
+    print("   Status scheduler running")
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())